@@ -0,0 +1,204 @@
+import contextlib
+import datetime
+import random
+import time
+import tracemalloc
+import uuid
+from typing import Dict, List
+from common.config import METRICS_NAMESPACE
+from common.metrics import InvocationMetrics
+from common.runtime_context import RUNTIME_CONTEXT
+from compiler.schedule_compiler import ScheduleCompiler
+from fake_dynamodb import FakeDynamoDB, FakeTable
+from fake_nimble import FakeNimbleClient
+from lambda_handler import launch_for_tick
+from launch_worker_handler import handler as launch_worker_handler
+from launcher import schedule_cache
+from launcher.launch_queue import InMemoryLaunchQueue
+from model.auto_launch_config import AutoLaunchConfig, get_config_key
+from model.compiled_schedule import CompiledSchedule
+from model.data.dates_applied import DatesApplied
+from model.data.weekdays import Weekdays
+from model.launch_latency import LaunchLatency
+from model.launch_record import LaunchRecord
+from model.session_state import SessionState
+from model.time_manager import TimeManager, SLOT_MINUTES
+from session_state.state_machine import format_timestamp
+
+MODELS = [AutoLaunchConfig, CompiledSchedule, SessionState, LaunchLatency, LaunchRecord]
+# Share of configs applied on each weekday, MONDAY first
+WEEKDAY_APPLIED_RATES = [0.9, 0.9, 0.9, 0.9, 0.9, 0.1, 0.1]
+LAUNCH_PROFILES_PER_STUDIO = 3
+INSTANCE_TYPES = ['g4dn.xlarge', 'g4dn.2xlarge', 'g4dn.4xlarge']
+# A Monday, so slots given as WEEKDAY@HHMM fall in a known week
+REFERENCE_MONDAY = datetime.datetime(2021, 8, 2)
+
+def get_all_start_times() -> List[str]:
+    return [f"{minutes // 60:02d}{minutes % 60:02d}" for minutes in range(0, 24 * 60, SLOT_MINUTES)]
+
+def parse_slot(slot: str) -> datetime.datetime:
+    """
+    Parses WEEKDAY@HHMM into the matching time of the reference week
+    """
+    weekday, start_time = slot.split('@')
+    return REFERENCE_MONDAY + datetime.timedelta(days=Weekdays[weekday.upper()].value, hours=int(start_time[:2]), minutes=int(start_time[2:]))
+
+"""
+    Fills the fake tables and Nimble client with generated configs spread across studios, start times and weekdays
+"""
+class SyntheticLoadGenerator():
+
+    def __init__(self, studios: int, start_times: List[str], active_session_rate: float, seed: int):
+        self.studios = studios
+        self.start_times = start_times
+        self.active_session_rate = active_session_rate
+        self.random = random.Random(seed)
+
+    def generate_days(self) -> List[str]:
+        days = [str(weekday) for weekday, rate in zip(Weekdays, WEEKDAY_APPLIED_RATES) if self.random.random() < rate]
+        return days or [str(Weekdays.MONDAY)]
+
+    def generate_config(self, index: int) -> AutoLaunchConfig:
+        studio_id = f"studio-{self.random.randrange(self.studios)}"
+        config_uuid = str(uuid.UUID(int=self.random.getrandbits(128)))
+        start_time = self.random.choice(self.start_times)
+        launch_profile = f"{studio_id}-launch-profile-{self.random.randrange(LAUNCH_PROFILES_PER_STUDIO)}"
+        return AutoLaunchConfig(
+            f"user-{index}",
+            get_config_key(start_time, launch_profile, config_uuid),
+            uuid=config_uuid,
+            start_time=start_time,
+            studio_id=studio_id,
+            launch_profile=launch_profile,
+            streaming_image_id=f"{studio_id}-streaming-image",
+            instance_type=self.random.choice(INSTANCE_TYPES),
+            enabled=True,
+            dates_applied=DatesApplied(days=self.generate_days())
+        )
+
+    def fill(self, configs: int, fake_dynamodb: FakeDynamoDB, fake_nimble: FakeNimbleClient) -> None:
+        now = format_timestamp(datetime.datetime.utcnow())
+        for index in range(configs):
+            config = self.generate_config(index)
+            fake_dynamodb.put_raw_item(AutoLaunchConfig.Meta.table_name, config.serialize())
+            if self.random.random() < self.active_session_rate:
+                session = fake_nimble.add_session(config.studio_id, config.user_id, 'READY')
+                session_state = SessionState(config.studio_id, config.user_id, sessions={session['sessionId']: {'state': 'READY', 'updated_at': now}}, version=1)
+                fake_dynamodb.put_raw_item(SessionState.Meta.table_name, session_state.serialize())
+
+"""
+    Runs scheduler ticks against in-memory DynamoDB and Nimble stand-ins, measuring each tick
+"""
+class LauncherBenchmark():
+
+    def __init__(
+        self,
+        generator: SyntheticLoadGenerator,
+        compiled_schedule: bool,
+        launch_queue: bool,
+        shards: int,
+        dynamodb_latency_seconds: float,
+        nimble_latency_seconds: float,
+        throttle_rate: float,
+        trace_memory: bool,
+        seed: int):
+
+        self.generator = generator
+        self.compiled_schedule = compiled_schedule
+        self.launch_queue = launch_queue
+        self.shards = shards
+        self.dynamodb_latency_seconds = dynamodb_latency_seconds
+        self.nimble_latency_seconds = nimble_latency_seconds
+        self.throttle_rate = throttle_rate
+        self.trace_memory = trace_memory
+        self.seed = seed
+
+    def create_fakes(self) -> None:
+        self.fake_dynamodb = FakeDynamoDB(self.dynamodb_latency_seconds)
+        for model in MODELS:
+            self.fake_dynamodb.add_table(FakeTable.from_model(model))
+        self.fake_nimble = FakeNimbleClient(self.nimble_latency_seconds, self.throttle_rate, self.seed)
+
+    def reset_warm_state(self) -> None:
+        # Each config count starts from a cold container
+        RUNTIME_CONTEXT.nimble_client = self.fake_nimble
+        RUNTIME_CONTEXT.dynamodb_client = self.fake_dynamodb.client()
+        for cache in RUNTIME_CONTEXT.caches:
+            cache.entries.clear()
+        schedule_cache._cached_version = None
+        schedule_cache._cached_index = dict()
+
+    @staticmethod
+    def drain_launch_queue(launch_queue: InMemoryLaunchQueue) -> int:
+        """
+        Invokes the launch worker with batches from the queue until it is empty, returning the number of batches
+        """
+        batches = 0
+        while not launch_queue.is_empty():
+            event = launch_queue.receive_event()
+            launch_queue.complete(event, launch_worker_handler(event, None))
+            batches += 1
+        return batches
+
+    def run_tick(self, configs: int, slot: str) -> Dict:
+        self.fake_dynamodb.reset_counters()
+        self.fake_nimble.reset_counters()
+        metrics = InvocationMetrics(METRICS_NAMESPACE, {"FunctionName": "benchmark"})
+        if self.trace_memory:
+            tracemalloc.start()
+
+        launch_queue = InMemoryLaunchQueue() if self.launch_queue else None
+        worker_batches = None
+        # Shards run one after another, and the slowest shard is the wall time the tick would take with concurrent shards
+        shard_wall_seconds = list()
+        with self.fake_dynamodb.patch():
+            for shard_index in range(self.shards):
+                started_at = time.perf_counter()
+                RUNTIME_CONTEXT.start_invocation()
+                RUNTIME_CONTEXT.warm_table_connections(MODELS)
+                launch_for_tick(TimeManager(parse_slot(slot)), time.time(), metrics, launch_queue, (shard_index, self.shards))
+                shard_wall_seconds.append(time.perf_counter() - started_at)
+            if launch_queue is not None:
+                # Workers run one batch at a time here, so this is the time a single worker would take
+                started_at = time.perf_counter()
+                worker_batches = LauncherBenchmark.drain_launch_queue(launch_queue)
+                shard_wall_seconds = [seconds + time.perf_counter() - started_at for seconds in shard_wall_seconds]
+        wall_seconds = max(shard_wall_seconds)
+
+        peak_memory_bytes = None
+        if self.trace_memory:
+            peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        metric_values = {name: value for name, value in metrics.to_emf().items() if name not in ('_aws', 'FunctionName')}
+        launched = metric_values.get('Launched', 0)
+        if launch_queue is not None:
+            # Launches are counted by the worker invocations, which log their own metrics
+            launched = self.fake_nimble.sessions_created
+        return {
+            "configs": configs,
+            "slot": slot,
+            "wall_seconds": round(wall_seconds, 4),
+            "shard_wall_seconds": [round(seconds, 4) for seconds in shard_wall_seconds],
+            "dynamodb_items_read": self.fake_dynamodb.items_read,
+            "dynamodb_items_written": self.fake_dynamodb.items_written,
+            "dynamodb_query_scan_read_capacity": self.fake_dynamodb.read_capacity,
+            "dynamodb_calls": dict(self.fake_dynamodb.calls),
+            "nimble_calls": dict(self.fake_nimble.calls),
+            "peak_memory_mb": round(peak_memory_bytes / (1024 * 1024), 2) if peak_memory_bytes is not None else None,
+            "launched": launched,
+            "worker_batches": worker_batches,
+            "dead_letters": len(launch_queue.dead_letters) if launch_queue is not None else None,
+            "launches_per_second": round(launched / wall_seconds, 2) if wall_seconds > 0 else None,
+            "metrics": metric_values
+        }
+
+    def run(self, configs: int, slots: List[str], log_file) -> List[Dict]:
+        self.create_fakes()
+        self.reset_warm_state()
+        with contextlib.redirect_stdout(log_file):
+            self.generator.fill(configs, self.fake_dynamodb, self.fake_nimble)
+            if self.compiled_schedule:
+                with self.fake_dynamodb.patch():
+                    ScheduleCompiler().rebuild()
+            return [self.run_tick(configs, slot) for slot in slots]
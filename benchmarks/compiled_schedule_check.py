@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Checks the compiled schedule against a stand-in for DynamoDB that rejects items over 400 KB. Generated configs fill a schedule
+larger than a single item can hold, which must compile, apply stream changes and give the scheduler every config of a slot. The
+scheduler must query the config table instead when the schedule is missing, or is missing changes older than COMPILED_SCHEDULE_MAX_LAG_SECONDS.
+
+Usage: python3 benchmarks/compiled_schedule_check.py
+"""
+import contextlib
+import os
+import sys
+import time
+import uuid
+from argparse import ArgumentParser
+from typing import Dict, Set, Tuple
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE_DIR = os.path.join(REPOSITORY_DIR, "lambda")
+MAX_ITEM_BYTES = 400 * 1024
+SLOT = "MONDAY@0900"
+MOVED_START_TIME = "1700"
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Check the Nimble Studio Auto Workstation Scheduler compiled schedule past the DynamoDB item size limit.")
+
+    parser.add_argument("-c", "--configs", dest="configs", type=int, help="Number of configs to generate", default=20000)
+    parser.add_argument("--start-times", dest="start_times", help="Comma separated HHMM start times configs are spread across", default=f"0900,1300,{MOVED_START_TIME}")
+    parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", help="Show the lambda output instead of discarding it", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def configure_environment() -> None:
+    sys.path.insert(0, LAMBDA_CODE_DIR)
+
+def create_stream_record(old_image: Dict or None, new_image: Dict or None) -> Dict:
+    images = {'ApproximateCreationDateTime': time.time()}
+    if old_image is not None:
+        images['OldImage'] = old_image
+    if new_image is not None:
+        images['NewImage'] = new_image
+    return {'eventID': uuid.uuid4().hex, 'dynamodb': images}
+
+def run_check(configs: int, start_times: str, log_file) -> Dict[str, bool]:
+    from benchmark_runner import SyntheticLoadGenerator, parse_slot
+    from fake_dynamodb import FakeDynamoDB, FakeTable
+    from fake_nimble import FakeNimbleClient
+    from common.runtime_context import RUNTIME_CONTEXT
+    from compiler.schedule_compiler import ScheduleCompiler
+    from launcher.schedule_cache import get_compiled_schedule_slot, get_compiled_schedule_studio_ids
+    from launcher.workstation_launcher import WorkstationLauncher
+    from model.auto_launch_config import AutoLaunchConfig
+    from model.compiled_schedule import CompiledSchedule, COMPILED_SCHEDULE_STATE_KEY
+    from model.time_manager import TimeManager
+
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.add_table(FakeTable.from_model(AutoLaunchConfig))
+    fake_dynamodb.add_table(FakeTable.from_model(CompiledSchedule))
+    fake_nimble = FakeNimbleClient()
+    RUNTIME_CONTEXT.nimble_client = fake_nimble
+    generator = SyntheticLoadGenerator(5, start_times.split(','), 0, 0)
+    generator.fill(configs, fake_dynamodb, fake_nimble)
+    config_table = fake_dynamodb.tables[AutoLaunchConfig.Meta.table_name]
+    state_table = fake_dynamodb.tables[CompiledSchedule.Meta.table_name]
+    time_manager = TimeManager(parse_slot(SLOT))
+    weekday, start_time = str(time_manager.get_weekday()), time_manager.get_target_launch_time()
+
+    def get_expected_uuids() -> Set[str]:
+        expected = set()
+        for item in config_table.items.values():
+            config = AutoLaunchConfig.from_raw_data(item)
+            if config.start_time == start_time and WorkstationLauncher.is_config_enabled_on_day(time_manager.get_weekday(), config):
+                expected.add(config.uuid)
+        return expected
+
+    def read_launcher_uuids() -> Tuple[Set[str], bool]:
+        """
+        Returns the uuids of the configs the launcher reads for the slot, and whether it queried the config table for them
+        """
+        fake_dynamodb.reset_counters()
+        uuids = {plan.config_uuid for plan in WorkstationLauncher(time_manager, "check").read_slot_launch_plans()}
+        return (uuids, fake_dynamodb.calls.get('Query', 0) > 0)
+
+    def get_schedule_part_items() -> Dict:
+        return {key: item for key, item in state_table.items.items() if item['state_key']['S'].startswith(f"{COMPILED_SCHEDULE_STATE_KEY}#")}
+
+    results = dict()
+    with fake_dynamodb.patch(), contextlib.redirect_stdout(log_file):
+        compiler = ScheduleCompiler()
+        compiler.rebuild()
+        schedule = compiler.get_schedule()
+        part_items = get_schedule_part_items()
+        schedule_bytes = sum(FakeDynamoDB.get_item_size(item) for item in part_items.values()) + FakeDynamoDB.get_item_size(schedule.serialize())
+        results[f"The compiled schedule of {configs} configs is larger than a single item can hold ({schedule_bytes} bytes)"] = schedule_bytes > MAX_ITEM_BYTES
+        results["A slot is split across items"] = any(parts > 1 for revision, parts in schedule.get_index()['slots'].values())
+
+        expected = get_expected_uuids()
+        results[f"The launcher reads every config of {SLOT} from the compiled schedule"] = read_launcher_uuids() == (expected, False)
+        results["The studios with configs are read from the compiled schedule"] = get_compiled_schedule_studio_ids() == {
+            AutoLaunchConfig.from_raw_data(item).studio_id for item in config_table.items.values()
+        }
+
+        # Move one config of the slot to another start time, delete another, and add a new one
+        slot_items = [(key, item) for key, item in config_table.items.items() if item['uuid']['S'] in expected]
+        (moved_key, moved_item), (deleted_key, deleted_item) = slot_items[0], slot_items[1]
+        moved_config = AutoLaunchConfig.from_raw_data(moved_item)
+        moved_config.start_time = MOVED_START_TIME
+        new_moved_item = moved_config.serialize()
+        config_table.items[moved_key] = new_moved_item
+        del config_table.items[deleted_key]
+        added_item = generator.generate_config(configs).serialize()
+        added_item['start_time'] = {'S': start_time}
+        added_item['dates_applied'] = {'M': {'days': {'L': [{'S': weekday}]}}}
+        fake_dynamodb.put_raw_item(AutoLaunchConfig.Meta.table_name, added_item)
+        compiler.apply_stream_records([
+            create_stream_record(moved_item, new_moved_item),
+            create_stream_record(deleted_item, None),
+            create_stream_record(None, added_item)
+        ])
+        expected = get_expected_uuids()
+        results["Stream changes are applied to the compiled schedule"] = (
+            get_compiled_schedule_slot(weekday, start_time).keys() == expected and added_item['uuid']['S'] in expected
+        )
+        schedule = compiler.get_schedule()
+        results["Applied stream batches are no longer pending"] = len(schedule.get_pending_batches()) == 0
+        results["Replaced slot items are deleted"] = len(get_schedule_part_items()) == sum(parts for revision, parts in schedule.get_index()['slots'].values())
+
+        # A batch of changes that has not been applied for an hour, as when the compiler keeps failing
+        schedule.set_pending_batches({"stale": time.time() - 3600})
+        schedule.save()
+        results["The launcher queries the config table when the schedule is behind the config table"] = read_launcher_uuids() == (expected, True)
+
+        del state_table.items[state_table.get_key(schedule.serialize())]
+        results["The launcher queries the config table when no schedule has been compiled"] = read_launcher_uuids() == (expected, True)
+    return results
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    configure_environment()
+
+    with open(os.devnull, "w") as devnull:
+        results = run_check(script_args.configs, script_args.start_times, sys.stdout if script_args.verbose else devnull)
+
+    for check, passed in results.items():
+        print(f"{'OK' if passed else 'FAILED'}: {check}")
+    if not all(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
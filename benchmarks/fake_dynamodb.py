@@ -0,0 +1,274 @@
+import json
+import math
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from unittest import mock
+from botocore.exceptions import ClientError
+from pynamodb.connection.base import Connection
+
+# DynamoDB returns at most 1 MB of items per Query or Scan page
+PAGE_SIZE_BYTES = 1024 * 1024
+# Query and Scan consume one read capacity unit per 4 KB of full items read, halved for eventually consistent reads
+READ_CAPACITY_UNIT_BYTES = 4 * 1024
+# DynamoDB rejects items larger than 400 KB, counting attribute names and values
+MAX_ITEM_BYTES = 400 * 1024
+
+"""
+    Key schema of a fake table and its global secondary indexes
+"""
+class FakeTable():
+
+    def __init__(self, name: str, hash_key: str, range_key: str = None, indexes: Dict[str, Tuple[str, str]] = None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = indexes or dict()
+        self.items : Dict[Tuple, Dict] = dict()
+
+    @staticmethod
+    def get_key_names(attributes) -> Tuple[str, str]:
+        hash_key = range_key = None
+        for attribute in attributes:
+            if attribute.is_hash_key:
+                hash_key = attribute.attr_name
+            if attribute.is_range_key:
+                range_key = attribute.attr_name
+        return (hash_key, range_key)
+
+    @classmethod
+    def from_model(cls, model) -> 'FakeTable':
+        hash_key, range_key = FakeTable.get_key_names(model.get_attributes().values())
+        indexes = {
+            index.Meta.index_name: FakeTable.get_key_names(index.Meta.attributes.values())
+            for index in model._indexes.values()
+        }
+        return cls(model.Meta.table_name, hash_key, range_key, indexes)
+
+    def get_key(self, item: Dict) -> Tuple:
+        key = (json.dumps(item[self.hash_key], sort_keys=True),)
+        if self.range_key is not None:
+            key += (json.dumps(item[self.range_key], sort_keys=True),)
+        return key
+
+    def get_key_schema(self, index_name: str = None) -> Tuple[str, str]:
+        if index_name is not None:
+            return self.indexes[index_name]
+        return (self.hash_key, self.range_key)
+
+"""
+    In-memory stand-in for the DynamoDB operations the lambda makes through pynamodb, counting calls and items read.
+    Writes of items over 400 KB fail as they do in DynamoDB. Condition expressions are not evaluated, and Query and Scan
+    do not support filter expressions.
+"""
+class FakeDynamoDB():
+
+    def __init__(self, latency_seconds: float = 0):
+        self.latency_seconds = latency_seconds
+        self.tables : Dict[str, FakeTable] = dict()
+        self.lock = threading.Lock()
+        self.calls : Dict[str, int] = dict()
+        self.items_read = 0
+        self.items_written = 0
+        self.read_capacity = 0.0
+
+    def add_table(self, table: FakeTable) -> None:
+        self.tables[table.name] = table
+
+    def put_raw_item(self, table_name: str, item: Dict) -> None:
+        table = self.tables[table_name]
+        table.items[table.get_key(item)] = item
+
+    @staticmethod
+    def get_value_size(value: Dict) -> int:
+        (value_type, data), = value.items()
+        if value_type in ('S', 'N'):
+            return len(data.encode('utf-8'))
+        if value_type == 'B':
+            return len(data)
+        if value_type in ('SS', 'NS'):
+            return sum(len(x.encode('utf-8')) for x in data)
+        if value_type == 'M':
+            return FakeDynamoDB.get_item_size(data)
+        if value_type == 'L':
+            return sum(FakeDynamoDB.get_value_size(x) for x in data)
+        return 1
+
+    @staticmethod
+    def get_item_size(item: Dict) -> int:
+        return sum(len(name.encode('utf-8')) + FakeDynamoDB.get_value_size(value) for name, value in item.items())
+
+    @staticmethod
+    def check_item_size(operation_name: str, item: Dict) -> None:
+        if FakeDynamoDB.get_item_size(item) > MAX_ITEM_BYTES:
+            error = {'Error': {'Code': 'ValidationException', 'Message': "Item size has exceeded the maximum allowed size"}}
+            raise ClientError(error, operation_name)
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.calls = dict()
+            self.items_read = 0
+            self.items_written = 0
+            self.read_capacity = 0.0
+
+    @staticmethod
+    def resolve_name(name: str, kwargs: Dict) -> str:
+        return kwargs.get('ExpressionAttributeNames', dict()).get(name, name)
+
+    @staticmethod
+    def project(item: Dict, kwargs: Dict) -> Dict:
+        if 'ProjectionExpression' not in kwargs:
+            return item
+        names = [FakeDynamoDB.resolve_name(name.strip(), kwargs) for name in kwargs['ProjectionExpression'].split(',')]
+        return {name: value for name, value in item.items() if name in names}
+
+    @staticmethod
+    def get_hash_condition(kwargs: Dict) -> Tuple[str, Dict]:
+        # pynamodb renders the hash key condition first, as "#0 = :0"
+        expression = kwargs['KeyConditionExpression'].strip('()')
+        name, value = [part.strip() for part in expression.split(' AND ')[0].split('=')]
+        return (FakeDynamoDB.resolve_name(name, kwargs), kwargs['ExpressionAttributeValues'][value])
+
+    @staticmethod
+    def in_segment(table: FakeTable, item: Dict, kwargs: Dict) -> bool:
+        if 'TotalSegments' not in kwargs:
+            return True
+        return zlib.crc32(table.get_key(item)[0].encode('utf-8')) % kwargs['TotalSegments'] == kwargs['Segment']
+
+    def paginate(self, table: FakeTable, items: List[Dict], key_schema: Tuple[str, str], kwargs: Dict) -> Dict:
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start_key = table.get_key(kwargs['ExclusiveStartKey'])
+            start = next(i for i, item in enumerate(items) if table.get_key(item) == start_key) + 1
+
+        page : List[Dict] = list()
+        page_bytes = 0
+        for item in items[start:]:
+            if page_bytes >= PAGE_SIZE_BYTES or ('Limit' in kwargs and len(page) >= kwargs['Limit']):
+                break
+            page_bytes += len(json.dumps(item))
+            page.append(item)
+
+        response = {'Items': [FakeDynamoDB.project(item, kwargs) for item in page], 'Count': len(page), 'ScannedCount': len(page)}
+        # Capacity is charged on the full items read, whatever the projection
+        capacity_units = math.ceil(page_bytes / READ_CAPACITY_UNIT_BYTES) * (1 if kwargs.get('ConsistentRead') else 0.5)
+        self.read_capacity += capacity_units
+        if kwargs.get('ReturnConsumedCapacity') == 'TOTAL':
+            response['ConsumedCapacity'] = {'TableName': table.name, 'CapacityUnits': capacity_units}
+        if start + len(page) < len(items):
+            last = page[-1]
+            key_names = {table.hash_key, table.range_key} | set(key_schema)
+            response['LastEvaluatedKey'] = {name: last[name] for name in key_names if name is not None and name in last}
+        return response
+
+    def get_item(self, kwargs: Dict) -> Dict:
+        table = self.tables[kwargs['TableName']]
+        item = table.items.get(table.get_key(kwargs['Key']))
+        if item is None:
+            return dict()
+        self.items_read += 1
+        return {'Item': FakeDynamoDB.project(item, kwargs)}
+
+    def batch_get_item(self, kwargs: Dict) -> Dict:
+        responses = dict()
+        for table_name, request in kwargs['RequestItems'].items():
+            table = self.tables[table_name]
+            items = [table.items.get(table.get_key(key)) for key in request['Keys']]
+            responses[table_name] = [FakeDynamoDB.project(item, request) for item in items if item is not None]
+            self.items_read += len(responses[table_name])
+        return {'Responses': responses, 'UnprocessedKeys': dict()}
+
+    def put_item(self, kwargs: Dict) -> Dict:
+        FakeDynamoDB.check_item_size('PutItem', kwargs['Item'])
+        self.put_raw_item(kwargs['TableName'], kwargs['Item'])
+        self.items_written += 1
+        return dict()
+
+    def batch_write_item(self, kwargs: Dict) -> Dict:
+        for table_name, requests in kwargs['RequestItems'].items():
+            table = self.tables[table_name]
+            for request in requests:
+                if 'PutRequest' in request:
+                    FakeDynamoDB.check_item_size('BatchWriteItem', request['PutRequest']['Item'])
+                    self.put_raw_item(table_name, request['PutRequest']['Item'])
+                else:
+                    table.items.pop(table.get_key(request['DeleteRequest']['Key']), None)
+                self.items_written += 1
+        return {'UnprocessedItems': dict()}
+
+    def query(self, kwargs: Dict) -> Dict:
+        if 'FilterExpression' in kwargs:
+            raise NotImplementedError("Filter expressions are not supported by the fake")
+        table = self.tables[kwargs['TableName']]
+        key_schema = table.get_key_schema(kwargs.get('IndexName'))
+        hash_name, hash_value = FakeDynamoDB.get_hash_condition(kwargs)
+        items = [item for item in table.items.values() if item.get(hash_name) == hash_value]
+        if key_schema[1] is not None:
+            items.sort(key=lambda item: json.dumps(item.get(key_schema[1]), sort_keys=True))
+        response = self.paginate(table, items, key_schema, kwargs)
+        self.items_read += response['Count']
+        return response
+
+    def scan(self, kwargs: Dict) -> Dict:
+        if 'FilterExpression' in kwargs:
+            raise NotImplementedError("Filter expressions are not supported by the fake")
+        table = self.tables[kwargs['TableName']]
+        items = [item for item in table.items.values() if FakeDynamoDB.in_segment(table, item, kwargs)]
+        response = self.paginate(table, items, table.get_key_schema(), kwargs)
+        self.items_read += response['Count']
+        return response
+
+    def describe_table(self, kwargs: Dict) -> Dict:
+        table = self.tables[kwargs['TableName']]
+        key_schema = [{'AttributeName': table.hash_key, 'KeyType': 'HASH'}]
+        if table.range_key is not None:
+            key_schema.append({'AttributeName': table.range_key, 'KeyType': 'RANGE'})
+        return {'Table': {'TableName': table.name, 'KeySchema': key_schema, 'TableStatus': 'ACTIVE'}}
+
+    def dispatch(self, operation_name: str, operation_kwargs: Dict) -> Dict:
+        operations = {
+            'GetItem': self.get_item,
+            'BatchGetItem': self.batch_get_item,
+            'PutItem': self.put_item,
+            'BatchWriteItem': self.batch_write_item,
+            'Query': self.query,
+            'Scan': self.scan,
+            'DescribeTable': self.describe_table
+        }
+        if operation_name not in operations:
+            raise NotImplementedError(f"{operation_name} is not supported by the fake")
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        with self.lock:
+            self.calls[operation_name] = self.calls.get(operation_name, 0) + 1
+            return operations[operation_name](operation_kwargs)
+
+    def client(self) -> 'FakeDynamoDBClient':
+        return FakeDynamoDBClient(self)
+
+    @contextmanager
+    def patch(self):
+        """
+        Routes every pynamodb request to this fake while in the context
+        """
+        fake = self
+        def dispatch(connection, operation_name, operation_kwargs):
+            return fake.dispatch(operation_name, operation_kwargs)
+        with mock.patch.object(Connection, 'dispatch', dispatch):
+            yield self
+
+"""
+    Stand-in for the low-level DynamoDB client of the runtime context, sending its calls to a FakeDynamoDB
+"""
+class FakeDynamoDBClient():
+
+    def __init__(self, fake: FakeDynamoDB):
+        self.fake = fake
+
+    def query(self, **kwargs) -> Dict:
+        return self.fake.dispatch('Query', kwargs)
+
+    def scan(self, **kwargs) -> Dict:
+        return self.fake.dispatch('Scan', kwargs)
@@ -0,0 +1,81 @@
+import random
+import threading
+import time
+import uuid
+from botocore.exceptions import ClientError
+from typing import Dict, List
+
+# Nimble returns at most 100 sessions per ListStreamingSessions page
+SESSIONS_PAGE_SIZE = 100
+
+class FakeStreamingSessionPaginator():
+
+    def __init__(self, client: 'FakeNimbleClient'):
+        self.client = client
+
+    def paginate(self, studioId: str):
+        sessions = self.client.get_studio_sessions(studioId)
+        for start in range(0, max(1, len(sessions)), SESSIONS_PAGE_SIZE):
+            self.client.call("ListStreamingSessions")
+            yield {'sessions': sessions[start:start + SESSIONS_PAGE_SIZE]}
+
+"""
+    Stand-in for the Nimble Studio client used by the launcher, with a fixed latency per call and a share of
+    CreateStreamingSession calls rejected with ThrottlingException
+"""
+class FakeNimbleClient():
+
+    def __init__(self, latency_seconds: float = 0, throttle_rate: float = 0, seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls : Dict[str, int] = dict()
+        self.sessions_created = 0
+        self.sessions_by_studio : Dict[str, List[Dict]] = dict()
+        self.sessions_by_client_token : Dict[str, Dict] = dict()
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.calls = dict()
+            self.sessions_created = 0
+
+    def call(self, operation_name: str) -> None:
+        with self.lock:
+            self.calls[operation_name] = self.calls.get(operation_name, 0) + 1
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    def add_session(self, studio_id: str, owned_by: str, state: str) -> Dict:
+        session = {'sessionId': str(uuid.uuid4()), 'ownedBy': owned_by, 'state': state}
+        with self.lock:
+            self.sessions_by_studio.setdefault(studio_id, list()).append(session)
+        return session
+
+    def get_studio_sessions(self, studio_id: str) -> List[Dict]:
+        with self.lock:
+            return list(self.sessions_by_studio.get(studio_id, list()))
+
+    def get_paginator(self, operation_name: str):
+        if operation_name != 'list_streaming_sessions':
+            raise NotImplementedError(f"{operation_name} is not supported by the fake")
+        return FakeStreamingSessionPaginator(self)
+
+    def get_launch_profile(self, launchProfileId: str, studioId: str) -> Dict:
+        self.call("GetLaunchProfile")
+        return {'launchProfile': {'launchProfileId': launchProfileId, 'state': 'READY'}}
+
+    def create_streaming_session(self, clientToken: str, ownedBy: str, studioId: str, **kwargs) -> Dict:
+        self.call("CreateStreamingSession")
+        with self.lock:
+            throttled = self.random.random() < self.throttle_rate
+            existing = self.sessions_by_client_token.get(clientToken)
+        if throttled:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'CreateStreamingSession')
+        # Client tokens make retried creates return the session they already created
+        if existing is None:
+            existing = self.add_session(studioId, ownedBy, 'CREATE_IN_PROGRESS')
+            with self.lock:
+                self.sessions_by_client_token[clientToken] = existing
+                self.sessions_created += 1
+        return {'session': existing}
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the cold start of the lambda handlers: the time to import each handler module in a fresh interpreter, the modules
+that cost the most, and the time the scheduler takes to connect its tables before a tick.
+
+Usage: python3 benchmarks/import_time_benchmark.py --runs 5 --output import_time_results.json
+"""
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE_DIR = os.path.join(REPOSITORY_DIR, "lambda")
+HANDLER_MODULES = ["lambda_handler", "launch_worker_handler", "session_state_handler", "schedule_compiler_handler"]
+
+# Run in a fresh interpreter, so every import and client is cold. Prints the seconds to import the scheduler handler, to connect
+# the tables of every tick, to import what a tick whose slot is already completed imports, and to connect the tables only used
+# when there is something to launch, followed by the scheduler modules that the completed tick imported
+INIT_SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+import lambda_handler
+imported_at = time.perf_counter()
+from common.runtime_context import RUNTIME_CONTEXT
+RUNTIME_CONTEXT.warm_table_connections(lambda_handler.TICK_MODELS)
+tick_tables_at = time.perf_counter()
+modules_before_tick = set(sys.modules)
+from launcher.session_ender import SessionEnder
+completed_tick_at = time.perf_counter()
+completed_tick_modules = sorted(x for x in set(sys.modules) - modules_before_tick if x.split('.')[0] in ('common', 'compiler', 'launcher', 'model', 'session_state'))
+from model.auto_launch_config import AutoLaunchConfig
+from model.launch_latency import LaunchLatency
+from model.launch_record import LaunchRecord
+from model.session_state import SessionState
+RUNTIME_CONTEXT.warm_table_connections([AutoLaunchConfig, SessionState, LaunchLatency, LaunchRecord])
+launch_tables_at = time.perf_counter()
+print(json.dumps([imported_at - started_at, tick_tables_at - imported_at, completed_tick_at - tick_tables_at, launch_tables_at - completed_tick_at, completed_tick_modules]))
+"""
+
+"""
+    Local DynamoDB endpoint answering every request with ResourceNotFoundException, so the handlers describe their tables
+    without an AWS account. The tables still cost a request each, as on a cold start
+"""
+class TableNotFoundHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'__type': 'com.amazonaws.dynamodb.v20120810#ResourceNotFoundException', 'message': 'Requested resource not found'}).encode()
+        self.send_response(400)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_dynamodb_endpoint() -> str:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TableNotFoundHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Benchmark the import time and table connection time of the Nimble Studio Auto Workstation Scheduler lambdas.")
+
+    parser.add_argument("-m", "--modules", dest="modules", nargs="+", help="Handler modules to import, one benchmark each", default=HANDLER_MODULES)
+    parser.add_argument("-r", "--runs", dest="runs", type=int, help="Fresh interpreters started per module, reporting the median", default=5)
+    parser.add_argument("-n", "--top", dest="top", type=int, help="Number of slowest modules to list per handler", default=10)
+    parser.add_argument("--no-init", dest="init", action="store_false", help="Skip timing the scheduler's table connections", default=True)
+    parser.add_argument("-o", "--output", dest="output", help="File to save the JSON results to", default="import_time_results.json")
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def get_environment(dynamodb_endpoint : str = None) -> Dict[str, str]:
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = LAMBDA_CODE_DIR
+    environment.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+    if dynamodb_endpoint is not None:
+        # Requests to the local endpoint are signed, but never checked
+        environment["AWS_ENDPOINT_URL_DYNAMODB"] = dynamodb_endpoint
+        environment["AWS_ACCESS_KEY_ID"] = "benchmark"
+        environment["AWS_SECRET_ACCESS_KEY"] = "benchmark"
+        environment.pop("AWS_SESSION_TOKEN", None)
+    environment["PYTHONDONTWRITEBYTECODE"] = "1"
+    return environment
+
+def parse_import_times(output: str) -> Dict[str, Dict[str, int]]:
+    """
+    Parses the -X importtime report into the self and cumulative microseconds of each module
+    """
+    times = dict()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return times
+
+def time_import(module: str) -> Dict[str, Dict[str, int]]:
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=LAMBDA_CODE_DIR, env=get_environment(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    return parse_import_times(process.stderr.decode())
+
+def time_init(dynamodb_endpoint : str) -> List[float]:
+    process = subprocess.run([sys.executable, "-c", INIT_SCRIPT],
+        cwd=LAMBDA_CODE_DIR, env=get_environment(dynamodb_endpoint), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    return json.loads(process.stdout.decode().splitlines()[-1])
+
+def get_median_us(runs: List[Dict[str, Dict[str, int]]], name: str, field: str) -> int:
+    return int(statistics.median(run.get(name, {}).get(field, 0) for run in runs))
+
+def benchmark_module(module: str, runs: int, top: int) -> Dict:
+    import_runs = [time_import(module) for run in range(runs)]
+    names = {name for run in import_runs for name in run}
+    slowest = sorted(((get_median_us(import_runs, name, "self_us"), name) for name in names), reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": round(get_median_us(import_runs, module, "cumulative_us") / 1000, 1),
+        "modules_imported": len(names),
+        "slowest_modules": [{"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(get_median_us(import_runs, name, "cumulative_us") / 1000, 1)} for self_us, name in slowest]
+    }
+
+def benchmark_init(runs: int) -> Dict:
+    dynamodb_endpoint = start_dynamodb_endpoint()
+    init_runs = [time_init(dynamodb_endpoint) for run in range(runs)]
+    import_seconds, tick_tables_seconds, completed_tick_seconds, launch_tables_seconds = [statistics.median(run[index] for run in init_runs) for index in range(4)]
+    return {
+        "import_ms": round(import_seconds * 1000, 1),
+        "connect_tick_tables_ms": round(tick_tables_seconds * 1000, 1),
+        "completed_tick_import_ms": round(completed_tick_seconds * 1000, 1),
+        "completed_tick_modules": init_runs[-1][4],
+        "connect_launch_tables_ms": round(launch_tables_seconds * 1000, 1)
+    }
+
+def get_git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+
+    runs = list()
+    for module in script_args.modules:
+        run = benchmark_module(module, script_args.runs, script_args.top)
+        print(f"{module}: {run['import_ms']} ms to import {run['modules_imported']} modules, slowest "
+            + ", ".join(f"{x['module']} {x['self_ms']} ms" for x in run['slowest_modules'][:3]))
+        runs.append(run)
+
+    init = None
+    if script_args.init:
+        init = benchmark_init(script_args.runs)
+        print(f"lambda_handler cold start: {init['import_ms']} ms to import, {init['connect_tick_tables_ms']} ms to connect the tables of every tick, "
+            f"{init['connect_launch_tables_ms']} ms more when there is something to launch")
+        print(f"Completed slot tick: {init['completed_tick_import_ms']} ms to import " + ", ".join(init['completed_tick_modules']))
+
+    results = {
+        "benchmark": "import_time",
+        "git_revision": get_git_revision(),
+        "python_version": platform.python_version(),
+        "created_at": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "parameters": vars(script_args),
+        "runs": runs,
+        "init": init
+    }
+    with open(script_args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"Saved results to {script_args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Checks how the launch worker handles failed launches, with the in-memory launch queue and stand-ins for DynamoDB and Nimble
+Studio. Launches failing with throttling or server errors must be reported in batchItemFailures and launched when received
+again, launches failing with other errors and unreadable messages must not be received again, and launches failing on
+every receive must be moved to the dead letters.
+
+Usage: python3 benchmarks/launch_queue_check.py
+"""
+import contextlib
+import os
+import sys
+import time
+import uuid
+from argparse import ArgumentParser
+from typing import Dict, List
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE_DIR = os.path.join(REPOSITORY_DIR, "lambda")
+STUDIO_ID = "studio"
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Check the retries of the Nimble Studio Auto Workstation Scheduler launch worker against an in-memory launch queue.")
+
+    parser.add_argument("-m", "--max-receive-count", dest="max_receive_count", type=int, help="Receives of a message before it is moved to the dead letters", default=5)
+    parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", help="Show the lambda output instead of discarding it", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def configure_environment() -> None:
+    # Throttled calls are not retried within a launch, so each throttled launch is reported back to the queue
+    os.environ["LAUNCH_MAX_RETRIES"] = "0"
+    sys.path.insert(0, LAMBDA_CODE_DIR)
+
+def create_client_error(code: str, status_code: int):
+    from botocore.exceptions import ClientError
+    return ClientError({'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status_code}}, 'CreateStreamingSession')
+
+def get_create_failures(max_receive_count: int) -> Dict[str, List[Exception]]:
+    """
+    Errors raised by the create calls of each user, one per call, after which the create call succeeds
+    """
+    return {
+        "launched_first": [],
+        "throttled_once": [create_client_error('ThrottlingException', 400)],
+        "server_error_once": [create_client_error('InternalServerErrorException', 500)],
+        "invalid": [create_client_error('ValidationException', 400)],
+        "unavailable": [create_client_error('ServiceUnavailableException', 503)] * max_receive_count
+    }
+
+def create_message(user_id: str):
+    from launcher.launch_message import LaunchMessage
+    return LaunchMessage(
+        config_uuid=str(uuid.uuid4()),
+        user_id=user_id,
+        studio_id=STUDIO_ID,
+        launch_profile="launch_profile",
+        streaming_image_id="streaming_image",
+        instance_type="g4dn.xlarge",
+        target_launch_time="0900",
+        client_token=str(uuid.uuid4()),
+        tick_time=time.time()
+    )
+
+def run_check(max_receive_count: int, log_file) -> Dict[str, bool]:
+    from fake_dynamodb import FakeDynamoDB, FakeTable
+    from fake_nimble import FakeNimbleClient
+    from common.runtime_context import RUNTIME_CONTEXT
+    from launch_worker_handler import handler as launch_worker_handler
+    from launcher.launch_queue import InMemoryLaunchQueue
+    from model.launch_record import LaunchRecord
+
+    create_failures = get_create_failures(max_receive_count)
+    fake_nimble = FakeNimbleClient()
+    create_streaming_session = fake_nimble.create_streaming_session
+    create_calls = {user_id: 0 for user_id in create_failures}
+    def fail_create_streaming_session(clientToken: str, ownedBy: str, studioId: str, **kwargs) -> Dict:
+        create_calls[ownedBy] += 1
+        if create_calls[ownedBy] <= len(create_failures[ownedBy]):
+            raise create_failures[ownedBy][create_calls[ownedBy] - 1]
+        return create_streaming_session(clientToken, ownedBy, studioId, **kwargs)
+    fake_nimble.create_streaming_session = fail_create_streaming_session
+    RUNTIME_CONTEXT.nimble_client = fake_nimble
+
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.add_table(FakeTable.from_model(LaunchRecord))
+
+    launch_queue = InMemoryLaunchQueue(max_receive_count)
+    messages = {user_id: create_message(user_id) for user_id in create_failures}
+    launch_queue.send(list(messages.values()))
+    launch_queue.messages.append({'messageId': str(uuid.uuid4()), 'body': "not a launch message", 'receiveCount': 0})
+
+    first_failures = None
+    with fake_dynamodb.patch(), contextlib.redirect_stdout(log_file):
+        while not launch_queue.is_empty():
+            event = launch_queue.receive_event()
+            response = launch_worker_handler(event, None)
+            if first_failures is None:
+                bodies = {record['messageId']: record['body'] for record in event['Records']}
+                first_failures = {bodies[failure['itemIdentifier']] for failure in response['batchItemFailures']}
+            launch_queue.complete(event, response)
+
+    created_users = {session['ownedBy'] for session in fake_nimble.sessions_by_client_token.values()}
+    dead_letter_bodies = {message['body'] for message in launch_queue.dead_letters}
+    retryable_users = ["throttled_once", "server_error_once", "unavailable"]
+    return {
+        "Only throttled and server errors are reported in batchItemFailures": first_failures == {messages[x].to_json() for x in retryable_users},
+        "Launches after a throttling or server error are launched when received again": {"launched_first", "throttled_once", "server_error_once"} == created_users,
+        "Launches that fail with a validation error are not received again": create_calls["invalid"] == 1 and messages["invalid"].to_json() not in dead_letter_bodies,
+        "Unreadable messages are not received again": "not a launch message" not in dead_letter_bodies,
+        f"Launches failing on every receive are dead lettered after {max_receive_count} receives": create_calls["unavailable"] == max_receive_count and dead_letter_bodies == {messages["unavailable"].to_json()}
+    }
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    configure_environment()
+
+    with open(os.devnull, "w") as devnull:
+        results = run_check(script_args.max_receive_count, sys.stdout if script_args.verbose else devnull)
+
+    for check, passed in results.items():
+        print(f"{'OK' if passed else 'FAILED'}: {check}")
+    if not all(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
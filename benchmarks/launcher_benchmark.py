@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmarks scheduler ticks against generated configs, with in-memory stand-ins for DynamoDB and Nimble Studio.
+
+Usage: python3 benchmarks/launcher_benchmark.py --configs 100 10000 100000 --slots MONDAY@0900 --output results.json
+"""
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE_DIR = os.path.join(REPOSITORY_DIR, "lambda")
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Benchmark the Nimble Studio Auto Workstation Scheduler lambda against synthetic load.")
+
+    parser.add_argument("-c", "--configs", dest="configs", type=int, nargs="+", help="Numbers of configs to generate, one benchmark each", default=[100, 10000])
+    parser.add_argument("-s", "--slots", dest="slots", nargs="+", help="Ticks to run for each config count, as WEEKDAY@HHMM", default=["MONDAY@0900"])
+    parser.add_argument("--studios", dest="studios", type=int, help="Number of studios configs are spread across", default=5)
+    parser.add_argument("--start-times", dest="start_times", help="Comma separated HHMM start times configs are spread across. Defaults to every slot of the day", required=False)
+    parser.add_argument("--active-session-rate", dest="active_session_rate", type=float, help="Share of users that already have an active session", default=0.1)
+    parser.add_argument("--active-session-source", dest="active_session_source", choices=["list_sessions", "state_table"], help="Where the lambda looks up active sessions", default="state_table")
+    parser.add_argument("--data-layer", dest="data_layer", choices=["pynamodb", "client"], help="How the lambda reads configs when no schedule is compiled", default="pynamodb")
+    parser.add_argument("--compiled-schedule", dest="compiled_schedule", action="store_true", help="Compile the schedule before running ticks, instead of querying the config table", default=False)
+    parser.add_argument("--launch-queue", dest="launch_queue", action="store_true", help="Send launches to an in-memory launch queue drained by the launch worker, instead of launching in the tick", default=False)
+    parser.add_argument("--shards", dest="shards", type=int, help="Number of launcher shards each tick is split across", default=1)
+    parser.add_argument("--dynamodb-latency-ms", dest="dynamodb_latency_ms", type=float, help="Latency added to each DynamoDB call", default=5)
+    parser.add_argument("--nimble-latency-ms", dest="nimble_latency_ms", type=float, help="Latency added to each Nimble Studio call", default=50)
+    parser.add_argument("--throttle-rate", dest="throttle_rate", type=float, help="Share of create calls rejected with ThrottlingException", default=0)
+    parser.add_argument("--studio-launch-rate", dest="studio_launch_rate", help="Overrides STUDIO_LAUNCH_RATE_PER_SECOND", required=False)
+    parser.add_argument("--launch-concurrency", dest="launch_concurrency", help="Overrides LAUNCH_CONCURRENCY", required=False)
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false", help="Skip peak memory tracing, which slows ticks down", default=True)
+    parser.add_argument("--seed", dest="seed", type=int, help="Seed of the generated configs and throttling", default=0)
+    parser.add_argument("-o", "--output", dest="output", help="File to save the JSON results to", default="benchmark_results.json")
+    parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", help="Show the lambda output instead of discarding it", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def configure_environment(script_args) -> None:
+    # The lambda reads its configuration from the environment when its modules are imported
+    os.environ["ACTIVE_SESSION_SOURCE"] = script_args.active_session_source
+    os.environ["CONFIG_DATA_LAYER"] = script_args.data_layer
+    if script_args.studio_launch_rate is not None:
+        os.environ["STUDIO_LAUNCH_RATE_PER_SECOND"] = script_args.studio_launch_rate
+    if script_args.launch_concurrency is not None:
+        os.environ["LAUNCH_CONCURRENCY"] = script_args.launch_concurrency
+    sys.path.insert(0, LAMBDA_CODE_DIR)
+
+def get_git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def format_run_output(run) -> str:
+    return (f"{run['configs']} configs, {run['slot']}: {run['wall_seconds']:.2f}s, {run['dynamodb_items_read']} items read, "
+        f"{sum(run['dynamodb_calls'].values())} DynamoDB calls, {sum(run['nimble_calls'].values())} Nimble calls, "
+        f"peak memory {run['peak_memory_mb']} MB, {run['launched']} launched at {run['launches_per_second']} launches/s")
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+
+    # The lambda prints a line per launch, which would drown out the results
+    with open(os.devnull, "w") as devnull:
+        log_file = sys.stdout if script_args.verbose else devnull
+        configure_environment(script_args)
+        with contextlib.redirect_stdout(log_file):
+            from benchmark_runner import LauncherBenchmark, SyntheticLoadGenerator, get_all_start_times
+
+        start_times = script_args.start_times.split(",") if script_args.start_times else get_all_start_times()
+        benchmark = LauncherBenchmark(
+            generator=SyntheticLoadGenerator(script_args.studios, start_times, script_args.active_session_rate, script_args.seed),
+            compiled_schedule=script_args.compiled_schedule,
+            launch_queue=script_args.launch_queue,
+            shards=script_args.shards,
+            dynamodb_latency_seconds=script_args.dynamodb_latency_ms / 1000,
+            nimble_latency_seconds=script_args.nimble_latency_ms / 1000,
+            throttle_rate=script_args.throttle_rate,
+            trace_memory=script_args.trace_memory,
+            seed=script_args.seed)
+
+        runs = list()
+        for configs in script_args.configs:
+            for run in benchmark.run(configs, script_args.slots, log_file):
+                print(format_run_output(run))
+                runs.append(run)
+
+    results = {
+        "benchmark": "launcher",
+        "git_revision": get_git_revision(),
+        "python_version": platform.python_version(),
+        "created_at": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "parameters": vars(script_args),
+        "runs": runs
+    }
+    with open(script_args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"Saved results to {script_args.output}")
+
+
+if __name__ == "__main__":
+    main()
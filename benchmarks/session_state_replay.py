@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Replays streaming session state change events against an in-memory session state store, without AWS.
+
+Usage: python3 benchmarks/session_state_replay.py events.jsonl
+
+Each line of the input file is one EventBridge event. A line may instead hold a reconciliation listing:
+{"reconcile": {"studioId": "...", "time": "...", "sessions": [{"sessionId": "...", "ownedBy": "...", "state": "..."}]}}
+"""
+import json
+import os
+import sys
+from argparse import ArgumentParser
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE_DIR = os.path.join(REPOSITORY_DIR, "lambda")
+# Only the lambda code is bundled into the lambdas, so this tool finds it from the repository
+sys.path.insert(0, LAMBDA_CODE_DIR)
+
+from session_state.session_state_store import InMemorySessionStateStore
+from session_state.session_state_tracker import SessionStateTracker
+from session_state.state_machine import has_active_session, is_launch_completion_state
+
+class PrintingLaunchLatencyRecorder():
+
+    def record(self, launch_profile: str, streaming_image_id: str, instance_type: str, latency_seconds: float) -> None:
+        print(f"Time to READY for {launch_profile}/{streaming_image_id}/{instance_type}: {latency_seconds:.0f}s")
+
+class PrintingLaunchRecordTracker():
+
+    def complete(self, session_id: str, state: str, completed_at: str) -> None:
+        if not is_launch_completion_state(state):
+            return
+        print(f"Launch record of session {session_id} would be completed as {state} at {completed_at}")
+
+def replay(lines, tracker: SessionStateTracker) -> None:
+    for line in lines:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        event = json.loads(line)
+        if 'reconcile' in event:
+            listing = event['reconcile']
+            tracker.reconcile_studio(listing['studioId'], listing['sessions'], listing['time'])
+        else:
+            tracker.apply_event(event)
+
+def print_state(store: InMemorySessionStateStore) -> None:
+    for studio_id, owners in store.items.items():
+        for owned_by, sessions in owners.items():
+            print(f"{studio_id} {owned_by} active: {has_active_session(sessions)} sessions: {json.dumps(sessions, sort_keys=True)}")
+
+def main():
+    parser = ArgumentParser(description="Replay streaming session state change events against an in-memory session state store.")
+    parser.add_argument("events_file", help="JSON lines file of events to replay")
+    args = parser.parse_args()
+
+    store = InMemorySessionStateStore()
+    with open(args.events_file) as events:
+        replay(events, SessionStateTracker(store, PrintingLaunchLatencyRecorder(), PrintingLaunchRecordTracker()))
+    print_state(store)
+
+
+if __name__ == "__main__":
+    main()
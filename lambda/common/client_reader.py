@@ -0,0 +1,68 @@
+from typing import Dict, Iterator, List
+from common.runtime_context import RUNTIME_CONTEXT
+
+TOTAL_CONSUMED_CAPACITY = "TOTAL"
+
+def deserialize_value(value: Dict):
+    """
+    Converts a DynamoDB attribute value to the matching Python value. Numbers are returned as floats or ints, which is enough
+    for the config attributes read here
+    """
+    type_name, data = next(iter(value.items()))
+    if type_name == 'S' or type_name == 'BOOL':
+        return data
+    if type_name == 'N':
+        return float(data) if '.' in data or 'e' in data.lower() else int(data)
+    if type_name == 'NULL':
+        return None
+    if type_name == 'M':
+        return deserialize_item(data)
+    if type_name == 'L':
+        return [deserialize_value(x) for x in data]
+    if type_name == 'SS' or type_name == 'NS':
+        return set(data)
+    raise ValueError(f"Unsupported attribute type {type_name}")
+
+def deserialize_item(item: Dict) -> Dict:
+    return {name: deserialize_value(value) for name, value in item.items()}
+
+"""
+    Projected queries and scans through the low-level DynamoDB client of the runtime context, returning plain dicts.
+    Unlike ProjectedReader it needs no pynamodb model, so reading a table does not create the model's own client and connection
+"""
+class ClientReader():
+
+    def __init__(self):
+        self.dynamodb_client = RUNTIME_CONTEXT.get_dynamodb_client()
+        self.consumed_capacity = 0.0
+        self.pages = 0
+
+    @staticmethod
+    def get_projection(attributes: List[str]) -> Dict:
+        # Attribute names are passed as placeholders, as some of them are reserved words
+        names = {f"#p{index}": name for index, name in enumerate(attributes)}
+        return {'ProjectionExpression': ", ".join(names.keys()), 'ExpressionAttributeNames': names}
+
+    def read_pages(self, operation, request: Dict) -> Iterator[Dict]:
+        while True:
+            page = operation(ReturnConsumedCapacity=TOTAL_CONSUMED_CAPACITY, **request)
+            self.consumed_capacity += page.get('ConsumedCapacity', dict()).get('CapacityUnits', 0)
+            self.pages += 1
+            for item in page.get('Items', []):
+                yield deserialize_item(item)
+            if 'LastEvaluatedKey' not in page:
+                return
+            request['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    def query(self, table_name: str, hash_key_name: str, hash_key: str, attributes: List[str], index_name: str = None) -> Iterator[Dict]:
+        request = ClientReader.get_projection(attributes)
+        request['ExpressionAttributeNames']['#k'] = hash_key_name
+        request.update(TableName=table_name, KeyConditionExpression="#k = :k", ExpressionAttributeValues={':k': {'S': hash_key}})
+        if index_name is not None:
+            request['IndexName'] = index_name
+        return self.read_pages(self.dynamodb_client.query, request)
+
+    def scan(self, table_name: str, attributes: List[str]) -> Iterator[Dict]:
+        request = ClientReader.get_projection(attributes)
+        request['TableName'] = table_name
+        return self.read_pages(self.dynamodb_client.scan, request)
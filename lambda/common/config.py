@@ -3,12 +3,19 @@ Configuration file.
 """
 
 import os
+from typing import Dict
+
+# Values read by get_config_var, logged once per container by log_config rather than line by line while modules are imported
+CONFIG_VALUES : Dict[str, str] = dict()
 
 def get_config_var(key: str, default: str) -> str:
     var = os.environ.get(key, default)
-    print(f"Using {var} for {key}")
+    CONFIG_VALUES[key] = var
     return var
 
+def log_config() -> None:
+    print("Using configuration " + ", ".join(f"{key}={value}" for key, value in CONFIG_VALUES.items()))
+
 
 # AWS Region
 AWS_REGION: str = get_config_var("AWS_REGION", "us-west-2")
@@ -16,4 +23,92 @@ AWS_REGION: str = get_config_var("AWS_REGION", "us-west-2")
 # Name of environment variable declaring the table name
 TABLE_NAME_ENV_VAR = "TABLE_NAME"
 
-NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_CONFIG_TABLE_NAME = get_config_var(TABLE_NAME_ENV_VAR, "nimble_studio_auto_workstation_scheduler_config")
+NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_CONFIG_TABLE_NAME = get_config_var(TABLE_NAME_ENV_VAR, "nimble_studio_auto_workstation_scheduler_user_config")
+
+# Name of environment variable declaring the uuid keyed config table, which configs are still read from until the cutover to the user keyed table
+# is complete. Empty once every config has been migrated
+LEGACY_TABLE_NAME_ENV_VAR = "LEGACY_TABLE_NAME"
+
+NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME = get_config_var(LEGACY_TABLE_NAME_ENV_VAR, "")
+
+# Name of environment variable declaring the start time index name
+START_TIME_INDEX_NAME_ENV_VAR = "START_TIME_INDEX_NAME"
+
+START_TIME_INDEX_NAME = get_config_var(START_TIME_INDEX_NAME_ENV_VAR, "start_time_index")
+
+# Minutes between scheduler ticks and between valid start times. Set by the stack from slot_minutes in cdk.json
+SLOT_MINUTES: int = int(get_config_var("SLOT_MINUTES", "15"))
+
+# Name of environment variable declaring the scheduler state table name
+STATE_TABLE_NAME_ENV_VAR = "STATE_TABLE_NAME"
+
+NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME = get_config_var(STATE_TABLE_NAME_ENV_VAR, "nimble_studio_auto_workstation_scheduler_state")
+
+# Number of concurrent create calls, also used to size the Nimble client connection pool
+LAUNCH_CONCURRENCY: int = int(get_config_var("LAUNCH_CONCURRENCY", "10"))
+
+# Sustained create calls per second and burst size allowed per studio
+STUDIO_LAUNCH_RATE_PER_SECOND: float = float(get_config_var("STUDIO_LAUNCH_RATE_PER_SECOND", "5"))
+STUDIO_LAUNCH_BURST: int = int(get_config_var("STUDIO_LAUNCH_BURST", "10"))
+
+# Number of retries for a create call rejected with a throttling error
+LAUNCH_MAX_RETRIES: int = int(get_config_var("LAUNCH_MAX_RETRIES", "5"))
+
+# SQS queue launches are sent to for the launch worker lambda. Launches run in the scheduler lambda when unset
+LAUNCH_QUEUE_URL: str = get_config_var("LAUNCH_QUEUE_URL", "")
+
+# Name of environment variable declaring the session state table name
+SESSION_STATE_TABLE_NAME_ENV_VAR = "SESSION_STATE_TABLE_NAME"
+
+NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_SESSION_STATE_TABLE_NAME = get_config_var(SESSION_STATE_TABLE_NAME_ENV_VAR, "nimble_studio_auto_workstation_scheduler_session_state")
+
+# Where the launcher finds users with active sessions: "list_sessions" pages Nimble, "state_table" reads the session state table
+ACTIVE_SESSION_SOURCE_LIST_SESSIONS = "list_sessions"
+ACTIVE_SESSION_SOURCE_STATE_TABLE = "state_table"
+
+ACTIVE_SESSION_SOURCE: str = get_config_var("ACTIVE_SESSION_SOURCE", ACTIVE_SESSION_SOURCE_LIST_SESSIONS)
+
+# How the launcher starts a user's workstation: "create" always creates a new session, "resume_stopped" starts the user's
+# STOPPED session with the same launch profile and streaming image when there is one, and creates a session otherwise
+LAUNCH_STRATEGY_CREATE = "create"
+LAUNCH_STRATEGY_RESUME_STOPPED = "resume_stopped"
+
+LAUNCH_STRATEGY: str = get_config_var("LAUNCH_STRATEGY", LAUNCH_STRATEGY_CREATE)
+
+# Seconds to cache slow changing lookups in warm lambda containers
+STUDIOS_WITH_CONFIGS_CACHE_TTL_SECONDS: int = int(get_config_var("STUDIOS_WITH_CONFIGS_CACHE_TTL_SECONDS", "900"))
+LAUNCH_PROFILE_CACHE_TTL_SECONDS: int = int(get_config_var("LAUNCH_PROFILE_CACHE_TTL_SECONDS", "3600"))
+
+# Seconds after each tick that its launches are spread over, each user at a fixed offset. Set by the stack from launch_spread_seconds in cdk.json
+LAUNCH_SPREAD_SECONDS: int = int(get_config_var("LAUNCH_SPREAD_SECONDS", "0"))
+
+# Launch each config early by a percentile of its observed time to READY, so the workstation is ready at its start time
+LEAD_TIME_MODE_ENABLED: bool = get_config_var("LEAD_TIME_MODE_ENABLED", "false").lower() == "true"
+LEAD_TIME_PERCENTILE: float = float(get_config_var("LEAD_TIME_PERCENTILE", "90"))
+MAX_LEAD_TIME_MINUTES: int = int(get_config_var("MAX_LEAD_TIME_MINUTES", "60"))
+LAUNCH_LATENCY_CACHE_TTL_SECONDS: int = int(get_config_var("LAUNCH_LATENCY_CACHE_TTL_SECONDS", "900"))
+
+# How the launcher reads configs when no schedule has been compiled: "pynamodb" through the AutoLaunchConfig model,
+# "client" through the low-level DynamoDB client shared by the runtime context, which skips creating the model's own client
+CONFIG_DATA_LAYER_PYNAMODB = "pynamodb"
+CONFIG_DATA_LAYER_CLIENT = "client"
+
+CONFIG_DATA_LAYER: str = get_config_var("CONFIG_DATA_LAYER", CONFIG_DATA_LAYER_PYNAMODB)
+
+# Seconds a batch of config table changes can wait to be applied to the compiled schedule before the launcher stops
+# trusting the schedule and queries the config table instead
+COMPILED_SCHEDULE_MAX_LAG_SECONDS: int = int(get_config_var("COMPILED_SCHEDULE_MAX_LAG_SECONDS", "120"))
+
+# Minutes of slots missed by delayed or failed scheduler runs that the next run launches late. Older gaps are not caught up
+CATCH_UP_WINDOW_MINUTES: int = int(get_config_var("CATCH_UP_WINDOW_MINUTES", "60"))
+
+# Name of environment variable declaring the launch record table name
+LAUNCH_RECORD_TABLE_NAME_ENV_VAR = "LAUNCH_RECORD_TABLE_NAME"
+
+NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LAUNCH_RECORD_TABLE_NAME = get_config_var(LAUNCH_RECORD_TABLE_NAME_ENV_VAR, "nimble_studio_auto_workstation_scheduler_launch_record")
+
+# Days to keep launch records for latency reporting
+LAUNCH_RECORD_RETENTION_DAYS: int = int(get_config_var("LAUNCH_RECORD_RETENTION_DAYS", "90"))
+
+# CloudWatch namespace of the embedded metrics logged by each scheduler run
+METRICS_NAMESPACE: str = get_config_var("METRICS_NAMESPACE", "NimbleStudioAutoWorkstationScheduler")
@@ -0,0 +1,98 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator
+
+COUNT_UNIT = "Count"
+MILLISECONDS_UNIT = "Milliseconds"
+# Unit of consumed DynamoDB capacity, which CloudWatch has no unit for
+NONE_UNIT = "None"
+
+def log_json(event: str, **fields) -> None:
+    """
+    Writes a single JSON log line, so runs can be queried with CloudWatch Logs Insights
+    """
+    # One write per line, so lines logged from the launch threads do not interleave
+    sys.stdout.write(json.dumps(dict(event=event, **fields), default=str) + "\n")
+
+"""
+    Counts and timings of one invocation, logged as CloudWatch Embedded Metric Format so they are extracted as metrics
+    https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+"""
+class InvocationMetrics():
+
+    def __init__(self, namespace: str, dimensions: Dict[str, str]):
+        self.namespace = namespace
+        self.dimensions = dimensions
+        self.values : Dict[str, float] = dict()
+        self.units : Dict[str, str] = dict()
+        self.lock = threading.Lock()
+
+    def add(self, name: str, value: float, unit: str) -> None:
+        with self.lock:
+            self.values[name] = self.values.get(name, 0) + value
+            self.units[name] = unit
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.add(name, value, COUNT_UNIT)
+
+    @contextmanager
+    def phase(self, name: str):
+        # Phases run more than once, such as once per slot in lead-time mode, add up
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(f"{name}Ms", (time.monotonic() - started_at) * 1000, MILLISECONDS_UNIT)
+
+    def time_call(self, name: str, call: Callable[[], object]):
+        """
+        Makes an API call, adding its duration to <name>Ms and counting it in <name>Calls
+        """
+        self.increment(f"{name}Calls")
+        with self.phase(name):
+            return call()
+
+    def time_iteration(self, name: str, items: Iterable) -> Iterator:
+        """
+        Yields from items, adding the time spent producing each one to <name>Ms, so lazily read pages are timed
+        without the time the consumer spends on each item
+        """
+        iterator = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def time_pages(self, name: str, pages: Iterable) -> Iterator:
+        """
+        Yields the pages of a paginated API call, timing and counting each page request as a call to <name>
+        """
+        for page in self.time_iteration(name, pages):
+            self.increment(f"{name}Calls")
+            yield page
+
+    def to_emf(self) -> Dict:
+        with self.lock:
+            values = dict(self.values)
+            units = dict(self.units)
+        return dict(
+            _aws={
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [list(self.dimensions.keys())],
+                    "Metrics": [{"Name": name, "Unit": units[name]} for name in sorted(values.keys())]
+                }]
+            },
+            **self.dimensions,
+            **{name: round(value, 3) for name, value in values.items()}
+        )
+
+    def emit(self) -> None:
+        print(json.dumps(self.to_emf()))
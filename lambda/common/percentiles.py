@@ -0,0 +1,12 @@
+import math
+from typing import List
+
+def percentile(values: List[float], pct: float) -> float or None:
+    """
+    Nearest-rank percentile of the given values, or None if there are no values
+    """
+    if len(values) < 1:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
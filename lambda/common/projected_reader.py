@@ -0,0 +1,41 @@
+import threading
+from typing import Iterator, List
+from pynamodb.indexes import Index
+from pynamodb.models import Model
+from pynamodb.pagination import ResultIterator
+
+# Pages are read with a rate limit so pynamodb asks DynamoDB for the capacity each page consumes. No limit is
+# meant, and with an infinite rate the limiter never waits
+UNLIMITED_READ_RATE = float('inf')
+
+"""
+    Queries and scans that only return the named attributes, adding up the read capacity their pages consume.
+    Projection saves transfer and deserialization, while DynamoDB charges capacity on the full size of each item read
+"""
+class ProjectedReader():
+
+    def __init__(self):
+        self.consumed_capacity = 0.0
+        self.pages = 0
+        # Pages may be read from several threads at once
+        self.lock = threading.Lock()
+
+    def read_pages(self, model: Model, results: ResultIterator) -> Iterator[Model]:
+        for page in results.page_iter:
+            with self.lock:
+                self.consumed_capacity += page.get('ConsumedCapacity', dict()).get('CapacityUnits', 0)
+                self.pages += 1
+            for item in page.get('Items', list()):
+                yield model.from_raw_data(item)
+
+    def scan(self, model: Model, attributes: List[str], filter_condition=None) -> Iterator[Model]:
+        return self.read_pages(model, model.scan(filter_condition=filter_condition, attributes_to_get=attributes, rate_limit=UNLIMITED_READ_RATE))
+
+    def query(self, model: Model, hash_key: str, attributes: List[str], index: Index = None, range_key_condition=None, filter_condition=None) -> Iterator[Model]:
+        return self.read_pages(model, (index or model).query(
+            hash_key,
+            range_key_condition=range_key_condition,
+            filter_condition=filter_condition,
+            attributes_to_get=attributes,
+            rate_limit=UNLIMITED_READ_RATE
+        ))
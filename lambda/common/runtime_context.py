@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Callable, Dict, List, Set, Tuple
+from common.config import (
+    AWS_REGION, LAUNCH_CONCURRENCY, STUDIOS_WITH_CONFIGS_CACHE_TTL_SECONDS, LAUNCH_PROFILE_CACHE_TTL_SECONDS, LAUNCH_LATENCY_CACHE_TTL_SECONDS,
+    log_config
+)
+
+"""
+    Cache whose entries expire after a fixed number of seconds, counting hits and misses. A load that returns None has no
+    definite answer, so it is not cached and the next lookup loads again
+"""
+class TtlCache():
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.entries : Dict[object, Tuple[float, object]] = dict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load: Callable[[], object]):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+        value = load()
+        with self.lock:
+            if value is not None:
+                self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.misses += 1
+        return value
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+"""
+    State kept in module scope so warm lambda containers reuse clients, connections and lookups across invocations
+"""
+class RuntimeContext():
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.nimble_client = None
+        self.dynamodb_client = None
+        self.sqs_client = None
+        self.client_hits = 0
+        self.client_misses = 0
+        self.invocations = 0
+        self.warm_models : Set = set()
+        self.studios_with_configs = TtlCache("studios_with_configs", STUDIOS_WITH_CONFIGS_CACHE_TTL_SECONDS)
+        self.launch_profile_validity = TtlCache("launch_profile_validity", LAUNCH_PROFILE_CACHE_TTL_SECONDS)
+        self.launch_latency = TtlCache("launch_latency", LAUNCH_LATENCY_CACHE_TTL_SECONDS)
+        self.caches : List[TtlCache] = [self.studios_with_configs, self.launch_profile_validity, self.launch_latency]
+
+    @staticmethod
+    def create_client(service_name: str):
+        # boto3 is imported on the first client of a container, so invocations that never call AWS do not load it
+        import boto3
+        from botocore.config import Config
+        # Pool enough connections for the launch thread pool
+        return boto3.client(service_name, region_name=AWS_REGION, config=Config(max_pool_connections=LAUNCH_CONCURRENCY, retries={'mode': 'standard'}))
+
+    def record_client_lookup(self, hit: bool) -> None:
+        if hit:
+            self.client_hits += 1
+        else:
+            self.client_misses += 1
+
+    def get_nimble_client(self):
+        with self.lock:
+            self.record_client_lookup(self.nimble_client is not None)
+            if self.nimble_client is None:
+                self.nimble_client = RuntimeContext.create_client('nimble')
+            return self.nimble_client
+
+    def get_dynamodb_client(self):
+        with self.lock:
+            self.record_client_lookup(self.dynamodb_client is not None)
+            if self.dynamodb_client is None:
+                self.dynamodb_client = RuntimeContext.create_client('dynamodb')
+            return self.dynamodb_client
+
+    def get_sqs_client(self):
+        with self.lock:
+            self.record_client_lookup(self.sqs_client is not None)
+            if self.sqs_client is None:
+                self.sqs_client = RuntimeContext.create_client('sqs')
+            return self.sqs_client
+
+    def warm_table_connections(self, models: List) -> None:
+        """
+        Describes the table of each model once per container, which creates its pynamodb connection and botocore client and
+        opens a connection to DynamoDB up front. pynamodb keeps them on the model class, so they survive between warm invocations
+        """
+        with self.lock:
+            for model in models:
+                self.record_client_lookup(model in self.warm_models)
+                if model not in self.warm_models:
+                    model.exists()
+                    self.warm_models.add(model)
+
+    def start_invocation(self) -> None:
+        self.invocations += 1
+        if self.invocations == 1:
+            log_config()
+        self.client_hits = 0
+        self.client_misses = 0
+        for cache in self.caches:
+            cache.reset_stats()
+
+    def log_stats(self) -> None:
+        stats = [f"clients {self.client_hits} hits/{self.client_misses} misses"]
+        stats += [f"{cache.name} {cache.hits} hits/{cache.misses} misses" for cache in self.caches]
+        print(f"Invocation {self.invocations} of this container: " + ", ".join(stats))
+
+RUNTIME_CONTEXT = RuntimeContext()
@@ -0,0 +1,257 @@
+import time
+import uuid
+from typing import Dict, List, Set, Tuple
+from pynamodb.exceptions import DoesNotExist, PutError
+from common.config import NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME
+from common.projected_reader import ProjectedReader
+from model.auto_launch_config import AutoLaunchConfig, LegacyAutoLaunchConfig, get_config_key, get_config_models, is_legacy_table_read, SCHEDULED_CONFIG_ATTRIBUTES
+from model.compiled_schedule import CompiledSchedule, CompiledScheduleSlot, COMPILED_SCHEDULE_STATE_KEY
+
+MAX_SAVE_ATTEMPTS = 5
+
+"""
+    Maintains the compiled weekly schedule from the config table and its DynamoDB stream
+"""
+class ScheduleCompiler():
+
+    @staticmethod
+    def get_launch_tuple(config: AutoLaunchConfig) -> List[str]:
+        launch = [config.user_id, config.studio_id, config.launch_profile, config.streaming_image_id, config.instance_type]
+        # Only configs with an end time carry it, so the schedule of configs without one does not grow
+        if config.end_time is not None:
+            launch += [config.end_time, config.end_action]
+        return launch
+
+    @staticmethod
+    def remove_config(slots: Dict[str, Dict[str, List[str]]], config_uuid: str) -> None:
+        for slot in slots.values():
+            slot.pop(config_uuid, None)
+
+    @staticmethod
+    def add_config(slots: Dict[str, Dict[str, List[str]]], config: AutoLaunchConfig) -> None:
+        if config.enabled != True or config.start_time is None or config.dates_applied is None:
+            return
+        for day in config.dates_applied.days:
+            slot_key = CompiledSchedule.get_slot_key(str(day), config.start_time)
+            slots.setdefault(slot_key, dict())[config.uuid] = ScheduleCompiler.get_launch_tuple(config)
+
+    @staticmethod
+    def is_legacy_record(record: Dict) -> bool:
+        # Stream ARNs name their table, as arn:aws:dynamodb:<region>:<account>:table/<name>/stream/<label>
+        return is_legacy_table_read() and f":table/{NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME}/" in record.get('eventSourceARN', "")
+
+    @staticmethod
+    def is_migrated(image: Dict) -> bool:
+        config = LegacyAutoLaunchConfig.from_raw_data(image)
+        if config.user_id is None:
+            return False
+        try:
+            AutoLaunchConfig.get(config.user_id, get_config_key(config.start_time, config.launch_profile, config.uuid), attributes_to_get=['uuid'])
+            return True
+        except DoesNotExist:
+            return False
+
+    @staticmethod
+    def apply_stream_record(slots: Dict[str, Dict[str, List[str]]], record: Dict) -> None:
+        images = record['dynamodb']
+        # Legacy configs are removed once migrated, and the user keyed table then holds the config
+        if ScheduleCompiler.is_legacy_record(record) and ScheduleCompiler.is_migrated(images.get('OldImage') or images['NewImage']):
+            return
+        if 'OldImage' in images:
+            ScheduleCompiler.remove_config(slots, images['OldImage']['uuid']['S'])
+        if 'NewImage' in images:
+            ScheduleCompiler.add_config(slots, AutoLaunchConfig.from_raw_data(images['NewImage']))
+
+    @staticmethod
+    def get_record_slot_keys(record: Dict) -> Set[str]:
+        # The slots a record can change are those of its old and new image, whether or not either is enabled
+        slot_keys = set()
+        for image in [record['dynamodb'].get('OldImage'), record['dynamodb'].get('NewImage')]:
+            if image is None:
+                continue
+            config = AutoLaunchConfig.from_raw_data(image)
+            if config.start_time is not None and config.dates_applied is not None:
+                slot_keys |= {CompiledSchedule.get_slot_key(str(day), config.start_time) for day in config.dates_applied.days}
+        return slot_keys
+
+    @staticmethod
+    def count_studio_launches(studios: Dict[str, List[int]], slots: Dict[str, Dict[str, List[str]]], sign: int = 1) -> None:
+        for slot in slots.values():
+            for launch in slot.values():
+                counts = studios.setdefault(launch[1], [0, 0])
+                counts[0] += sign
+                if len(launch) > 5:
+                    counts[1] += sign
+
+    @staticmethod
+    def compile_all_configs() -> Dict[str, Dict[str, List[str]]]:
+        slots = dict()
+        config_uuids : Set[str] = set()
+        for model in get_config_models():
+            reader = ProjectedReader()
+            for config in reader.scan(model, SCHEDULED_CONFIG_ATTRIBUTES):
+                # Configs migrated during the cutover are compiled from the user keyed table, which is scanned first
+                if config.uuid not in config_uuids:
+                    config_uuids.add(config.uuid)
+                    ScheduleCompiler.add_config(slots, config)
+            print(f"Scanned configs from {model.Meta.table_name} in {reader.pages} pages consuming {reader.consumed_capacity} read capacity units")
+        return slots
+
+    @staticmethod
+    def get_schedule() -> CompiledSchedule or None:
+        try:
+            return CompiledSchedule.get(COMPILED_SCHEDULE_STATE_KEY, consistent_read=True)
+        except DoesNotExist:
+            return None
+
+    @staticmethod
+    def load_slots(index: Dict[str, Dict], slot_keys: Set[str]) -> Dict[str, Dict[str, List[str]]] or None:
+        """
+        Returns the slots of the index with the given keys, or None when a part was deleted because the index has since changed
+        """
+        keys = [
+            CompiledScheduleSlot.get_state_key(index['slots'][slot_key][0], slot_key, part)
+            for slot_key in slot_keys if slot_key in index['slots']
+            for part in range(index['slots'][slot_key][1])
+        ]
+        slots = {slot_key: dict() for slot_key in slot_keys}
+        items = list(CompiledScheduleSlot.batch_get(keys, consistent_read=True))
+        if len(items) < len(keys):
+            return None
+        for item in items:
+            slot_key = item.state_key.split('#', 2)[2].rsplit('#', 1)[0]
+            slots[slot_key].update(item.get_launches())
+        return slots
+
+    @staticmethod
+    def write_slots(index: Dict[str, Dict], slots: Dict[str, Dict[str, List[str]]]) -> Dict[str, List]:
+        """
+        Writes the slots under a new revision and points the index at them, returning the index entries they replace
+        """
+        revision = uuid.uuid4().hex
+        replaced = {slot_key: index['slots'].pop(slot_key) for slot_key in slots if slot_key in index['slots']}
+        with CompiledScheduleSlot.batch_write() as batch:
+            for slot_key, slot in slots.items():
+                # Emptied slots are dropped so the index only grows with the number of live configs
+                if len(slot) == 0:
+                    continue
+                parts = CompiledScheduleSlot.split_slot(slot)
+                for part, launches in enumerate(parts):
+                    item = CompiledScheduleSlot(CompiledScheduleSlot.get_state_key(revision, slot_key, part))
+                    item.set_launches(launches)
+                    batch.save(item)
+                index['slots'][slot_key] = [revision, len(parts)]
+        return replaced
+
+    @staticmethod
+    def delete_slots(entries: Dict[str, List]) -> None:
+        with CompiledScheduleSlot.batch_write() as batch:
+            for slot_key, (revision, parts) in entries.items():
+                for part in range(parts):
+                    batch.delete(CompiledScheduleSlot(CompiledScheduleSlot.get_state_key(revision, slot_key, part)))
+
+    @staticmethod
+    def save_schedule(schedule: CompiledSchedule, index: Dict[str, Dict]) -> None:
+        schedule.set_index(index)
+        # VersionAttribute makes the save conditional on the version read, so concurrent compilers cannot overwrite each other
+        schedule.save()
+        print(f"Saved compiled schedule version {schedule.version} with {len(index['slots'])} slots")
+
+    @staticmethod
+    def is_conflict(e: PutError) -> bool:
+        return e.cause_response_code == 'ConditionalCheckFailedException'
+
+    def rebuild(self) -> None:
+        started_at = time.time()
+        slots = self.compile_all_configs()
+        index = {'slots': dict(), 'studios': dict()}
+        self.count_studio_launches(index['studios'], slots)
+        # The new revision is not read until the index points at it, so it is written once whatever the retries
+        self.write_slots(index, slots)
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            schedule = self.get_schedule() or CompiledSchedule()
+            replaced = schedule.get_index()['slots']
+            # Batches of changes made before the scan are in the rebuilt schedule
+            schedule.set_pending_batches({batch_id: changed_at for batch_id, changed_at in schedule.get_pending_batches().items() if changed_at >= started_at})
+            try:
+                self.save_schedule(schedule, dict(index))
+                self.delete_slots(replaced)
+                return
+            except PutError as e:
+                if not self.is_conflict(e):
+                    raise e
+                print("Compiled schedule changed during rebuild, retrying")
+        self.delete_slots(index['slots'])
+        raise Exception(f"Unable to save rebuilt schedule after {MAX_SAVE_ATTEMPTS} attempts")
+
+    @staticmethod
+    def get_batch_marker(records: List[Dict]) -> Tuple[str, float]:
+        # Lambda retries a failed batch with the same first record, so its marker is the same on every attempt
+        first = records[0]
+        batch_id = first.get('eventID') or uuid.uuid4().hex
+        return (batch_id, float(first.get('dynamodb', dict()).get('ApproximateCreationDateTime', time.time())))
+
+    def mark_pending(self, batch_id: str, changed_at: float) -> bool:
+        """
+        Records the batch as pending on the schedule, so readers stop using it if the batch is not applied in time.
+        Returns False when no schedule has been compiled
+        """
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            schedule = self.get_schedule()
+            if schedule is None:
+                return False
+            pending_batches = schedule.get_pending_batches()
+            if batch_id in pending_batches:
+                return True
+            pending_batches[batch_id] = changed_at
+            schedule.set_pending_batches(pending_batches)
+            try:
+                schedule.save()
+                return True
+            except PutError as e:
+                if not self.is_conflict(e):
+                    raise e
+                print("Compiled schedule changed while marking stream records pending, retrying")
+        raise Exception(f"Unable to mark stream records pending after {MAX_SAVE_ATTEMPTS} attempts")
+
+    def apply_stream_records(self, records: List[Dict]) -> None:
+        if len(records) == 0:
+            return
+        batch_id, changed_at = self.get_batch_marker(records)
+        slot_keys = set()
+        for record in records:
+            slot_keys |= self.get_record_slot_keys(record)
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            if attempt == 0 and not self.mark_pending(batch_id, changed_at):
+                # A full rebuild already reflects every change in these records
+                self.rebuild()
+                return
+            schedule = self.get_schedule()
+            if schedule is None:
+                self.rebuild()
+                return
+            index = schedule.get_index()
+            old_slots = self.load_slots(index, slot_keys)
+            if old_slots is None:
+                print("Compiled schedule changed while loading slots, retrying")
+                continue
+            slots = {slot_key: dict(slot) for slot_key, slot in old_slots.items()}
+            for record in records:
+                self.apply_stream_record(slots, record)
+            changed_keys = {slot_key for slot_key in slots if slots[slot_key] != old_slots[slot_key]}
+            self.count_studio_launches(index['studios'], {slot_key: old_slots[slot_key] for slot_key in changed_keys}, -1)
+            self.count_studio_launches(index['studios'], {slot_key: slots[slot_key] for slot_key in changed_keys})
+            replaced = self.write_slots(index, {slot_key: slots[slot_key] for slot_key in changed_keys})
+            pending_batches = schedule.get_pending_batches()
+            pending_batches.pop(batch_id, None)
+            schedule.set_pending_batches(pending_batches)
+            try:
+                self.save_schedule(schedule, index)
+                self.delete_slots(replaced)
+                return
+            except PutError as e:
+                if not self.is_conflict(e):
+                    raise e
+                print("Compiled schedule changed while applying stream records, retrying")
+                self.delete_slots({slot_key: index['slots'][slot_key] for slot_key in changed_keys if slot_key in index['slots']})
+        raise Exception(f"Unable to apply stream records after {MAX_SAVE_ATTEMPTS} attempts")
@@ -1,17 +1,109 @@
 import datetime
-from launcher.workstation_launcher import WorkstationLauncher
+import os
+import time
+from typing import List, Tuple
+from common.config import LEAD_TIME_MODE_ENABLED, LEAD_TIME_PERCENTILE, MAX_LEAD_TIME_MINUTES, METRICS_NAMESPACE, LAUNCH_QUEUE_URL, CATCH_UP_WINDOW_MINUTES, LAUNCH_SPREAD_SECONDS
+from common.metrics import InvocationMetrics
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_queue import LaunchQueue
+from launcher.scheduler_checkpoint_store import SchedulerCheckpointStore
+from model.compiled_schedule import CompiledSchedule
+from model.scheduler_checkpoint import SchedulerCheckpoint
 from model.time_manager import TimeManager
 
+# The launcher modules, and the models only they use, are imported by the functions that need them, so a cold tick whose slot
+# is already completed only loads what the checkpoint and session ending need.
+# Only the tables read on every tick are connected up front. The launcher connects the others once it has something to launch
+TICK_MODELS = [CompiledSchedule, SchedulerCheckpoint]
+
+def get_tick_time(event) -> float:
+    # Scheduled events carry the time the rule fired, which launch delays are measured from
+    if 'time' in event:
+        return datetime.datetime.strptime(event['time'], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=datetime.timezone.utc).timestamp()
+    return time.time()
+
+def get_launch_queue() -> LaunchQueue or None:
+    if LAUNCH_QUEUE_URL == "":
+        return None
+    from launcher.launch_queue import SqsLaunchQueue
+    return SqsLaunchQueue(LAUNCH_QUEUE_URL, RUNTIME_CONTEXT.get_sqs_client())
+
+def get_shard(event) -> Tuple[int, int]:
+    # Sharded rules send the shard of each target in its input, alongside the id and time of the tick
+    return (int(event.get('shard_index', 0)), int(event.get('shard_count', 1)))
+
+def get_client_token_base(slot_time: datetime.datetime) -> str:
+    # Tokens only depend on the slot, so invocations that overlap or catch up the same slot cannot create a second session
+    return slot_time.strftime("%Y%m%d")
+
+def launch_slot(slot_time_manager: TimeManager, tick_time: float, metrics: InvocationMetrics, launch_queue: LaunchQueue = None, shard: Tuple[int, int] = (0, 1), lead_time_estimator = None, spread_seconds: int = 0) -> None:
+    from launcher.workstation_launcher import WorkstationLauncher
+    workstation_launcher = WorkstationLauncher(
+        time_manager=slot_time_manager,
+        client_token_base=get_client_token_base(slot_time_manager.get_target_launch_datetime()),
+        tick_time=tick_time,
+        lead_time_estimator=lead_time_estimator,
+        metrics=metrics,
+        launch_queue=launch_queue,
+        shard_index=shard[0],
+        shard_count=shard[1],
+        spread_seconds=spread_seconds
+    )
+    workstation_launcher.launch_workstations()
+
+def launch_ahead_of_start_times(time_manager: TimeManager, tick_time: float, metrics: InvocationMetrics, launch_queue: LaunchQueue = None, shard: Tuple[int, int] = (0, 1)) -> None:
+    from launcher.lead_time_estimator import LeadTimeEstimator
+    launch_tick = time_manager.get_target_launch_datetime()
+    lead_time_estimator = LeadTimeEstimator(launch_tick, LEAD_TIME_PERCENTILE, MAX_LEAD_TIME_MINUTES, LAUNCH_SPREAD_SECONDS)
+    for target_launch_time in time_manager.get_upcoming_slot_times(MAX_LEAD_TIME_MINUTES):
+        slot_time_manager = TimeManager(target_launch_time)
+        print(f"Discovering sessions due by lead time for {slot_time_manager.get_weekday()} {slot_time_manager.get_date()} {slot_time_manager.get_target_launch_time()}")
+        # A config may be due on several ticks before its start time, and its client token depends only on the date and start time
+        launch_slot(slot_time_manager, tick_time, metrics, launch_queue, shard, lead_time_estimator, LAUNCH_SPREAD_SECONDS)
+
+def launch_for_tick(time_manager: TimeManager, tick_time: float, metrics: InvocationMetrics, launch_queue: LaunchQueue = None, shard: Tuple[int, int] = (0, 1), missed_slot_times: List[datetime.datetime] = ()) -> None:
+    with metrics.phase("Total"):
+        for missed_slot_time in missed_slot_times:
+            slot_time_manager = TimeManager(missed_slot_time)
+            print(f"Catching up missed slot {slot_time_manager.get_weekday()} {slot_time_manager.get_date()} {slot_time_manager.get_target_launch_time()}")
+            # The start time of a missed slot has passed, so every config in it is due whatever its lead time, and is not spread
+            launch_slot(slot_time_manager, tick_time, metrics, launch_queue, shard)
+            metrics.increment("CaughtUpSlots")
+        if LEAD_TIME_MODE_ENABLED:
+            launch_ahead_of_start_times(time_manager, tick_time, metrics, launch_queue, shard)
+        else:
+            launch_slot(time_manager, tick_time, metrics, launch_queue, shard, spread_seconds=LAUNCH_SPREAD_SECONDS)
+
 def handler(event, context):
 
+    RUNTIME_CONTEXT.start_invocation()
+    metrics = InvocationMetrics(METRICS_NAMESPACE, {"FunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local")})
+    with metrics.phase("WarmConnections"):
+        RUNTIME_CONTEXT.warm_table_connections(TICK_MODELS)
+
     event_id = event['id']
-    today = datetime.datetime.today()
-    time_manager = TimeManager(today)
-    target_launch_hour = time_manager.get_target_launch_hour()
-    target_launch_minute = time_manager.get_target_launch_minute()
-    print(f"Automated Workstation Launcher discovering sessions to launch on {time_manager.get_weekday()} {time_manager.get_date()} {target_launch_hour}:{target_launch_minute}")
+    tick_time = get_tick_time(event)
+    shard = get_shard(event)
+    # The scheduled time of the event, rather than the time the invocation runs, picks the slot
+    time_manager = TimeManager(datetime.datetime.utcfromtimestamp(tick_time))
+    target_slot_time = time_manager.get_target_launch_datetime()
+    print(f"Automated Workstation Launcher discovering sessions to launch on {time_manager.get_weekday()} {time_manager.get_date()} {time_manager.get_target_launch_time()} in shard {shard[0] + 1} of {shard[1]} for event {event_id}")
 
-    workstation_launcher = WorkstationLauncher(time_manager=time_manager, client_token_base=event_id)
-    workstation_launcher.launch_workstations()
+    checkpoint_store = SchedulerCheckpointStore(shard[0], shard[1])
+    with metrics.phase("LoadCheckpoint"):
+        slot_times = SchedulerCheckpointStore.get_slot_times_to_launch(target_slot_time, checkpoint_store.get_last_completed_slot(), CATCH_UP_WINDOW_MINUTES)
+
+    if len(slot_times) == 0:
+        print(f"Slot {time_manager.get_target_launch_time()} has already been completed")
+    else:
+        launch_for_tick(time_manager, tick_time, metrics, get_launch_queue(), shard, slot_times[:-1])
+        # Only completed slots are checkpointed, so the slots of a failed invocation are caught up by the next one
+        checkpoint_store.complete(target_slot_time)
 
-    
+    # Sessions are ended on every tick, even when the slot was already launched, so a retried invocation still ends them.
+    # Listing a studio's sessions returns the sessions of every shard's users, so only the first shard lists and ends them
+    if shard[0] == 0:
+        from launcher.session_ender import SessionEnder
+        SessionEnder(datetime.datetime.utcfromtimestamp(tick_time), tick_time, metrics).end_sessions()
+    RUNTIME_CONTEXT.log_stats()
+    metrics.emit()
@@ -0,0 +1,31 @@
+import os
+from common.config import METRICS_NAMESPACE
+from common.metrics import InvocationMetrics
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_message import LaunchMessage
+from launcher.launch_worker import LaunchWorker
+from model.launch_record import LaunchRecord
+
+def handler(event, context):
+
+    RUNTIME_CONTEXT.start_invocation()
+    metrics = InvocationMetrics(METRICS_NAMESPACE, {"FunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local")})
+    RUNTIME_CONTEXT.warm_table_connections([LaunchRecord])
+
+    messages = list()
+    failed_message_ids = list()
+    for record in event['Records']:
+        try:
+            messages.append(LaunchMessage.from_json(record['body'], record['messageId']))
+        except Exception as e:
+            # A message that cannot be read never can be, so it is dropped rather than received again
+            print(f"Unable to read launch message {record['messageId']}, dropping it: {e}")
+
+    if len(messages) > 0:
+        worker = LaunchWorker(min(message.tick_time for message in messages), metrics)
+        failed_message_ids += [message.message_id for message in worker.run(messages)]
+
+    RUNTIME_CONTEXT.log_stats()
+    metrics.emit()
+    # Only the launches that failed with an error worth retrying are received again, after their visibility timeout
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_message_ids]}
@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List
+from common.percentiles import percentile
+
+THROTTLING_ERROR_CODES = {'ThrottlingException', 'TooManyRequestsException', 'RequestLimitExceeded'}
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20
+
+"""
+    Token bucket limiting the rate of calls made against a single studio
+"""
+class TokenBucket():
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+
+"""
+    Runs launches on a bounded thread pool, rate limited per studio, retrying throttled calls with jittered exponential backoff
+"""
+class LaunchExecutor():
+
+    def __init__(self, max_workers: int, studio_launch_rate: float, studio_launch_burst: int, max_retries: int, tick_time: float):
+        self.max_workers = max_workers
+        self.studio_launch_rate = studio_launch_rate
+        self.studio_launch_burst = studio_launch_burst
+        self.max_retries = max_retries
+        self.tick_time = tick_time
+        self.studio_buckets : Dict[str, TokenBucket] = dict()
+        self.lock = threading.Lock()
+        self.create_call_delays : List[float] = list()
+        self.launched = 0
+        self.failed = 0
+        self.throttled = 0
+        self.started_at = None
+        self.finished_at = None
+
+    @staticmethod
+    def is_throttling_error(error: Exception) -> bool:
+        return isinstance(error, ClientError) and error.response['Error']['Code'] in THROTTLING_ERROR_CODES
+
+    @staticmethod
+    def is_retryable_error(error: Exception) -> bool:
+        """
+        Whether a call that failed with the error may succeed when tried again later: throttling, server errors,
+        and connections that failed or timed out. Any other error fails the same way on every attempt
+        """
+        if isinstance(error, ClientError):
+            return LaunchExecutor.is_throttling_error(error) or error.response.get('ResponseMetadata', dict()).get('HTTPStatusCode', 0) >= 500
+        return isinstance(error, (BotocoreConnectionError, HTTPClientError))
+
+    @staticmethod
+    def get_backoff_seconds(attempt: int) -> float:
+        # Full jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def get_studio_bucket(self, studio_id: str) -> TokenBucket:
+        with self.lock:
+            if studio_id not in self.studio_buckets:
+                self.studio_buckets[studio_id] = TokenBucket(self.studio_launch_rate, self.studio_launch_burst)
+            return self.studio_buckets[studio_id]
+
+    def call_with_retries(self, studio_id: str, call: Callable[[], Dict]) -> Dict:
+        bucket = self.get_studio_bucket(studio_id)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            with self.lock:
+                self.create_call_delays.append(time.time() - self.tick_time)
+            try:
+                return call()
+            except Exception as e:
+                if not LaunchExecutor.is_throttling_error(e) or attempt >= self.max_retries:
+                    raise e
+                with self.lock:
+                    self.throttled += 1
+                time.sleep(LaunchExecutor.get_backoff_seconds(attempt))
+                attempt += 1
+
+    def run(self, items: Iterable, launch: Callable[[object], bool]) -> List:
+        """
+        Calls launch for every item on the thread pool, submitting each item as the iterable produces it.
+        launch returns whether the launch succeeded. Returns the items whose launch failed
+        """
+        failed_items = list()
+        self.started_at = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(launch, item): item for item in items}
+            for future in as_completed(futures):
+                if future.result():
+                    self.launched += 1
+                else:
+                    self.failed += 1
+                    failed_items.append(futures[future])
+        self.finished_at = time.time()
+        return failed_items
+
+    def get_launches_per_second(self) -> float:
+        elapsed = self.finished_at - self.started_at
+        if elapsed <= 0:
+            return float(self.launched)
+        return self.launched / elapsed
+
+    def report(self) -> None:
+        p50 = percentile(self.create_call_delays, 50)
+        p99 = percentile(self.create_call_delays, 99)
+        print(f"Launched {self.launched} sessions ({self.failed} failed, {self.throttled} throttled retries) at {self.get_launches_per_second():.2f} launches/s")
+        if p50 is not None:
+            print(f"Delay from tick to create call: p50 {p50:.2f}s, p99 {p99:.2f}s")
@@ -0,0 +1,63 @@
+import json
+
+"""
+    A single session launch, as sent from discovery to the launch worker. The client token is computed at discovery,
+    so a redelivered message creates the same session. The session is not created before not_before, when set, and is
+    tagged with its end time and end action, when set. A message with resume_session_id starts that STOPPED session
+    instead of creating one
+"""
+class LaunchMessage():
+
+    def __init__(
+        self,
+        config_uuid: str,
+        user_id: str,
+        studio_id: str,
+        launch_profile: str,
+        streaming_image_id: str,
+        instance_type: str,
+        target_launch_time: str,
+        client_token: str,
+        tick_time: float,
+        not_before: float = None,
+        end_time: str = None,
+        end_action: str = None,
+        resume_session_id: str = None,
+        message_id: str = None):
+
+        self.config_uuid = config_uuid
+        self.user_id = user_id
+        self.studio_id = studio_id
+        self.launch_profile = launch_profile
+        self.streaming_image_id = streaming_image_id
+        self.instance_type = instance_type
+        self.target_launch_time = target_launch_time
+        self.client_token = client_token
+        self.tick_time = tick_time
+        self.not_before = not_before
+        self.end_time = end_time
+        self.end_action = end_action
+        self.resume_session_id = resume_session_id
+        # Set on messages received from a queue
+        self.message_id = message_id
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "config_uuid": self.config_uuid,
+            "user_id": self.user_id,
+            "studio_id": self.studio_id,
+            "launch_profile": self.launch_profile,
+            "streaming_image_id": self.streaming_image_id,
+            "instance_type": self.instance_type,
+            "target_launch_time": self.target_launch_time,
+            "client_token": self.client_token,
+            "tick_time": self.tick_time,
+            "not_before": self.not_before,
+            "end_time": self.end_time,
+            "end_action": self.end_action,
+            "resume_session_id": self.resume_session_id
+        })
+
+    @staticmethod
+    def from_json(body: str, message_id: str = None) -> 'LaunchMessage':
+        return LaunchMessage(message_id=message_id, **json.loads(body))
@@ -0,0 +1,31 @@
+from typing import Dict
+from model.auto_launch_config import AutoLaunchConfig
+
+"""
+    The fields of a config needed to launch its session. Slotted, so the launcher keeps far less per config than a
+    pynamodb model while it streams the configs of a slot
+"""
+class LaunchPlan():
+
+    __slots__ = ('config_uuid', 'user_id', 'studio_id', 'launch_profile', 'streaming_image_id', 'instance_type', 'end_time', 'end_action', 'resume_session_id')
+
+    def __init__(self, config_uuid: str, user_id: str, studio_id: str, launch_profile: str, streaming_image_id: str, instance_type: str, end_time: str = None, end_action: str = None):
+        self.config_uuid = config_uuid
+        self.user_id = user_id
+        self.studio_id = studio_id
+        self.launch_profile = launch_profile
+        self.streaming_image_id = streaming_image_id
+        self.instance_type = instance_type
+        self.end_time = end_time
+        self.end_action = end_action
+        # STOPPED session of the user to start instead of creating one, found by the resume_stopped launch strategy
+        self.resume_session_id = None
+
+    @staticmethod
+    def from_config(config: AutoLaunchConfig) -> 'LaunchPlan':
+        return LaunchPlan(config.uuid, config.user_id, config.studio_id, config.launch_profile, config.streaming_image_id, config.instance_type, config.end_time, config.end_action)
+
+    @staticmethod
+    def from_item(item: Dict) -> 'LaunchPlan':
+        # Config item read by the client data layer, where attributes that are not set are missing
+        return LaunchPlan(item['uuid'], item.get('user_id'), item.get('studio_id'), item.get('launch_profile'), item.get('streaming_image_id'), item.get('instance_type'), item.get('end_time'), item.get('end_action'))
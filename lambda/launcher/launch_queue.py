@@ -0,0 +1,105 @@
+import math
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from launcher.launch_message import LaunchMessage
+
+# SQS accepts at most 10 messages per SendMessageBatch call, and sends at most 10 per launch worker batch
+SQS_MAX_BATCH_SIZE = 10
+MAX_SEND_ATTEMPTS = 3
+# SQS delays a message by at most 15 minutes
+SQS_MAX_DELAY_SECONDS = 900
+
+"""
+    Queue of launches waiting for the launch worker
+"""
+class LaunchQueue(ABC):
+
+    @abstractmethod
+    def send(self, messages: List[LaunchMessage]) -> None:
+        pass
+
+"""
+    Launch queue backed by SQS
+"""
+class SqsLaunchQueue(LaunchQueue):
+
+    def __init__(self, queue_url: str, sqs_client):
+        self.queue_url = queue_url
+        self.sqs_client = sqs_client
+
+    @staticmethod
+    def get_delay_seconds(message: LaunchMessage) -> int:
+        # Spread launches are delivered to the worker when they are due
+        if message.not_before is None:
+            return 0
+        return min(SQS_MAX_DELAY_SECONDS, max(0, math.ceil(message.not_before - time.time())))
+
+    def send_batch(self, messages: List[LaunchMessage]) -> None:
+        entries = {str(i): {'Id': str(i), 'MessageBody': message.to_json(), 'DelaySeconds': SqsLaunchQueue.get_delay_seconds(message)} for i, message in enumerate(messages)}
+        for attempt in range(MAX_SEND_ATTEMPTS):
+            response = self.sqs_client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=list(entries.values())
+            )
+            # Resend only the entries SQS did not accept
+            entries = {failure['Id']: entries[failure['Id']] for failure in response.get('Failed', list())}
+            if len(entries) == 0:
+                return
+        raise Exception(f"Unable to send {len(entries)} launch messages after {MAX_SEND_ATTEMPTS} attempts")
+
+    def send(self, messages: List[LaunchMessage]) -> None:
+        for start in range(0, len(messages), SQS_MAX_BATCH_SIZE):
+            self.send_batch(messages[start:start + SQS_MAX_BATCH_SIZE])
+
+"""
+    In-memory stand-in for the SQS launch queue and its event source, for running discovery and the launch worker locally.
+    Messages reported as failed are received again, until they have been received max_receive_count times
+    and are moved to the dead letters
+"""
+class InMemoryLaunchQueue(LaunchQueue):
+
+    def __init__(self, max_receive_count: int = 5):
+        self.max_receive_count = max_receive_count
+        self.messages : List[Dict] = list()
+        self.in_flight : Dict[str, Dict] = dict()
+        self.dead_letters : List[Dict] = list()
+
+    def send(self, messages: List[LaunchMessage]) -> None:
+        for message in messages:
+            self.messages.append({'messageId': str(uuid.uuid4()), 'body': message.to_json(), 'receiveCount': 0})
+
+    def is_empty(self) -> bool:
+        return len(self.messages) == 0 and len(self.in_flight) == 0
+
+    def receive_event(self, batch_size: int = SQS_MAX_BATCH_SIZE) -> Dict:
+        """
+        Receives a batch of messages, shaped as the SQS event the launch worker lambda is invoked with
+        """
+        batch, self.messages = self.messages[:batch_size], self.messages[batch_size:]
+        records = list()
+        for message in batch:
+            message['receiveCount'] += 1
+            self.in_flight[message['messageId']] = message
+            records.append({
+                'messageId': message['messageId'],
+                'body': message['body'],
+                'attributes': {'ApproximateReceiveCount': str(message['receiveCount'])},
+                'eventSource': 'aws:sqs'
+            })
+        return {'Records': records}
+
+    def complete(self, event: Dict, response: Dict) -> None:
+        """
+        Deletes the messages of a batch that succeeded, and returns failed messages to the queue
+        """
+        failed_ids = {failure['itemIdentifier'] for failure in response.get('batchItemFailures', list())}
+        for record in event['Records']:
+            message = self.in_flight.pop(record['messageId'])
+            if record['messageId'] not in failed_ids:
+                continue
+            if message['receiveCount'] >= self.max_receive_count:
+                self.dead_letters.append(message)
+            else:
+                self.messages.append(message)
@@ -0,0 +1,180 @@
+import datetime
+import threading
+import time
+from botocore.exceptions import ClientError
+from typing import Dict, Iterable, List
+from common.config import (
+    LAUNCH_CONCURRENCY, STUDIO_LAUNCH_RATE_PER_SECOND, STUDIO_LAUNCH_BURST, LAUNCH_MAX_RETRIES, LAUNCH_RECORD_RETENTION_DAYS
+)
+from common.metrics import InvocationMetrics, log_json
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_executor import LaunchExecutor
+from launcher.launch_message import LaunchMessage
+from launcher.session_tags import LAUNCHED_TAG, END_TIME_TAG, END_ACTION_TAG
+from model.data.end_actions import END_ACTION_STOP
+from model.launch_record import LaunchRecord, LAUNCH_RECORD_STRATEGY_CREATE, LAUNCH_RECORD_STRATEGY_RESUME
+from session_state.state_machine import format_timestamp
+
+# Errors starting a STOPPED session that mean it can no longer be started, such as when it was started or deleted since
+# discovery. The launch creates a session instead
+RESUME_FALLBACK_ERROR_CODES = {'ConflictException', 'ResourceNotFoundException', 'ValidationException'}
+
+"""
+    Creates the streaming sessions of launch messages, either inline in the scheduler lambda or in the launch worker lambda
+"""
+class LaunchWorker():
+
+    def __init__(self, tick_time: float, metrics: InvocationMetrics):
+        # The client is pooled in the runtime context, sized to the launch thread pool and reused by warm invocations
+        self.nimble_client = RUNTIME_CONTEXT.get_nimble_client()
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.retryable_messages : List[LaunchMessage] = list()
+        self.launch_executor = LaunchExecutor(
+            max_workers=LAUNCH_CONCURRENCY,
+            studio_launch_rate=STUDIO_LAUNCH_RATE_PER_SECOND,
+            studio_launch_burst=STUDIO_LAUNCH_BURST,
+            max_retries=LAUNCH_MAX_RETRIES,
+            tick_time=tick_time
+        )
+
+    @staticmethod
+    def log_launch(outcome: str, message: LaunchMessage, **fields) -> None:
+        log_json(
+            "launch",
+            outcome=outcome,
+            user_id=message.user_id,
+            studio_id=message.studio_id,
+            launch_profile=message.launch_profile,
+            instance_type=message.instance_type,
+            target_launch_time=message.target_launch_time,
+            **fields
+        )
+
+    @staticmethod
+    def record_launch(message: LaunchMessage, session_id: str, created_at: datetime.datetime, launch_strategy: str) -> None:
+        # The session state lambda completes the record when the session is READY or fails
+        try:
+            LaunchRecord(
+                session_id,
+                studio_id=message.studio_id,
+                user_id=message.user_id,
+                launch_profile=message.launch_profile,
+                streaming_image_id=message.streaming_image_id,
+                instance_type=message.instance_type,
+                target_launch_time=message.target_launch_time,
+                tick_at=format_timestamp(datetime.datetime.utcfromtimestamp(message.tick_time)),
+                created_at=format_timestamp(created_at),
+                launch_strategy=launch_strategy,
+                expires_at=datetime.timedelta(days=LAUNCH_RECORD_RETENTION_DAYS)
+            ).save()
+        except Exception as e:
+            print(f"Error recording launch of session {session_id} for user {message.user_id}: {e}")
+
+    @staticmethod
+    def get_session_tags(message: LaunchMessage) -> Dict[str, str]:
+        tags = {
+            LAUNCHED_TAG: 'true',
+            'WorkstationOwnedBy': message.user_id,
+            'WorkstationTargetLaunchTimeUTC': message.target_launch_time
+        }
+        # The session ender finds sessions to stop or delete from these tags, without reading configs
+        if message.end_time is not None:
+            tags[END_TIME_TAG] = message.end_time
+            tags[END_ACTION_TAG] = message.end_action or END_ACTION_STOP
+        return tags
+
+    @staticmethod
+    def wait_until_due(message: LaunchMessage) -> None:
+        if message.not_before is None:
+            return
+        wait_seconds = message.not_before - time.time()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    def create_session(self, message: LaunchMessage) -> str:
+        response = self.launch_executor.call_with_retries(message.studio_id, lambda: self.metrics.time_call("CreateStreamingSession", lambda: self.nimble_client.create_streaming_session(
+            clientToken=message.client_token,
+            ec2InstanceType=message.instance_type,
+            launchProfileId=message.launch_profile,
+            ownedBy=message.user_id,
+            streamingImageId=message.streaming_image_id,
+            studioId=message.studio_id,
+            tags=LaunchWorker.get_session_tags(message)
+        )))
+        return response['session']['sessionId']
+
+    def retag_resumed_session(self, message: LaunchMessage, session: Dict) -> None:
+        # A resumed session keeps the tags of the launch that created it, including an end time that has already passed
+        try:
+            tags = LaunchWorker.get_session_tags(message)
+            self.nimble_client.tag_resource(resourceArn=session['arn'], tags=tags)
+            stale_tag_keys = [x for x in (END_TIME_TAG, END_ACTION_TAG) if x not in tags and x in (session.get('tags') or dict())]
+            if len(stale_tag_keys) > 0:
+                self.nimble_client.untag_resource(resourceArn=session['arn'], tagKeys=stale_tag_keys)
+        except Exception as e:
+            print(f"Error tagging resumed session {message.resume_session_id} for user {message.user_id}: {e}")
+
+    def resume_session(self, message: LaunchMessage) -> str or None:
+        """
+        Starts the STOPPED session of the message, returning None when it can no longer be started
+        """
+        try:
+            response = self.launch_executor.call_with_retries(message.studio_id, lambda: self.metrics.time_call("StartStreamingSession", lambda: self.nimble_client.start_streaming_session(
+                clientToken=message.client_token,
+                sessionId=message.resume_session_id,
+                studioId=message.studio_id
+            )))
+        except ClientError as e:
+            if e.response['Error']['Code'] not in RESUME_FALLBACK_ERROR_CODES:
+                raise e
+            LaunchWorker.log_launch("resume_skipped", message, session_id=message.resume_session_id, error=str(e))
+            self.metrics.increment("ResumeFallbacks")
+            return None
+        self.retag_resumed_session(message, response['session'])
+        return message.resume_session_id
+
+    def launch(self, message: LaunchMessage) -> bool:
+        LaunchWorker.wait_until_due(message)
+        created_at = datetime.datetime.utcnow()
+        started_at = time.monotonic()
+        launch_strategy = LAUNCH_RECORD_STRATEGY_CREATE
+        try:
+            session_id = None
+            if message.resume_session_id is not None:
+                session_id = self.resume_session(message)
+            if session_id is None:
+                session_id = self.create_session(message)
+            else:
+                launch_strategy = LAUNCH_RECORD_STRATEGY_RESUME
+                self.metrics.increment("Resumed")
+            LaunchWorker.log_launch(
+                "launched", message,
+                session_id=session_id,
+                strategy=launch_strategy,
+                tick_delay_ms=round((time.time() - message.tick_time) * 1000),
+                duration_ms=round((time.monotonic() - started_at) * 1000)
+            )
+            LaunchWorker.record_launch(message, session_id, created_at, launch_strategy)
+            return True
+        except Exception as e:
+            retryable = LaunchExecutor.is_retryable_error(e)
+            LaunchWorker.log_launch("failed", message, error=str(e), retryable=retryable, duration_ms=round((time.monotonic() - started_at) * 1000))
+            if retryable:
+                with self.lock:
+                    self.retryable_messages.append(message)
+            return False
+
+    def run(self, messages: Iterable[LaunchMessage]) -> List[LaunchMessage]:
+        """
+        Launches every message concurrently, starting on each as it is produced, returning the messages whose launch failed
+        with an error worth retrying. Other failed launches are only logged
+        """
+        with self.metrics.phase("Launch"):
+            self.launch_executor.run(messages, self.launch)
+        self.metrics.increment("Launched", self.launch_executor.launched)
+        self.metrics.increment("Failed", self.launch_executor.failed)
+        self.metrics.increment("FailedRetryable", len(self.retryable_messages))
+        self.metrics.increment("Throttled", self.launch_executor.throttled)
+        self.launch_executor.report()
+        return self.retryable_messages
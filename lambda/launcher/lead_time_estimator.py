@@ -0,0 +1,45 @@
+import datetime
+import math
+from typing import List
+from pynamodb.exceptions import DoesNotExist
+from common.percentiles import percentile
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_plan import LaunchPlan
+from model.launch_latency import LaunchLatency
+from model.time_manager import SLOT_MINUTES
+
+"""
+    Decides which configs to launch ahead of their start time, based on a percentile of their observed time to READY
+"""
+class LeadTimeEstimator():
+
+    def __init__(self, launch_tick: datetime.datetime, lead_time_percentile: float, max_lead_minutes: int, spread_seconds: int = 0):
+        self.launch_tick = launch_tick
+        self.lead_time_percentile = lead_time_percentile
+        self.max_lead_minutes = max_lead_minutes
+        # Launches can start up to the spread window after their tick, so the lead covers it too
+        self.spread_seconds = spread_seconds
+
+    @staticmethod
+    def load_latency_samples(state_key: str) -> List[float]:
+        try:
+            return LaunchLatency.get(state_key).samples
+        except DoesNotExist:
+            return list()
+
+    def get_lead_minutes(self, config: LaunchPlan) -> int:
+        state_key = LaunchLatency.get_state_key(config.launch_profile, config.streaming_image_id, config.instance_type)
+        samples = RUNTIME_CONTEXT.launch_latency.get(state_key, lambda: LeadTimeEstimator.load_latency_samples(state_key))
+        latency_seconds = percentile(samples, self.lead_time_percentile)
+        if latency_seconds is None:
+            latency_seconds = 0
+        # Launches only start on slot boundaries, so round the lead up to whole slots
+        lead_minutes = math.ceil((latency_seconds + self.spread_seconds) / (SLOT_MINUTES * 60)) * SLOT_MINUTES
+        return min(lead_minutes, self.max_lead_minutes)
+
+    def filter_configs_due_at_tick(self, target_launch_time: datetime.datetime, configs: List[LaunchPlan]) -> List[LaunchPlan]:
+        """
+        Keeps configs whose lead-adjusted launch time has been reached. Configs that were due at an earlier tick stay due
+        until their start time, so a growing lead time cannot skip them; active session checks and client tokens prevent duplicates
+        """
+        return [x for x in configs if target_launch_time - datetime.timedelta(minutes=self.get_lead_minutes(x)) <= self.launch_tick]
@@ -0,0 +1,67 @@
+import time
+from typing import Dict, List, Set
+from pynamodb.exceptions import DoesNotExist
+from common.config import COMPILED_SCHEDULE_MAX_LAG_SECONDS
+from model.compiled_schedule import CompiledSchedule, CompiledScheduleSlot, COMPILED_SCHEDULE_STATE_KEY
+
+# Kept in module scope so warm lambda containers reuse the schedule index across invocations
+_cached_version = None
+_cached_index : Dict[str, Dict] = dict()
+
+def get_compiled_schedule_index() -> Dict[str, Dict] or None:
+    """
+    Returns the index of the compiled schedule, only reading the full item when its version has changed.
+    Returns None when no schedule has been compiled yet, or when it is missing config changes older than COMPILED_SCHEDULE_MAX_LAG_SECONDS.
+    """
+    global _cached_version, _cached_index
+
+    try:
+        version_item = CompiledSchedule.get(COMPILED_SCHEDULE_STATE_KEY, attributes_to_get=['version', 'pending_batches'])
+    except DoesNotExist:
+        return None
+
+    lag_seconds = version_item.get_lag_seconds(time.time())
+    if lag_seconds > COMPILED_SCHEDULE_MAX_LAG_SECONDS:
+        print(f"Compiled schedule is missing config changes made {lag_seconds:.0f} seconds ago, reading the config table instead")
+        return None
+
+    if version_item.version != _cached_version:
+        schedule = CompiledSchedule.get(COMPILED_SCHEDULE_STATE_KEY, consistent_read=True)
+        _cached_index = schedule.get_index()
+        _cached_version = schedule.version
+        print(f"Loaded compiled schedule version {_cached_version}")
+    else:
+        print(f"Reusing cached compiled schedule version {_cached_version}")
+
+    return _cached_index
+
+def get_compiled_schedule_slot(weekday: str, start_time: str) -> Dict[str, List[str]] or None:
+    """
+    Returns the launches of a slot of the compiled schedule, or None when the schedule cannot be used
+    """
+    index = get_compiled_schedule_index()
+    if index is None:
+        return None
+    slot_key = CompiledSchedule.get_slot_key(weekday, start_time)
+    if slot_key not in index['slots']:
+        return dict()
+    revision, parts = index['slots'][slot_key]
+    keys = [CompiledScheduleSlot.get_state_key(revision, slot_key, part) for part in range(parts)]
+    items = list(CompiledScheduleSlot.batch_get(keys, consistent_read=True))
+    if len(items) < parts:
+        # The slot was replaced and deleted after the cached index was read
+        print(f"Compiled schedule slot {slot_key} revision {revision} was replaced, reading the config table instead")
+        return None
+    slot = dict()
+    for item in items:
+        slot.update(item.get_launches())
+    return slot
+
+def get_compiled_schedule_studio_ids(with_end_time: bool = False) -> Set[str] or None:
+    """
+    Returns the studios with scheduled launches, or only those with a launch that has an end time. Returns None when the schedule cannot be used
+    """
+    index = get_compiled_schedule_index()
+    if index is None:
+        return None
+    return {studio_id for studio_id, counts in index['studios'].items() if counts[1 if with_end_time else 0] > 0}
@@ -0,0 +1,59 @@
+import datetime
+from typing import List
+from pynamodb.exceptions import DoesNotExist, UpdateError
+from model.scheduler_checkpoint import SchedulerCheckpoint, SLOT_TIME_FORMAT
+from model.time_manager import SLOT_MINUTES
+from session_state.state_machine import format_timestamp
+
+"""
+    Tracks the last slot a launcher shard completed, so slots of delayed or failed invocations are launched by the next one
+"""
+class SchedulerCheckpointStore():
+
+    def __init__(self, shard_index: int = 0, shard_count: int = 1):
+        self.state_key = SchedulerCheckpoint.get_state_key(shard_index, shard_count)
+
+    def get_last_completed_slot(self) -> datetime.datetime or None:
+        try:
+            checkpoint = SchedulerCheckpoint.get(self.state_key, consistent_read=True)
+        except DoesNotExist:
+            return None
+        return datetime.datetime.strptime(checkpoint.last_completed_slot, SLOT_TIME_FORMAT)
+
+    @staticmethod
+    def get_slot_times_to_launch(target_slot: datetime.datetime, last_completed_slot: datetime.datetime or None, catch_up_window_minutes: int) -> List[datetime.datetime]:
+        """
+        Slots after the checkpoint up to and including the target slot, oldest first. A checkpoint older than the
+        catch-up window means the scheduler was paused, such as over a weekend or while disabled, so only the target slot runs
+        """
+        if last_completed_slot is None:
+            return [target_slot]
+        if last_completed_slot >= target_slot:
+            # An overlapping or retried invocation already completed this slot
+            return list()
+        if last_completed_slot < target_slot - datetime.timedelta(minutes=catch_up_window_minutes):
+            return [target_slot]
+        # Step back from the target slot, so slots stay aligned to it after a change of slot length
+        slot_times = list()
+        slot_time = target_slot
+        while slot_time > last_completed_slot:
+            slot_times.insert(0, slot_time)
+            slot_time -= datetime.timedelta(minutes=SLOT_MINUTES)
+        return slot_times
+
+    def complete(self, slot_time: datetime.datetime) -> None:
+        slot = slot_time.strftime(SLOT_TIME_FORMAT)
+        try:
+            # Never move the checkpoint back when invocations finish out of order
+            SchedulerCheckpoint(self.state_key).update(
+                actions=[
+                    SchedulerCheckpoint.last_completed_slot.set(slot),
+                    SchedulerCheckpoint.updated_at.set(format_timestamp(datetime.datetime.utcnow()))
+                ],
+                condition=(SchedulerCheckpoint.last_completed_slot.does_not_exist() | (SchedulerCheckpoint.last_completed_slot < slot))
+            )
+            print(f"Completed slot {slot} for {self.state_key}")
+        except UpdateError as e:
+            if e.cause_response_code != 'ConditionalCheckFailedException':
+                raise e
+            print(f"Checkpoint for {self.state_key} is already past slot {slot}")
@@ -0,0 +1,136 @@
+import datetime
+import hashlib
+import uuid
+from typing import Dict, Iterator, List, Set, Tuple
+from common.config import (
+    LAUNCH_CONCURRENCY, STUDIO_LAUNCH_RATE_PER_SECOND, STUDIO_LAUNCH_BURST, LAUNCH_MAX_RETRIES, METRICS_NAMESPACE,
+    CONFIG_DATA_LAYER, CONFIG_DATA_LAYER_CLIENT
+)
+from common.metrics import InvocationMetrics, log_json
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_executor import LaunchExecutor
+from launcher.schedule_cache import get_compiled_schedule_studio_ids
+from launcher.session_tags import LAUNCHED_TAG, END_TIME_TAG, END_ACTION_TAG
+from model.data.end_actions import END_ACTION_STOP, END_ACTION_DELETE
+from session_state.state_machine import parse_timestamp
+
+# Session states each end action can be taken from. Sessions still starting or stopping are ended on a later tick
+ENDABLE_STATES = {
+    END_ACTION_STOP: {'READY'},
+    END_ACTION_DELETE: {'READY', 'STOPPED'}
+}
+
+"""
+    Stops or deletes the sessions launched by the scheduler once the end time they were tagged with has passed
+"""
+class SessionEnder():
+
+    def __init__(self, end_time: datetime.datetime, tick_time: float, metrics: InvocationMetrics = None):
+        self.end_time = end_time
+        self.metrics = metrics if metrics is not None else InvocationMetrics(METRICS_NAMESPACE, dict())
+        self.end_executor = LaunchExecutor(
+            max_workers=LAUNCH_CONCURRENCY,
+            studio_launch_rate=STUDIO_LAUNCH_RATE_PER_SECOND,
+            studio_launch_burst=STUDIO_LAUNCH_BURST,
+            max_retries=LAUNCH_MAX_RETRIES,
+            tick_time=tick_time
+        )
+
+    @staticmethod
+    def get_studio_ids_with_end_times() -> Set[str]:
+        return RUNTIME_CONTEXT.studios_with_configs.get('end_time', SessionEnder.load_studio_ids_with_end_times)
+
+    @staticmethod
+    def load_studio_ids_with_end_times() -> Set[str]:
+        # Only studios with a config that has an end time can have sessions to end, so no other studio is listed
+        compiled_studio_ids = get_compiled_schedule_studio_ids(with_end_time=True)
+        if compiled_studio_ids is not None:
+            return compiled_studio_ids
+        # The config models and readers are only imported until a schedule has been compiled
+        from common.client_reader import ClientReader
+        from common.projected_reader import ProjectedReader
+        from model.auto_launch_config import get_config_models
+        studio_ids = set()
+        for model in get_config_models():
+            if CONFIG_DATA_LAYER == CONFIG_DATA_LAYER_CLIENT:
+                reader = ClientReader()
+                items = reader.scan(model.Meta.table_name, ['studio_id', 'end_time'])
+                studio_ids |= {x['studio_id'] for x in items if x.get('studio_id') is not None and x.get('end_time') is not None}
+            else:
+                reader = ProjectedReader()
+                studio_ids |= {x.studio_id for x in reader.scan(model, ['studio_id', 'end_time']) if x.studio_id is not None and x.end_time is not None}
+            print(f"Scanned studios with end times from {model.Meta.table_name} consuming {reader.consumed_capacity} read capacity units")
+        return studio_ids
+
+    @staticmethod
+    def get_nimble_client():
+        # Taken from the runtime context when there is a studio to list, so ticks with no end times never create the client
+        return RUNTIME_CONTEXT.get_nimble_client()
+
+    @staticmethod
+    def get_end_action(session: Dict) -> str or None:
+        tags = session.get('tags') or dict()
+        if tags.get(LAUNCHED_TAG) != 'true' or END_TIME_TAG not in tags:
+            return None
+        return tags.get(END_ACTION_TAG, END_ACTION_STOP)
+
+    def is_session_due_to_end(self, session: Dict) -> bool:
+        end_action = SessionEnder.get_end_action(session)
+        if end_action not in ENDABLE_STATES or session['state'] not in ENDABLE_STATES[end_action]:
+            return False
+        try:
+            return parse_timestamp(session['tags'][END_TIME_TAG]) <= self.end_time
+        except ValueError:
+            print(f"Ignoring session {session['sessionId']} with invalid end time {session['tags'][END_TIME_TAG]}")
+            return False
+
+    def list_sessions_due_to_end(self, studio_id: str) -> List[Dict]:
+        sessions = list()
+        paginator = self.get_nimble_client().get_paginator('list_streaming_sessions')
+        for page in self.metrics.time_pages("ListStreamingSessions", paginator.paginate(studioId=studio_id)):
+            for session in page['sessions']:
+                if self.is_session_due_to_end(session):
+                    sessions.append(session)
+        return sessions
+
+    def read_sessions_due_to_end(self) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yields the sessions to end of each studio as soon as it is listed, so earlier studios are ended while later ones are listed
+        """
+        for studio_id in SessionEnder.get_studio_ids_with_end_times():
+            sessions = self.list_sessions_due_to_end(studio_id)
+            self.metrics.increment("SessionsDueToEnd", len(sessions))
+            for session in sessions:
+                yield (studio_id, session)
+
+    @staticmethod
+    def generate_client_token(session: Dict, end_action: str) -> str:
+        # Ending the same session again on a later or overlapping tick reuses the token of the first call
+        hash_string = session['sessionId'] + end_action + session['tags'][END_TIME_TAG]
+        return str(uuid.UUID(hashlib.md5(hash_string.encode('utf-8')).hexdigest()))
+
+    def end_session(self, studio_session: Tuple[str, Dict]) -> bool:
+        studio_id, session = studio_session
+        end_action = SessionEnder.get_end_action(session)
+        client_token = SessionEnder.generate_client_token(session, end_action)
+        try:
+            if end_action == END_ACTION_DELETE:
+                self.end_executor.call_with_retries(studio_id, lambda: self.metrics.time_call("DeleteStreamingSession", lambda: SessionEnder.get_nimble_client().delete_streaming_session(
+                    clientToken=client_token, sessionId=session['sessionId'], studioId=studio_id)))
+            else:
+                self.end_executor.call_with_retries(studio_id, lambda: self.metrics.time_call("StopStreamingSession", lambda: SessionEnder.get_nimble_client().stop_streaming_session(
+                    clientToken=client_token, sessionId=session['sessionId'], studioId=studio_id)))
+            log_json("end", outcome="ended", action=end_action, session_id=session['sessionId'], user_id=session['ownedBy'], studio_id=studio_id, end_time=session['tags'][END_TIME_TAG])
+            return True
+        except Exception as e:
+            log_json("end", outcome="failed", action=end_action, session_id=session['sessionId'], user_id=session['ownedBy'], studio_id=studio_id, error=str(e))
+            return False
+
+    def end_sessions(self) -> None:
+        with self.metrics.phase("EndSessions"):
+            self.end_executor.run(self.read_sessions_due_to_end(), self.end_session)
+        self.metrics.increment("Ended", self.end_executor.launched)
+        self.metrics.increment("EndFailed", self.end_executor.failed)
+        self.metrics.increment("EndThrottled", self.end_executor.throttled)
+        if self.end_executor.launched + self.end_executor.failed > 0:
+            print(f"Ended {self.end_executor.launched} sessions ({self.end_executor.failed} failed)")
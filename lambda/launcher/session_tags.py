@@ -0,0 +1,4 @@
+# Tags the launcher sets on the sessions it launches, which the session ender reads to find the sessions to end
+LAUNCHED_TAG = 'NimbleStudioAutoWorkstationSchedulerLaunched'
+END_TIME_TAG = 'WorkstationEndTimeUTC'
+END_ACTION_TAG = 'WorkstationEndAction'
@@ -0,0 +1,5 @@
+import zlib
+
+def get_user_shard(user_id: str, shard_count: int) -> int:
+    # crc32 rather than hash(), which is salted per process and would differ between shards
+    return zlib.crc32(user_id.encode('utf-8')) % shard_count
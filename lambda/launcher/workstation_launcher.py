@@ -1,100 +1,402 @@
-import boto3
 import hashlib
+import heapq
+import itertools
+import time
 import uuid
-from typing import List, Set
-from common.config import AWS_REGION
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+from common.client_reader import ClientReader
+from common.config import (
+    LAUNCH_CONCURRENCY, ACTIVE_SESSION_SOURCE, ACTIVE_SESSION_SOURCE_STATE_TABLE, METRICS_NAMESPACE, LAUNCH_STRATEGY, LAUNCH_STRATEGY_RESUME_STOPPED,
+    CONFIG_DATA_LAYER, CONFIG_DATA_LAYER_CLIENT, START_TIME_INDEX_NAME
+)
+from common.metrics import InvocationMetrics, NONE_UNIT
+from common.projected_reader import ProjectedReader
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.launch_message import LaunchMessage
+from launcher.launch_plan import LaunchPlan
+from launcher.launch_queue import LaunchQueue
+from launcher.launch_worker import LaunchWorker
+from launcher.lead_time_estimator import LeadTimeEstimator
+from launcher.schedule_cache import get_compiled_schedule_slot
+from launcher.user_shard import get_user_shard
 from model.time_manager import TimeManager
-from model.auto_launch_config import AutoLaunchConfig
+from model.auto_launch_config import AutoLaunchConfig, get_config_models, SCHEDULED_CONFIG_ATTRIBUTES
 from model.data.weekdays import Weekdays
+from model.launch_record import LaunchRecord
+from model.session_state import SessionState
+from session_state.dynamo_session_state_store import DynamoSessionStateStore
+from session_state.session_state_store import SessionStateStore
+from session_state.state_machine import format_timestamp, ACTIVE_SESSION_STATES, STOPPED_SESSION_STATE
+
+VALID_LAUNCH_PROFILE_STATES = {'READY', 'UPDATE_IN_PROGRESS', 'UPDATE_FAILED'}
+
+# Launch plans are checked and launched in batches as configs are read. BatchGetItem reads up to 100 keys,
+# so the active session lookup of a batch from the session state table is a single call
+LAUNCH_PLAN_BATCH_SIZE = 100
 
 """
-    Handles discovery of desired sessions to launch and initiates the launches
+    Handles discovery of desired sessions to launch, and sends the launches to the launch queue or launches them directly
 """
 class WorkstationLauncher():
 
-    def __init__(self, time_manager: TimeManager, client_token_base: str):
-        self.nimble_client = boto3.client('nimble', region_name=AWS_REGION)
+    def __init__(self, time_manager: TimeManager, client_token_base: str, tick_time: float = None, lead_time_estimator: LeadTimeEstimator = None, metrics: InvocationMetrics = None, launch_queue: LaunchQueue = None, shard_index: int = 0, shard_count: int = 1, spread_seconds: int = 0, session_state_store: SessionStateStore = None):
+        # The client is pooled in the runtime context, sized to the launch thread pool and reused by warm invocations
+        self.nimble_client = RUNTIME_CONTEXT.get_nimble_client()
         self.time_manager = time_manager
         self.client_token_base = client_token_base
+        self.lead_time_estimator = lead_time_estimator
+        # Launchers of the same invocation share its metrics, which the handler emits once at the end
+        self.metrics = metrics if metrics is not None else InvocationMetrics(METRICS_NAMESPACE, dict())
+        self.tick_time = tick_time if tick_time is not None else time.time()
+        self.launch_queue = launch_queue
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.spread_seconds = spread_seconds
+        self.session_state_store = session_state_store if session_state_store is not None else DynamoSessionStateStore()
+        # Sessions listed for each studio, by the first batch of the slot with a config in the studio
+        self.studio_sessions : Dict[str, Tuple[Set[str], Dict[str, List[Dict]]]] = dict()
+
+    @staticmethod
+    def read_each_config_once(reads: List[Iterator], get_uuid: Callable) -> Iterator:
+        """
+        Chains the configs read from each config table, skipping configs already read from an earlier table. Only the cutover
+        to the user keyed table reads more than one table, so only then are the uuids of the slot kept
+        """
+        if len(reads) == 1:
+            yield from reads[0]
+            return
+        config_uuids : Set[str] = set()
+        for read in reads:
+            for config in read:
+                if get_uuid(config) not in config_uuids:
+                    config_uuids.add(get_uuid(config))
+                    yield config
+
+    def query_configs_set_to_launch_at_time(self, model, target_launch_time) -> Iterator[AutoLaunchConfig]:
+        # Query the start time index so only the configs for this slot are read, rather than scanning the table.
+        # Pages are read as the configs are consumed, so only one page is held at a time
+        reader = ProjectedReader()
+        yield from self.metrics.time_iteration("QueryStartTimeIndex", reader.query(model, target_launch_time, SCHEDULED_CONFIG_ATTRIBUTES, model.start_time_index))
+        self.metrics.increment("QueryStartTimeIndexCalls", reader.pages)
+        self.metrics.add("QueryStartTimeIndexReadCapacity", reader.consumed_capacity, NONE_UNIT)
+
+    def read_configs_set_to_launch_at_time(self, target_launch_time) -> Iterator[AutoLaunchConfig]:
+        reads = [self.query_configs_set_to_launch_at_time(model, target_launch_time) for model in get_config_models()]
+        return WorkstationLauncher.read_each_config_once(reads, lambda config: config.uuid)
+
+    def query_config_items_set_to_launch_at_time(self, table_name: str, target_launch_time) -> Iterator[Dict]:
+        # Same query through the shared low-level client, so the AutoLaunchConfig model never creates its own client
+        reader = ClientReader()
+        yield from self.metrics.time_iteration("QueryStartTimeIndex", reader.query(table_name, 'start_time', target_launch_time, SCHEDULED_CONFIG_ATTRIBUTES, START_TIME_INDEX_NAME))
+        self.metrics.increment("QueryStartTimeIndexCalls", reader.pages)
+        self.metrics.add("QueryStartTimeIndexReadCapacity", reader.consumed_capacity, NONE_UNIT)
+
+    def read_config_items_set_to_launch_at_time(self, target_launch_time) -> Iterator[Dict]:
+        reads = [self.query_config_items_set_to_launch_at_time(model.Meta.table_name, target_launch_time) for model in get_config_models()]
+        return WorkstationLauncher.read_each_config_once(reads, lambda item: item['uuid'])
 
     @staticmethod
-    def get_configs_set_to_lauch_at_time(target_launch_time) -> List[AutoLaunchConfig]:
-        return list(AutoLaunchConfig.scan(AutoLaunchConfig.start_time == target_launch_time))
+    def get_plans_from_compiled_schedule(slot: Dict[str, List[str]]) -> Iterator[LaunchPlan]:
+        # Compiled slots only hold enabled configs for that weekday, so no further day or enabled filtering is needed
+        for config_uuid, launch in slot.items():
+            yield LaunchPlan(config_uuid, *launch)
+
+    def is_user_in_shard(self, user_id: str) -> bool:
+        # Sharding by user keeps all of a user's configs, and their active session check, in one shard
+        return self.shard_count <= 1 or get_user_shard(user_id, self.shard_count) == self.shard_index
 
     @staticmethod
-    def filter_out_disabled_launch_configs(configs: List[AutoLaunchConfig]) -> List[AutoLaunchConfig]:
-        return [x for x in configs if x.enabled == True]
+    def is_config_enabled_on_day(weekday: Weekdays, config: AutoLaunchConfig) -> bool:
+        return config.enabled == True and config.dates_applied is not None and str(weekday) in config.dates_applied.days
 
     @staticmethod
-    def filter_launch_configs_that_match_day(weekday: Weekdays, configs: List[AutoLaunchConfig]) -> List[AutoLaunchConfig]:
-        return [x for x in configs if str(weekday) in x.dates_applied.days]
+    def is_config_item_enabled_on_day(weekday: Weekdays, item: Dict) -> bool:
+        # Configs saved without enabled are enabled, as the model defaults it to True
+        return item.get('enabled', True) == True and str(weekday) in (item.get('dates_applied') or dict()).get('days', [])
 
     @staticmethod
-    def filter_out_users_with_active_sessions_from_launch_configs(users: List[str], configs: List[AutoLaunchConfig]) -> List[AutoLaunchConfig]:
-        return [x for x in configs if not x.user_id in users]
+    def filter_out_users_with_active_sessions_from_launch_configs(users: Dict[str, Set[str]], configs: List[LaunchPlan]) -> List[LaunchPlan]:
+        return [x for x in configs if not x.user_id in users.get(x.studio_id, set())]
 
     @staticmethod
-    def get_studio_ids_from_launch_configs(configs: List[AutoLaunchConfig]) -> Set:
-        studio_ids = set()
+    def get_candidate_users_by_studio(configs: List[LaunchPlan]) -> Dict[str, Set[str]]:
+        candidate_users_by_studio = dict()
         for config in configs:
-            studio_ids.add(config.studio_id)
-        return studio_ids
+            candidate_users_by_studio.setdefault(config.studio_id, set()).add(config.user_id)
+        return candidate_users_by_studio
 
-    def get_users_with_active_streaming_sessions(self, configs : List[AutoLaunchConfig]) -> List[str]:
-        users_with_active_streaming_sessions : List[str] = list()
+    def list_studio_sessions(self, studio_id: str) -> Tuple[Set[str], Dict[str, List[Dict]]]:
+        """
+        Returns the users of the studio with an active session, and the STOPPED sessions of each user
+        """
+        active_users : Set[str] = set()
+        stopped_sessions_by_user : Dict[str, List[Dict]] = dict()
         paginator = self.nimble_client.get_paginator('list_streaming_sessions')
+        for page in self.metrics.time_pages("ListStreamingSessions", paginator.paginate(studioId=studio_id)):
+            for session in page['sessions']:
+                if session['state'] in ACTIVE_SESSION_STATES:
+                    active_users.add(session['ownedBy'])
+                elif session['state'] == STOPPED_SESSION_STATE:
+                    stopped_sessions_by_user.setdefault(session['ownedBy'], list()).append(session)
+        return (active_users, stopped_sessions_by_user)
+
+    def get_candidate_users_with_active_streaming_sessions(self, studio_id: str, candidate_users: Set[str], stopped_sessions: Dict[Tuple[str, str], List[Dict]] = None) -> Set[str]:
+        active_users, stopped_sessions_by_user = self.studio_sessions[studio_id]
+        if stopped_sessions is not None:
+            for user_id in candidate_users & stopped_sessions_by_user.keys():
+                stopped_sessions[(studio_id, user_id)] = list(stopped_sessions_by_user[user_id])
+        return candidate_users & active_users
+
+    def get_streaming_session(self, studio_id: str, session_id: str) -> Dict or None:
+        try:
+            return self.metrics.time_call("GetStreamingSession", lambda: self.nimble_client.get_streaming_session(sessionId=session_id, studioId=studio_id))['session']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return None
+            raise e
+
+    def describe_stopped_sessions(self, stopped_session_ids: Dict[Tuple[str, str], List[str]], stopped_sessions: Dict[Tuple[str, str], List[Dict]]) -> None:
+        # The session state table only keeps session states, so the launch profile and image of each STOPPED session are read from Nimble
+        sessions_to_describe = [(key, session_id) for key, session_ids in stopped_session_ids.items() for session_id in session_ids]
+        if len(sessions_to_describe) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(LAUNCH_CONCURRENCY, len(sessions_to_describe))) as pool:
+            futures = [(key, pool.submit(self.get_streaming_session, key[0], session_id)) for key, session_id in sessions_to_describe]
+            for key, future in futures:
+                session = future.result()
+                if session is not None and session['state'] == STOPPED_SESSION_STATE:
+                    stopped_sessions.setdefault(key, list()).append(session)
 
-        studio_ids = WorkstationLauncher.get_studio_ids_from_launch_configs(configs)
+    def get_users_with_active_streaming_sessions(self, configs : List[LaunchPlan], stopped_sessions: Dict[Tuple[str, str], List[Dict]] = None) -> Dict[str, Set[str]]:
+        """
+        Returns the candidate users with an active session by studio. When stopped_sessions is given, it is filled with
+        the STOPPED sessions of candidate users, keyed by studio and user
+        """
+        candidate_users_by_studio = WorkstationLauncher.get_candidate_users_by_studio(configs)
 
-        for studio_id in studio_ids:
-            page_iterator = paginator.paginate(studioId=studio_id)
-            for page in page_iterator:
-                for session in page['sessions']:
-                    if (session['state'] == 'CREATE_IN_PROGRESS' or session['state'] == 'READY'):
-                        users_with_active_streaming_sessions.append(session['ownedBy'])
+        # The session state table is kept current from session events, so only the candidate users need to be read
+        if ACTIVE_SESSION_SOURCE == ACTIVE_SESSION_SOURCE_STATE_TABLE:
+            stopped_session_ids = dict() if stopped_sessions is not None else None
+            users_with_active_sessions = self.metrics.time_call("GetSessionState", lambda: self.session_state_store.get_users_with_active_sessions(candidate_users_by_studio, stopped_session_ids))
+            if stopped_sessions is not None:
+                self.describe_stopped_sessions(stopped_session_ids, stopped_sessions)
+            return users_with_active_sessions
 
-        return users_with_active_streaming_sessions
+        # Each studio is listed once per slot, concurrently, by the first batch with a config in it, as a listing returns
+        # the sessions of every user in the studio. Later batches check their users against the same listing
+        studios_to_list = [x for x in candidate_users_by_studio if x not in self.studio_sessions]
+        if len(studios_to_list) > 0:
+            with ThreadPoolExecutor(max_workers=min(LAUNCH_CONCURRENCY, len(studios_to_list))) as pool:
+                futures = {studio_id: pool.submit(self.list_studio_sessions, studio_id) for studio_id in studios_to_list}
+                self.studio_sessions.update({studio_id: future.result() for studio_id, future in futures.items()})
+        return {
+            studio_id: self.get_candidate_users_with_active_streaming_sessions(studio_id, candidate_users, stopped_sessions)
+            for studio_id, candidate_users in candidate_users_by_studio.items()
+        }
+
+    @staticmethod
+    def find_stopped_session(config: LaunchPlan, stopped_sessions: List[Dict], used_session_ids: Set[str]) -> Dict or None:
+        # Only a session of the same launch profile, streaming image and instance type is resumed, as the instance type of a
+        # stopped session cannot be changed when it is started
+        matches = [
+            x for x in stopped_sessions
+            if x['launchProfileId'] == config.launch_profile and x['streamingImageId'] == config.streaming_image_id and x['sessionId'] not in used_session_ids
+        ]
+        same_instance_type = [x for x in matches if x.get('ec2InstanceType') == config.instance_type]
+        if len(same_instance_type) == 0 and len(matches) > 0:
+            print(f"Creating a session for {config.user_id} instead of resuming {[x['sessionId'] for x in matches]}, "
+                f"which are not of instance type {config.instance_type}")
+        return same_instance_type[0] if len(same_instance_type) > 0 else None
+
+    def assign_stopped_sessions(self, configs: List[LaunchPlan], stopped_sessions: Dict[Tuple[str, str], List[Dict]]) -> None:
+        used_session_ids : Set[str] = set()
+        for config in configs:
+            session = WorkstationLauncher.find_stopped_session(config, stopped_sessions.get((config.studio_id, config.user_id), list()), used_session_ids)
+            if session is not None:
+                config.resume_session_id = session['sessionId']
+                used_session_ids.add(session['sessionId'])
+        self.metrics.increment("ResumeCandidates", len(used_session_ids))
 
-    def get_all_configs_to_launch(self) -> List[AutoLaunchConfig]:
+    def is_launch_profile_valid(self, studio_id: str, launch_profile_id: str) -> bool or None:
+        try:
+            response = self.metrics.time_call("GetLaunchProfile", lambda: self.nimble_client.get_launch_profile(launchProfileId=launch_profile_id, studioId=studio_id))
+            return response['launchProfile']['state'] in VALID_LAUNCH_PROFILE_STATES
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return False
+            # Any other error is no answer, so it is not cached and the launch surfaces the error
+            print(f"Could not check launch profile {launch_profile_id} of studio {studio_id}: {e}")
+            return None
+
+    def filter_out_configs_with_invalid_launch_profiles(self, configs: List[LaunchPlan]) -> List[LaunchPlan]:
+        valid_configs = list()
+        for config in configs:
+            launch_profile_key = (config.studio_id, config.launch_profile)
+            if RUNTIME_CONTEXT.launch_profile_validity.get(launch_profile_key, lambda: self.is_launch_profile_valid(*launch_profile_key)) != False:
+                valid_configs.append(config)
+            else:
+                self.metrics.increment("SkippedInvalidLaunchProfile")
+                LaunchWorker.log_launch("skipped", self.create_launch_message(config), reason="launch profile is not available")
+        return valid_configs
+
+    def count_configs_scanned(self, configs: Iterator) -> Iterator:
+        # Counts the configs of the slot as read, before they are filtered by day and shard
+        for config in configs:
+            self.metrics.increment("ConfigsScanned")
+            yield config
+
+    def read_slot_launch_plans(self) -> Iterator[LaunchPlan]:
+        """
+        Yields a launch plan for each enabled config of the slot's weekday in this shard, filtering each config as it is read
+        """
         launch_time = self.time_manager.get_target_launch_time()
         weekday = self.time_manager.get_weekday()
-        configs = WorkstationLauncher.get_configs_set_to_lauch_at_time(launch_time)
-        configs = WorkstationLauncher.filter_out_disabled_launch_configs(configs)
-        configs = WorkstationLauncher.filter_launch_configs_that_match_day(weekday, configs)
+        compiled_slot = get_compiled_schedule_slot(str(weekday), launch_time)
+        if compiled_slot is not None:
+            plans = self.count_configs_scanned(WorkstationLauncher.get_plans_from_compiled_schedule(compiled_slot))
+        elif CONFIG_DATA_LAYER == CONFIG_DATA_LAYER_CLIENT:
+            # Fall back to querying the config table until a schedule has been compiled, or while it is behind the config table
+            plans = (
+                LaunchPlan.from_item(item)
+                for item in self.count_configs_scanned(self.read_config_items_set_to_launch_at_time(launch_time))
+                if WorkstationLauncher.is_config_item_enabled_on_day(weekday, item)
+            )
+        else:
+            plans = (
+                LaunchPlan.from_config(config)
+                for config in self.count_configs_scanned(self.read_configs_set_to_launch_at_time(launch_time))
+                if WorkstationLauncher.is_config_enabled_on_day(weekday, config)
+            )
+        for plan in plans:
+            if self.is_user_in_shard(plan.user_id):
+                yield plan
+
+    def read_launch_plan_batches(self) -> Iterator[List[LaunchPlan]]:
+        batch = list()
+        for plan in self.metrics.time_iteration("LoadConfigs", self.read_slot_launch_plans()):
+            batch.append(plan)
+            if len(batch) >= LAUNCH_PLAN_BATCH_SIZE:
+                yield batch
+                batch = list()
+        if len(batch) > 0:
+            yield batch
+
+    def get_plans_to_launch(self, plans: List[LaunchPlan]) -> List[LaunchPlan]:
+        if self.lead_time_estimator is not None:
+            with self.metrics.phase("LeadTimeFilter"):
+                plans = self.lead_time_estimator.filter_configs_due_at_tick(self.time_manager.get_target_launch_datetime(), plans)
+
+        self.metrics.increment("Candidates", len(plans))
+        if len(plans) == 0:
+            return plans
+        # The tables of the launch threads are only connected once there is something to launch, so ticks with nothing due skip their clients
+        RUNTIME_CONTEXT.warm_table_connections([SessionState, LaunchRecord])
+
+        resume_stopped = LAUNCH_STRATEGY == LAUNCH_STRATEGY_RESUME_STOPPED
+        stopped_sessions = dict() if resume_stopped else None
+        with self.metrics.phase("ActiveSessionLookup"):
+            users_with_active_streaming_sessions = self.get_users_with_active_streaming_sessions(plans, stopped_sessions)
+        candidate_count = len(plans)
+        plans = WorkstationLauncher.filter_out_users_with_active_sessions_from_launch_configs(users_with_active_streaming_sessions, plans)
+        self.metrics.increment("SkippedActive", candidate_count - len(plans))
+        if resume_stopped:
+            self.assign_stopped_sessions(plans, stopped_sessions)
 
-        if len(configs) == 0:
-            return configs
+        with self.metrics.phase("LaunchProfileValidation"):
+            return self.filter_out_configs_with_invalid_launch_profiles(plans)
 
-        users_with_active_streaming_sessions = self.get_users_with_active_streaming_sessions(configs)
-        return WorkstationLauncher.filter_out_users_with_active_sessions_from_launch_configs(users_with_active_streaming_sessions, configs)
+    def read_launch_message_batches(self) -> Iterator[List[LaunchMessage]]:
+        """
+        Yields the launches of each batch of configs as soon as the batch is read and checked, so launches start
+        while later pages of configs are still being read
+        """
+        for plans in self.read_launch_plan_batches():
+            messages = [self.create_launch_message(plan) for plan in self.get_plans_to_launch(plans)]
+            if len(messages) > 0:
+                yield messages
 
     def generate_client_token_for_create_session(self, owned_by : str) -> str:
         hash_string = self.client_token_base + self.time_manager.get_target_launch_time() + owned_by
         hash = hashlib.md5(hash_string.encode('utf-8'))
         return str(uuid.UUID(hash.hexdigest()))
 
+    @staticmethod
+    def get_launch_offset_seconds(user_id: str, spread_seconds: int) -> int:
+        # md5 rather than the crc32 of the shard, so the users of a shard are spread over the whole window
+        return int(hashlib.md5(user_id.encode('utf-8')).hexdigest(), 16) % spread_seconds
+
+    def get_not_before(self, user_id: str) -> float or None:
+        if self.spread_seconds <= 0:
+            return None
+        return self.tick_time + WorkstationLauncher.get_launch_offset_seconds(user_id, self.spread_seconds)
+
+    def get_end_timestamp(self, end_time: str) -> str or None:
+        if end_time is None:
+            return None
+        return format_timestamp(self.time_manager.get_end_datetime(end_time))
+
+    def create_launch_message(self, config: LaunchPlan) -> LaunchMessage:
+        return LaunchMessage(
+            config_uuid=config.config_uuid,
+            user_id=config.user_id,
+            studio_id=config.studio_id,
+            launch_profile=config.launch_profile,
+            streaming_image_id=config.streaming_image_id,
+            instance_type=config.instance_type,
+            target_launch_time=self.time_manager.get_target_launch_time(),
+            client_token=self.generate_client_token_for_create_session(config.user_id),
+            tick_time=self.tick_time,
+            not_before=self.get_not_before(config.user_id),
+            end_time=self.get_end_timestamp(config.end_time),
+            end_action=config.end_action,
+            resume_session_id=config.resume_session_id
+        )
+
+    @staticmethod
+    def release_when_due(message_batches: Iterator[List[LaunchMessage]]) -> Iterator[LaunchMessage]:
+        """
+        Yields each launch once it is due. A launch thread waiting for a launch cannot start another, so launches are held
+        here in the order they are due rather than submitted as read. Launches already due are yielded between batches
+        """
+        pending = list()
+        sequence = itertools.count()
+        batches = iter(message_batches)
+        reading = True
+        while reading or len(pending) > 0:
+            if reading:
+                messages = next(batches, None)
+                if messages is None:
+                    reading = False
+                else:
+                    for message in messages:
+                        # The sequence number breaks ties, as launch messages cannot be compared
+                        heapq.heappush(pending, (message.not_before, next(sequence), message))
+            elif pending[0][0] > time.time():
+                time.sleep(pending[0][0] - time.time())
+            while len(pending) > 0 and pending[0][0] <= time.time():
+                yield heapq.heappop(pending)[2]
+
     def launch_workstations(self) -> None:
-        configs = self.get_all_configs_to_launch()
+        message_batches = self.read_launch_message_batches()
 
-        if len(configs) == 0:
-            print("No workstations to launch at this time")
+        if self.launch_queue is not None:
+            sent = 0
+            for messages in message_batches:
+                with self.metrics.phase("Enqueue"):
+                    self.launch_queue.send(messages)
+                sent += len(messages)
+            self.metrics.increment("Enqueued", sent)
+            if sent == 0:
+                print("No workstations to launch at this time")
+            else:
+                print(f"Sent {sent} launches to the launch queue")
             return
 
-        for config in configs:
-            try:
-                response = self.nimble_client.create_streaming_session(
-                    clientToken=self.generate_client_token_for_create_session(config.user_id),
-                    ec2InstanceType=config.instance_type,
-                    launchProfileId=config.launch_profile,
-                    ownedBy=config.user_id,
-                    streamingImageId=config.streaming_image_id,
-                    studioId=config.studio_id,
-                    tags={
-                        'NimbleStudioAutoWorkstationSchedulerLaunched': 'true',
-                        'WorkstationOwnedBy': config.user_id,
-                        'WorkstationTargetLaunchTimeUTC': self.time_manager.get_target_launch_time()
-                    }
-                )
-                print(f"Launched session for user {config.user_id} with session ID {response['session']['sessionId']}")
-            except Exception as e:
-                print(f"Error launching session for user {config.user_id}: {e}")
+        if self.spread_seconds > 0:
+            messages = WorkstationLauncher.release_when_due(message_batches)
+        else:
+            messages = (message for messages in message_batches for message in messages)
+        # The launch threads start on the first launches while the rest of the configs are read
+        LaunchWorker(self.tick_time, self.metrics).run(messages)
@@ -1,18 +1,66 @@
+from typing import List
 from pynamodb.models import Model
 from pynamodb.attributes import (
     BooleanAttribute, UnicodeAttribute
 )
-from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_CONFIG_TABLE_NAME
+from pynamodb.indexes import GlobalSecondaryIndex, AllProjection
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_CONFIG_TABLE_NAME, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME, START_TIME_INDEX_NAME
 from model.data.dates_applied import DatesApplied
+from model.data.end_actions import END_ACTION_STOP, END_ACTION_DELETE, END_ACTIONS
+
+CONFIG_KEY_SEPARATOR = "#"
+# Config attributes the launcher and the schedule compiler read, so attributes they do not use are neither returned nor deserialized
+SCHEDULED_CONFIG_ATTRIBUTES = ['uuid', 'user_id', 'start_time', 'studio_id', 'launch_profile', 'streaming_image_id', 'instance_type', 'enabled', 'dates_applied', 'end_time', 'end_action']
+
+def get_config_key(start_time: str, launch_profile: str, config_uuid: str) -> str:
+    # Sorts a user's configs by start time, then launch profile. The uuid keeps keys unique, as a user may have configs
+    # with the same start time and launch profile for different days
+    return CONFIG_KEY_SEPARATOR.join([start_time or "", launch_profile or "", config_uuid])
+
+"""
+    Global secondary index keyed on the launch slot, so a tick only reads the configs set to launch at that time
+"""
+class StartTimeIndex(GlobalSecondaryIndex):
+    class Meta:
+        index_name = START_TIME_INDEX_NAME
+        projection = AllProjection()
+
+    start_time = UnicodeAttribute(hash_key=True)
+    uuid = UnicodeAttribute(range_key=True)
 
 """
-    Configuration data for a desired automated session launch at a certain time and date/day
+    Configuration data for a desired automated session launch at a certain time and date/day, keyed by user so the
+    configs of a user are read with a query
 """
 class AutoLaunchConfig(Model):
     class Meta:
         table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_CONFIG_TABLE_NAME
         region = AWS_REGION
 
+    user_id = UnicodeAttribute(hash_key=True)
+    config_key = UnicodeAttribute(range_key=True)
+    uuid = UnicodeAttribute()
+    start_time = UnicodeAttribute(null=True)
+    studio_id = UnicodeAttribute(null=True)
+    launch_profile = UnicodeAttribute(null=True)
+    streaming_image_id = UnicodeAttribute(null=True)
+    instance_type = UnicodeAttribute(null=True)
+    enabled = BooleanAttribute(default=True)
+    dates_applied = DatesApplied()
+    # Optional HHMM after which the session is stopped or deleted, on the next day when not after the start time
+    end_time = UnicodeAttribute(null=True)
+    end_action = UnicodeAttribute(null=True)
+
+    start_time_index = StartTimeIndex()
+
+"""
+    Configuration in the original table keyed on the config uuid, read alongside the user keyed table until every config has been migrated
+"""
+class LegacyAutoLaunchConfig(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME
+        region = AWS_REGION
+
     uuid = UnicodeAttribute(hash_key=True)
     user_id = UnicodeAttribute(null=True)
     start_time = UnicodeAttribute(null=True)
@@ -22,4 +70,18 @@ class AutoLaunchConfig(Model):
     instance_type = UnicodeAttribute(null=True)
     enabled = BooleanAttribute(default=True)
     dates_applied = DatesApplied()
+    end_time = UnicodeAttribute(null=True)
+    end_action = UnicodeAttribute(null=True)
+
+    start_time_index = StartTimeIndex()
+
+def is_legacy_table_read() -> bool:
+    return NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LEGACY_CONFIG_TABLE_NAME != ""
 
+def get_config_models() -> List:
+    """
+    Models to read configs from, the user keyed table first. Configs in both tables during the cutover are read from the first
+    """
+    if is_legacy_table_read():
+        return [AutoLaunchConfig, LegacyAutoLaunchConfig]
+    return [AutoLaunchConfig]
@@ -0,0 +1,97 @@
+import gzip
+import json
+from typing import Dict, List
+from pynamodb.models import Model
+from pynamodb.attributes import BinaryAttribute, MapAttribute, UnicodeAttribute, VersionAttribute
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+
+COMPILED_SCHEDULE_STATE_KEY = "compiled_schedule"
+
+# DynamoDB items hold at most 400 KB, so slots are split into parts of at most this much uncompressed JSON
+MAX_SLOT_PART_BYTES = 300 * 1024
+
+def compress_json(value) -> bytes:
+    return gzip.compress(json.dumps(value, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+
+def decompress_json(data: bytes):
+    return json.loads(gzip.decompress(data).decode('utf-8'))
+
+"""
+    One part of a slot of the compiled schedule, mapping config uuids to [user_id, studio_id, launch_profile, streaming_image_id, instance_type],
+    followed by end_time and end_action for configs with an end time. Parts are written under a new revision whenever their slot changes
+    and are never updated, so readers of the schedule index never see a slot half written
+"""
+class CompiledScheduleSlot(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+        region = AWS_REGION
+
+    state_key = UnicodeAttribute(hash_key=True)
+    compressed_launches = BinaryAttribute(legacy_encoding=False)
+
+    @staticmethod
+    def get_state_key(revision: str, slot_key: str, part: int) -> str:
+        return f"{COMPILED_SCHEDULE_STATE_KEY}#{revision}#{slot_key}#{part}"
+
+    @staticmethod
+    def split_slot(slot: Dict[str, List[str]]) -> List[Dict[str, List[str]]]:
+        parts = [dict()]
+        part_bytes = 0
+        for config_uuid, launch in sorted(slot.items()):
+            launch_bytes = len(json.dumps({config_uuid: launch}, separators=(',', ':')).encode('utf-8'))
+            if part_bytes + launch_bytes > MAX_SLOT_PART_BYTES and len(parts[-1]) > 0:
+                parts.append(dict())
+                part_bytes = 0
+            parts[-1][config_uuid] = launch
+            part_bytes += launch_bytes
+        return parts
+
+    def get_launches(self) -> Dict[str, List[str]]:
+        return decompress_json(self.compressed_launches)
+
+    def set_launches(self, launches: Dict[str, List[str]]) -> None:
+        self.compressed_launches = compress_json(launches)
+
+"""
+    Index of the weekly launch schedule compiled from the config table. Slots map "WEEKDAY#HHMM" to the [revision, part count]
+    of their CompiledScheduleSlot items, and studios map each studio to its number of scheduled launches and of those with an end time.
+    Each change writes the changed slots under a new revision and then switches this versioned item to them.
+    Pending batches map each stream batch being applied to the time of its first change, so readers can tell the schedule is behind the config table
+"""
+class CompiledSchedule(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+        region = AWS_REGION
+
+    state_key = UnicodeAttribute(hash_key=True, default=COMPILED_SCHEDULE_STATE_KEY)
+    version = VersionAttribute()
+    compressed_index = BinaryAttribute(null=True, legacy_encoding=False)
+    pending_batches = MapAttribute(null=True)
+
+    @staticmethod
+    def get_slot_key(weekday: str, start_time: str) -> str:
+        return f"{weekday}#{start_time}"
+
+    def get_index(self) -> Dict[str, Dict]:
+        if self.compressed_index is None:
+            return {'slots': dict(), 'studios': dict()}
+        return decompress_json(self.compressed_index)
+
+    def set_index(self, index: Dict[str, Dict]) -> None:
+        # Drop studios left without launches so the item only grows with the number of live configs
+        index['studios'] = {studio_id: counts for studio_id, counts in index['studios'].items() if counts[0] > 0}
+        self.compressed_index = compress_json(index)
+
+    def get_pending_batches(self) -> Dict[str, float]:
+        if self.pending_batches is None:
+            return dict()
+        return self.pending_batches.as_dict()
+
+    def set_pending_batches(self, pending_batches: Dict[str, float]) -> None:
+        self.pending_batches = MapAttribute(**pending_batches) if len(pending_batches) > 0 else None
+
+    def get_lag_seconds(self, now: float) -> float:
+        pending_batches = self.get_pending_batches()
+        if len(pending_batches) == 0:
+            return 0
+        return now - min(pending_batches.values())
@@ -0,0 +1,4 @@
+# Actions taken on a launched session once its config's end time passes
+END_ACTION_STOP = "stop"
+END_ACTION_DELETE = "delete"
+END_ACTIONS = [END_ACTION_STOP, END_ACTION_DELETE]
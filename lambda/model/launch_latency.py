@@ -0,0 +1,24 @@
+from pynamodb.models import Model
+from pynamodb.attributes import ListAttribute, NumberAttribute, UnicodeAttribute, VersionAttribute
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+
+LAUNCH_LATENCY_STATE_KEY_PREFIX = "launch_latency"
+
+# Number of most recent samples kept per launch profile, streaming image and instance type
+MAX_LAUNCH_LATENCY_SAMPLES = 100
+
+"""
+    Recently observed CREATE_IN_PROGRESS to READY latencies, in seconds, for a launch profile, streaming image and instance type
+"""
+class LaunchLatency(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+        region = AWS_REGION
+
+    state_key = UnicodeAttribute(hash_key=True)
+    samples = ListAttribute(of=NumberAttribute, default=list)
+    version = VersionAttribute()
+
+    @staticmethod
+    def get_state_key(launch_profile: str, streaming_image_id: str, instance_type: str) -> str:
+        return f"{LAUNCH_LATENCY_STATE_KEY_PREFIX}#{launch_profile}#{streaming_image_id}#{instance_type}"
@@ -0,0 +1,32 @@
+from pynamodb.models import Model
+from pynamodb.attributes import TTLAttribute, UnicodeAttribute
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LAUNCH_RECORD_TABLE_NAME
+
+# Launch strategies recorded for each launch, to compare their time to READY. Records written before stopped sessions
+# were resumed have no strategy, and were all created
+LAUNCH_RECORD_STRATEGY_CREATE = "create"
+LAUNCH_RECORD_STRATEGY_RESUME = "resume"
+
+"""
+    Timings of a session launched by the scheduler, from the scheduled tick until it is READY or fails
+"""
+class LaunchRecord(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_LAUNCH_RECORD_TABLE_NAME
+        region = AWS_REGION
+
+    session_id = UnicodeAttribute(hash_key=True)
+    studio_id = UnicodeAttribute(null=True)
+    user_id = UnicodeAttribute(null=True)
+    launch_profile = UnicodeAttribute(null=True)
+    streaming_image_id = UnicodeAttribute(null=True)
+    instance_type = UnicodeAttribute(null=True)
+    # Value of the WorkstationTargetLaunchTimeUTC tag, HHMM
+    target_launch_time = UnicodeAttribute(null=True)
+    tick_at = UnicodeAttribute(null=True)
+    created_at = UnicodeAttribute(null=True)
+    # LAUNCH_RECORD_STRATEGY_CREATE or LAUNCH_RECORD_STRATEGY_RESUME, unset on records written before resuming was supported
+    launch_strategy = UnicodeAttribute(null=True)
+    final_state = UnicodeAttribute(null=True)
+    completed_at = UnicodeAttribute(null=True)
+    expires_at = TTLAttribute(null=True)
@@ -0,0 +1,25 @@
+from pynamodb.models import Model
+from pynamodb.attributes import UnicodeAttribute
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+
+SCHEDULER_CHECKPOINT_STATE_KEY_PREFIX = "scheduler_checkpoint"
+
+# Slot times are stored as UTC "YYYY-MM-DDTHH:MM", which sorts in time order
+SLOT_TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+"""
+    Last slot the scheduler finished launching for a launcher shard
+"""
+class SchedulerCheckpoint(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_STATE_TABLE_NAME
+        region = AWS_REGION
+
+    state_key = UnicodeAttribute(hash_key=True)
+    last_completed_slot = UnicodeAttribute()
+    updated_at = UnicodeAttribute(null=True)
+
+    @staticmethod
+    def get_state_key(shard_index: int, shard_count: int) -> str:
+        # Changing the shard count starts new checkpoints, as each shard then launches different users
+        return f"{SCHEDULER_CHECKPOINT_STATE_KEY_PREFIX}#{shard_index}#{shard_count}"
@@ -0,0 +1,17 @@
+from pynamodb.models import Model
+from pynamodb.attributes import MapAttribute, UnicodeAttribute, VersionAttribute
+from common.config import AWS_REGION, NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_SESSION_STATE_TABLE_NAME
+
+"""
+    Last known state of each streaming session owned by a user in a studio.
+    Sessions map session ID to {"state": ..., "updated_at": ...}
+"""
+class SessionState(Model):
+    class Meta:
+        table_name = NIMBLE_STUDIO_AUTO_WORKSTATION_SCHEDULER_SESSION_STATE_TABLE_NAME
+        region = AWS_REGION
+
+    studio_id = UnicodeAttribute(hash_key=True)
+    owned_by = UnicodeAttribute(range_key=True)
+    sessions = MapAttribute(default=dict)
+    version = VersionAttribute()
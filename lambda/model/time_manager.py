@@ -1,4 +1,6 @@
 import datetime
+from typing import List
+from common.config import SLOT_MINUTES
 from model.data.weekdays import Weekdays
 
 class TimeManager():
@@ -11,34 +13,42 @@ class TimeManager():
         return f"{num:02d}"
 
     def get_target_launch_hour(self) -> str:
-        minute = self.today.minute
-        hour = self.today.hour
-
-        # Round up to nearest 15min interval
-        if minute > 52:
-            hour = hour + 1
-        return TimeManager.format_num_with_leading_zero(hour)
+        return TimeManager.format_num_with_leading_zero(self.get_target_launch_datetime().hour)
 
     def get_target_launch_minute(self) -> str:
-        minute = self.today.minute
-        if minute <= 7 or minute > 52:
-            minute = "00"
-        elif (minute in range(8, 23)):
-            minute = "15"
-        elif (minute in range(23, 38)):
-            minute = "30"
-        else:
-            minute = "45"
-        return minute
+        return TimeManager.format_num_with_leading_zero(self.get_target_launch_datetime().minute)
 
     """
-    Handles offset of lambda invocation time and desired launch time in intervals of 15min
+    Handles offset of lambda invocation time and desired launch time in intervals of SLOT_MINUTES
     """
     def get_target_launch_time(self) -> str:
         return self.get_target_launch_hour() + self.get_target_launch_minute()
 
+    def get_target_launch_datetime(self) -> datetime.datetime:
+        # Round to the nearest slot, rolling over into the next hour and day
+        slot_start = self.today.replace(minute=0, second=0, microsecond=0)
+        return slot_start + datetime.timedelta(minutes=((self.today.minute + SLOT_MINUTES // 2) // SLOT_MINUTES) * SLOT_MINUTES)
+
+    def get_upcoming_slot_times(self, max_lead_minutes: int) -> List[datetime.datetime]:
+        """
+        Target launch slot and every later slot whose launch can start up to max_lead_minutes early
+        """
+        target_launch_datetime = self.get_target_launch_datetime()
+        return [target_launch_datetime + datetime.timedelta(minutes=x) for x in range(0, max_lead_minutes + 1, SLOT_MINUTES)]
+
+    def get_end_datetime(self, end_time: str) -> datetime.datetime:
+        """
+        End time HHMM of a session launched for the target slot, on the next day when it is not after the start time
+        """
+        target_launch_datetime = self.get_target_launch_datetime()
+        end_datetime = target_launch_datetime.replace(hour=int(end_time[:2]), minute=int(end_time[2:]))
+        if end_datetime <= target_launch_datetime:
+            end_datetime += datetime.timedelta(days=1)
+        return end_datetime
+
     def get_weekday(self) -> Weekdays:
-        return Weekdays.get_weekday_from_int(self.today.weekday())
+        # The weekday of the target slot, which is the next day for a late tick just before midnight
+        return Weekdays.get_weekday_from_int(self.get_target_launch_datetime().weekday())
 
     def get_date(self) -> str:
-        return self.today.strftime("%m/%d/%Y")
\ No newline at end of file
+        return self.get_target_launch_datetime().strftime("%m/%d/%Y")
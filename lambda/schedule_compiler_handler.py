@@ -0,0 +1,17 @@
+from common.runtime_context import RUNTIME_CONTEXT
+from compiler.schedule_compiler import ScheduleCompiler
+
+def handler(event, context):
+
+    RUNTIME_CONTEXT.start_invocation()
+    schedule_compiler = ScheduleCompiler()
+
+    # Invoke with {"rebuild": true} to recompile the whole schedule from the config table
+    if event.get('rebuild') == True:
+        print("Rebuilding compiled schedule from config table")
+        schedule_compiler.rebuild()
+        return
+
+    records = event.get('Records', list())
+    print(f"Applying {len(records)} config table stream records to compiled schedule")
+    schedule_compiler.apply_stream_records(records)
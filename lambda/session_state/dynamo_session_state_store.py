@@ -0,0 +1,55 @@
+from typing import Callable, Dict, List, Set, Tuple
+from pynamodb.exceptions import DeleteError, DoesNotExist, PutError
+from model.session_state import SessionState
+from session_state.session_state_store import SessionStateStore
+from session_state.state_machine import has_active_session, get_stopped_session_ids
+
+MAX_SAVE_ATTEMPTS = 5
+
+"""
+    Session state kept in the session state table, with optimistic locking on each (studio, owner) item
+"""
+class DynamoSessionStateStore(SessionStateStore):
+
+    @staticmethod
+    def get_item(studio_id: str, owned_by: str) -> SessionState:
+        try:
+            return SessionState.get(studio_id, owned_by, consistent_read=True)
+        except DoesNotExist:
+            return SessionState(studio_id, owned_by)
+
+    def get_owners(self, studio_id: str) -> List[str]:
+        return [x.owned_by for x in SessionState.query(studio_id, attributes_to_get=['owned_by'])]
+
+    def get_sessions(self, studio_id: str, owned_by: str) -> Dict[str, Dict]:
+        return self.get_item(studio_id, owned_by).sessions.as_dict()
+
+    def update_sessions(self, studio_id: str, owned_by: str, update: Callable[[Dict[str, Dict]], bool]) -> None:
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            item = self.get_item(studio_id, owned_by)
+            sessions = item.sessions.as_dict()
+            if not update(sessions):
+                return
+            try:
+                if len(sessions) > 0:
+                    item.sessions = sessions
+                    item.save()
+                elif item.version is not None:
+                    item.delete()
+                return
+            except (PutError, DeleteError) as e:
+                if e.cause_response_code != 'ConditionalCheckFailedException':
+                    raise e
+        raise Exception(f"Unable to update session state for {owned_by} in studio {studio_id} after {MAX_SAVE_ATTEMPTS} attempts")
+
+    def get_users_with_active_sessions(self, candidate_users_by_studio: Dict[str, Set[str]], stopped_session_ids: Dict[Tuple[str, str], List[str]] = None) -> Dict[str, Set[str]]:
+        # One batch read for every candidate, rather than a read per user
+        active_users_by_studio = {studio_id: set() for studio_id in candidate_users_by_studio.keys()}
+        keys = [(studio_id, user_id) for studio_id, users in candidate_users_by_studio.items() for user_id in users]
+        for item in SessionState.batch_get(keys, attributes_to_get=['studio_id', 'owned_by', 'sessions']):
+            sessions = item.sessions.as_dict()
+            if has_active_session(sessions):
+                active_users_by_studio[item.studio_id].add(item.owned_by)
+            elif stopped_session_ids is not None and len(get_stopped_session_ids(sessions)) > 0:
+                stopped_session_ids[(item.studio_id, item.owned_by)] = get_stopped_session_ids(sessions)
+        return active_users_by_studio
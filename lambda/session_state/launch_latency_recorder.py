@@ -0,0 +1,26 @@
+from pynamodb.exceptions import DoesNotExist, PutError
+from model.launch_latency import LaunchLatency, MAX_LAUNCH_LATENCY_SAMPLES
+
+MAX_SAVE_ATTEMPTS = 5
+
+"""
+    Records observed session time to READY per launch profile, streaming image and instance type
+"""
+class LaunchLatencyRecorder():
+
+    def record(self, launch_profile: str, streaming_image_id: str, instance_type: str, latency_seconds: float) -> None:
+        state_key = LaunchLatency.get_state_key(launch_profile, streaming_image_id, instance_type)
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            try:
+                item = LaunchLatency.get(state_key, consistent_read=True)
+            except DoesNotExist:
+                item = LaunchLatency(state_key)
+            item.samples = (item.samples + [latency_seconds])[-MAX_LAUNCH_LATENCY_SAMPLES:]
+            try:
+                item.save()
+                print(f"Recorded {latency_seconds:.0f}s time to READY for {state_key}")
+                return
+            except PutError as e:
+                if e.cause_response_code != 'ConditionalCheckFailedException':
+                    raise e
+        raise Exception(f"Unable to record launch latency for {state_key} after {MAX_SAVE_ATTEMPTS} attempts")
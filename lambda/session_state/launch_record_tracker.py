@@ -0,0 +1,42 @@
+from pynamodb.exceptions import UpdateError
+from common.metrics import log_json
+from model.launch_record import LaunchRecord, LAUNCH_RECORD_STRATEGY_CREATE
+from session_state.state_machine import is_launch_completion_state, parse_timestamp
+
+"""
+    Completes the launch record of a session the first time it reaches READY or a failure state
+"""
+class LaunchRecordTracker():
+
+    @staticmethod
+    def log_time_to_ready(record: LaunchRecord) -> None:
+        # The update returns the whole record, so time to READY is logged per launch strategy without another read
+        if record.created_at is None:
+            return
+        log_json(
+            "launch_completed",
+            session_id=record.session_id,
+            final_state=record.final_state,
+            strategy=record.launch_strategy or LAUNCH_RECORD_STRATEGY_CREATE,
+            instance_type=record.instance_type,
+            seconds_to_complete=round((parse_timestamp(record.completed_at) - parse_timestamp(record.created_at)).total_seconds())
+        )
+
+    def complete(self, session_id: str, state: str, completed_at: str) -> None:
+        if not is_launch_completion_state(state):
+            return
+        try:
+            # Only sessions launched by the scheduler have a record, and only the first completion is kept
+            record = LaunchRecord(session_id)
+            record.update(
+                actions=[
+                    LaunchRecord.final_state.set(state),
+                    LaunchRecord.completed_at.set(completed_at)
+                ],
+                condition=(LaunchRecord.session_id.exists() & LaunchRecord.final_state.does_not_exist())
+            )
+            print(f"Launch of session {session_id} completed as {state} at {completed_at}")
+            LaunchRecordTracker.log_time_to_ready(record)
+        except UpdateError as e:
+            if e.cause_response_code != 'ConditionalCheckFailedException':
+                raise e
@@ -0,0 +1,45 @@
+import datetime
+from typing import List, Set
+from common.projected_reader import ProjectedReader
+from common.runtime_context import RUNTIME_CONTEXT
+from launcher.schedule_cache import get_compiled_schedule_studio_ids
+from model.auto_launch_config import get_config_models
+from session_state.session_state_tracker import SessionStateTracker
+from session_state.state_machine import format_timestamp
+
+"""
+    Periodically rewrites the session state of every studio with launch configs from a full session listing
+"""
+class SessionStateReconciler():
+
+    def __init__(self, tracker: SessionStateTracker):
+        self.nimble_client = RUNTIME_CONTEXT.get_nimble_client()
+        self.tracker = tracker
+
+    @staticmethod
+    def get_studio_ids_with_configs() -> Set[str]:
+        return RUNTIME_CONTEXT.studios_with_configs.get('all', SessionStateReconciler.load_studio_ids_with_configs)
+
+    @staticmethod
+    def load_studio_ids_with_configs() -> Set[str]:
+        compiled_studio_ids = get_compiled_schedule_studio_ids()
+        if compiled_studio_ids is not None:
+            return compiled_studio_ids
+        studio_ids = set()
+        for model in get_config_models():
+            reader = ProjectedReader()
+            studio_ids |= {x.studio_id for x in reader.scan(model, ['studio_id']) if x.studio_id is not None}
+            print(f"Scanned studios with configs from {model.Meta.table_name} consuming {reader.consumed_capacity} read capacity units")
+        return studio_ids
+
+    def list_studio_sessions(self, studio_id: str) -> List[dict]:
+        sessions = list()
+        paginator = self.nimble_client.get_paginator('list_streaming_sessions')
+        for page in paginator.paginate(studioId=studio_id):
+            sessions.extend(page['sessions'])
+        return sessions
+
+    def reconcile(self) -> None:
+        for studio_id in SessionStateReconciler.get_studio_ids_with_configs():
+            listed_at = format_timestamp(datetime.datetime.utcnow())
+            self.tracker.reconcile_studio(studio_id, self.list_studio_sessions(studio_id), listed_at)
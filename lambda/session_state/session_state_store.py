@@ -0,0 +1,62 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Set, Tuple
+from session_state.state_machine import has_active_session, get_stopped_session_ids
+
+"""
+    Storage for the session state of each (studio, owner) pair
+"""
+class SessionStateStore(ABC):
+
+    @abstractmethod
+    def get_owners(self, studio_id: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    def get_sessions(self, studio_id: str, owned_by: str) -> Dict[str, Dict]:
+        pass
+
+    @abstractmethod
+    def update_sessions(self, studio_id: str, owned_by: str, update: Callable[[Dict[str, Dict]], bool]) -> None:
+        """
+        Calls update with the current sessions of the owner and stores them if update returns True
+        """
+        pass
+
+    def get_users_with_active_sessions(self, candidate_users_by_studio: Dict[str, Set[str]], stopped_session_ids: Dict[Tuple[str, str], List[str]] = None) -> Dict[str, Set[str]]:
+        """
+        Returns the candidate users with an active session by studio. When stopped_session_ids is given, it is filled with
+        the STOPPED sessions of the other candidate users, keyed by studio and user
+        """
+        active_users_by_studio = dict()
+        for studio_id, candidate_users in candidate_users_by_studio.items():
+            active_users_by_studio[studio_id] = set()
+            for user_id in candidate_users:
+                sessions = self.get_sessions(studio_id, user_id)
+                if has_active_session(sessions):
+                    active_users_by_studio[studio_id].add(user_id)
+                elif stopped_session_ids is not None and len(get_stopped_session_ids(sessions)) > 0:
+                    stopped_session_ids[(studio_id, user_id)] = get_stopped_session_ids(sessions)
+        return active_users_by_studio
+
+"""
+    Session state kept in memory, used to replay events locally without AWS
+"""
+class InMemorySessionStateStore(SessionStateStore):
+
+    def __init__(self):
+        self.items : Dict[str, Dict[str, Dict[str, Dict]]] = dict()
+
+    def get_owners(self, studio_id: str) -> List[str]:
+        return list(self.items.get(studio_id, dict()).keys())
+
+    def get_sessions(self, studio_id: str, owned_by: str) -> Dict[str, Dict]:
+        return dict(self.items.get(studio_id, dict()).get(owned_by, dict()))
+
+    def update_sessions(self, studio_id: str, owned_by: str, update: Callable[[Dict[str, Dict]], bool]) -> None:
+        sessions = self.get_sessions(studio_id, owned_by)
+        if not update(sessions):
+            return
+        if len(sessions) > 0:
+            self.items.setdefault(studio_id, dict())[owned_by] = sessions
+        else:
+            self.items.get(studio_id, dict()).pop(owned_by, None)
@@ -0,0 +1,88 @@
+import datetime
+from typing import Dict, List
+from session_state.session_state_store import SessionStateStore
+from session_state.state_machine import apply_session_state, prune_removed_sessions, reconcile_sessions
+
+SESSION_STATE_CHANGE_DETAIL_TYPE = "Nimble Studio Streaming Session State Change"
+
+"""
+    Applies streaming session state changes and reconciliation listings to a session state store
+"""
+class SessionStateTracker():
+
+    def __init__(self, store: SessionStateStore, latency_recorder = None, launch_record_tracker = None):
+        self.store = store
+        self.latency_recorder = latency_recorder
+        self.launch_record_tracker = launch_record_tracker
+
+    def complete_launch_record(self, session_id: str, state: str, completed_at: str) -> None:
+        if self.launch_record_tracker is not None:
+            self.launch_record_tracker.complete(session_id, state, completed_at)
+
+    @staticmethod
+    def parse_event_time(timestamp: str) -> datetime.datetime:
+        return datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+    def record_time_to_ready(self, detail: Dict, created_at: str, ready_at: str) -> None:
+        launch_keys = [detail.get('launchProfileId'), detail.get('streamingImageId'), detail.get('ec2InstanceType')]
+        if self.latency_recorder is None or created_at is None or None in launch_keys:
+            return
+        latency_seconds = (SessionStateTracker.parse_event_time(ready_at) - SessionStateTracker.parse_event_time(created_at)).total_seconds()
+        if latency_seconds < 0:
+            return
+        self.latency_recorder.record(*launch_keys, latency_seconds)
+
+    @staticmethod
+    def is_session_state_change_event(event: Dict) -> bool:
+        return event.get('detail-type') == SESSION_STATE_CHANGE_DETAIL_TYPE
+
+    def apply_event(self, event: Dict) -> None:
+        detail = event['detail']
+        studio_id = detail['studioId']
+        owned_by = detail['ownedBy']
+        session_id = detail['sessionId']
+        state = detail['state']
+        updated_at = event['time']
+
+        previous_session = dict()
+
+        def update(sessions):
+            previous_session.clear()
+            previous_session.update(sessions.get(session_id, dict()))
+            changed = apply_session_state(sessions, session_id, state, updated_at)
+            return prune_removed_sessions(sessions, updated_at) or changed
+
+        self.store.update_sessions(studio_id, owned_by, update)
+
+        # Only the first READY after provisioning counts towards time to READY
+        if state == 'READY' and previous_session.get('state') == 'CREATE_IN_PROGRESS' and previous_session['updated_at'] <= updated_at:
+            self.record_time_to_ready(detail, detail.get('createdAt', previous_session.get('created_at')), updated_at)
+        if previous_session.get('state') != state:
+            self.complete_launch_record(session_id, state, updated_at)
+        print(f"Received state {state} as of {updated_at} for session {session_id} of user {owned_by} in studio {studio_id}")
+
+    @staticmethod
+    def reconcile_owner_sessions(sessions: Dict[str, Dict], listed_states: Dict[str, str], listed_at: str, changed_states: Dict[str, str]) -> bool:
+        previous_states = {session_id: session['state'] for session_id, session in sessions.items()}
+        changed = reconcile_sessions(sessions, listed_states, listed_at)
+        for session_id, session in sessions.items():
+            if previous_states.get(session_id) != session['state']:
+                changed_states[session_id] = session['state']
+        return changed
+
+    def reconcile_studio(self, studio_id: str, listed_sessions: List[Dict], listed_at: str) -> None:
+        listed_states_by_owner : Dict[str, Dict[str, str]] = dict()
+        for session in listed_sessions:
+            listed_states_by_owner.setdefault(session['ownedBy'], dict())[session['sessionId']] = session['state']
+
+        # Owners already tracked but missing from the listing no longer have any sessions
+        owners = set(listed_states_by_owner.keys()) | set(self.store.get_owners(studio_id))
+        changed_states : Dict[str, str] = dict()
+        for owned_by in owners:
+            listed_states = listed_states_by_owner.get(owned_by, dict())
+            self.store.update_sessions(studio_id, owned_by, lambda sessions: self.reconcile_owner_sessions(sessions, listed_states, listed_at, changed_states))
+
+        # Complete launch records for sessions whose state change events were missed
+        for session_id, state in changed_states.items():
+            self.complete_launch_record(session_id, state, listed_at)
+        print(f"Reconciled session state for {len(owners)} users in studio {studio_id}")
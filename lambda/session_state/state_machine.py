@@ -0,0 +1,64 @@
+import datetime
+from typing import Dict, List
+
+ACTIVE_SESSION_STATES = {'CREATE_IN_PROGRESS', 'START_IN_PROGRESS', 'READY'}
+
+# State of a session with persistent storage that can be started again
+STOPPED_SESSION_STATE = 'STOPPED'
+
+# States after which the session no longer exists. They are kept for a while as tombstones so late events cannot revive the session
+REMOVED_SESSION_STATES = {'DELETED', 'CREATE_FAILED'}
+TOMBSTONE_RETENTION = datetime.timedelta(days=1)
+
+# States that end the tracking of a launched session
+LAUNCH_COMPLETION_STATES = {'READY', 'CREATE_FAILED', 'START_FAILED', 'DELETED'}
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def format_timestamp(time: datetime.datetime) -> str:
+    return time.strftime(TIMESTAMP_FORMAT)
+
+def parse_timestamp(timestamp: str) -> datetime.datetime:
+    return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+def apply_session_state(sessions: Dict[str, Dict], session_id: str, state: str, updated_at: str) -> bool:
+    """
+    Records the observed state of a session unless a newer observation is already recorded. Returns whether sessions changed
+    """
+    current = sessions.get(session_id)
+    if current is not None and (current['updated_at'] > updated_at or current['state'] == state):
+        return False
+    session = dict(current or dict(), state=state, updated_at=updated_at)
+    # Remember when the session was first seen provisioning, to measure its time to READY
+    if state == 'CREATE_IN_PROGRESS' and 'created_at' not in session:
+        session['created_at'] = updated_at
+    sessions[session_id] = session
+    return True
+
+def prune_removed_sessions(sessions: Dict[str, Dict], now: str) -> bool:
+    cutoff = format_timestamp(parse_timestamp(now) - TOMBSTONE_RETENTION)
+    expired = [x for x, session in sessions.items() if session['state'] in REMOVED_SESSION_STATES and session['updated_at'] < cutoff]
+    for session_id in expired:
+        del sessions[session_id]
+    return len(expired) > 0
+
+def reconcile_sessions(sessions: Dict[str, Dict], listed_states: Dict[str, str], listed_at: str) -> bool:
+    """
+    Applies a full listing of an owner's sessions. Sessions missing from the listing, and not updated since it started, are marked deleted
+    """
+    changed = False
+    for session_id, state in listed_states.items():
+        changed = apply_session_state(sessions, session_id, state, listed_at) or changed
+    for session_id in list(sessions.keys()):
+        if session_id not in listed_states and sessions[session_id]['state'] not in REMOVED_SESSION_STATES:
+            changed = apply_session_state(sessions, session_id, 'DELETED', listed_at) or changed
+    return prune_removed_sessions(sessions, listed_at) or changed
+
+def has_active_session(sessions: Dict[str, Dict]) -> bool:
+    return any(session['state'] in ACTIVE_SESSION_STATES for session in sessions.values())
+
+def is_launch_completion_state(state: str) -> bool:
+    return state in LAUNCH_COMPLETION_STATES
+
+def get_stopped_session_ids(sessions: Dict[str, Dict]) -> List[str]:
+    return [session_id for session_id, session in sessions.items() if session['state'] == STOPPED_SESSION_STATE]
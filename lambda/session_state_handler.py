@@ -0,0 +1,23 @@
+from common.runtime_context import RUNTIME_CONTEXT
+from model.launch_record import LaunchRecord
+from model.session_state import SessionState
+from session_state.dynamo_session_state_store import DynamoSessionStateStore
+from session_state.launch_latency_recorder import LaunchLatencyRecorder
+from session_state.launch_record_tracker import LaunchRecordTracker
+from session_state.session_state_reconciler import SessionStateReconciler
+from session_state.session_state_tracker import SessionStateTracker
+
+def handler(event, context):
+
+    RUNTIME_CONTEXT.start_invocation()
+    RUNTIME_CONTEXT.warm_table_connections([SessionState, LaunchRecord])
+    tracker = SessionStateTracker(DynamoSessionStateStore(), LaunchLatencyRecorder(), LaunchRecordTracker())
+
+    if SessionStateTracker.is_session_state_change_event(event):
+        tracker.apply_event(event)
+        return
+
+    # Any other event, such as the scheduled reconciliation rule, triggers a full reconciliation
+    print("Reconciling session state from streaming session listings")
+    SessionStateReconciler(tracker).reconcile()
+    RUNTIME_CONTEXT.log_stats()
@@ -1,17 +1,43 @@
+import compileall
+import functools
+import hashlib
+import json
+import tempfile
 import subprocess
 import sys
 import os
 import shutil
+import time
 from pathlib import Path
+from typing import List, Tuple
 from aws_cdk.core import ILocalBundling, BundlingOptions
 import jsii
 
+# Bump when the bundle layout changes, so bundles cached by an older bundler are not reused
+BUNDLE_FORMAT_VERSION = "2"
+# Bundles kept in the cache, most recently used first
+BUNDLE_CACHE_ENTRIES = 3
+# Packages the Lambda Python runtime already provides. Only excluded when asked to, as the runtime's boto3 may predate the Nimble Studio API
+RUNTIME_PROVIDED_PACKAGES = ["boto3", "botocore", "s3transfer", "jmespath", "python-dateutil", "six", "urllib3"]
+# Paths in the bundle the lambda never needs at runtime, starting with the console scripts pip installs. Only listed paths are
+# removed, as a package may import a module of its own named like a test or script directory, so a requirement that ships its
+# tests adds them here as "<package>/tests"
+PRUNED_BUNDLE_PATHS = ["bin"]
+PRUNED_DIR_NAMES = {"__pycache__"}
+# Lists every installed file, which the lambda never reads. The rest of the package metadata is kept for importlib.metadata
+PRUNED_DIST_INFO_FILES = ["RECORD"]
+IGNORED_SOURCE_DIR_NAMES = {"__pycache__"}
+IGNORED_SOURCE_SUFFIXES = (".pyc", ".pyo")
+
 def get_parent_dir() -> str:
     return str(Path(os.path.dirname(os.path.realpath(__file__))).parent.absolute())
 
 def get_lambda_code_dir() -> str:
     return os.path.join(get_parent_dir(), "lambda")
 
+def get_bundle_cache_dir() -> str:
+    return os.path.join(get_parent_dir(), ".bundle_cache")
+
 def copytree(src, dst, symlinks=False, ignore=None):
     for item in os.listdir(src):
         s = os.path.join(src, item)
@@ -21,26 +47,163 @@ def copytree(src, dst, symlinks=False, ignore=None):
         else:
             shutil.copy2(s, d)
 
+def list_source_files(src: str) -> List[str]:
+    source_files = list()
+    for dir_path, dir_names, file_names in os.walk(src):
+        dir_names[:] = sorted(x for x in dir_names if x not in IGNORED_SOURCE_DIR_NAMES)
+        source_files += [os.path.relpath(os.path.join(dir_path, x), src) for x in sorted(file_names) if not x.endswith(IGNORED_SOURCE_SUFFIXES)]
+    return source_files
+
+def get_dir_size(path: str) -> Tuple[int, int]:
+    size = files = 0
+    for dir_path, dir_names, file_names in os.walk(path):
+        for file_name in file_names:
+            size += os.path.getsize(os.path.join(dir_path, file_name))
+            files += 1
+    return (size, files)
+
+def normalize_package_name(name: str) -> str:
+    return name.lower().replace("_", "-").replace(".", "-")
+
 @jsii.implements(ILocalBundling)
 class LocalBundler():
-    """This allows packaging lambda functions without the use of Docker"""
+    """This allows packaging lambda functions without the use of Docker.
+    Bundles are cached by the hash of the lambda code and the resolved requirement versions, so unchanged code reuses the previous
+    bundle until a requirement has a new release"""
 
-    def try_bundle(self, output_dir: str, options: BundlingOptions) -> bool:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "--version"])
-        except:
-            return False
+    def __init__(self, runtime_name: str = "python3.7", exclude_runtime_packages: bool = False):
+        self.runtime_name = runtime_name
+        self.exclude_runtime_packages = exclude_runtime_packages
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def resolve_requirements() -> List[str]:
+        """
+        Resolves the requirements, which only set minimum versions, to the exact versions pip would install now. Resolved once
+        per synth, as every lambda is bundled from the same requirements
+        """
+        with tempfile.TemporaryDirectory() as report_dir:
+            report_file = os.path.join(report_dir, "report.json")
+            subprocess.check_call([
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "--dry-run",
+                "--ignore-installed",
+                "--quiet",
+                "--report",
+                report_file,
+                "-r",
+                os.path.join(get_lambda_code_dir(), "requirements.txt")
+            ])
+            with open(report_file) as report:
+                installs = json.load(report)["install"]
+        return sorted(f"{x['metadata']['name']}=={x['metadata']['version']}" for x in installs)
+
+    def get_bundle_hash(self, resolved_requirements: List[str]) -> str:
+        """
+        Hashes the lambda code, the resolved requirements, and every setting that changes what the bundle holds
+        """
+        hash = hashlib.sha256()
+        settings = [BUNDLE_FORMAT_VERSION, self.runtime_name, str(self.exclude_runtime_packages), f"{sys.version_info.major}.{sys.version_info.minor}"]
+        hash.update("\0".join(settings + resolved_requirements).encode("utf-8"))
+        for source_file in list_source_files(get_lambda_code_dir()):
+            hash.update(source_file.encode("utf-8") + b"\0")
+            with open(os.path.join(get_lambda_code_dir(), source_file), "rb") as source:
+                hash.update(source.read())
+        return hash.hexdigest()
+
+    def is_runtime_python(self) -> bool:
+        # Bytecode is only loaded by the Python version that compiled it
+        return self.runtime_name == f"python{sys.version_info.major}.{sys.version_info.minor}"
+
+    @staticmethod
+    def remove_installed_package(bundle_dir: str, dist_info_dir: str) -> None:
+        with open(os.path.join(dist_info_dir, "RECORD")) as record:
+            for line in record:
+                path = os.path.normpath(os.path.join(bundle_dir, line.rsplit(",", 2)[0]))
+                if path.startswith(bundle_dir + os.sep) and os.path.isfile(path):
+                    os.remove(path)
+        # Remove the package directories the record left empty
+        for dir_path, dir_names, file_names in os.walk(bundle_dir, topdown=False):
+            if dir_path != bundle_dir and len(os.listdir(dir_path)) == 0:
+                os.rmdir(dir_path)
 
-        copytree(get_lambda_code_dir(), output_dir)
+    def prune(self, bundle_dir: str) -> None:
+        dist_info_dirs = [os.path.join(bundle_dir, x) for x in os.listdir(bundle_dir) if x.endswith(".dist-info")]
+        if self.exclude_runtime_packages:
+            runtime_packages = {normalize_package_name(x) for x in RUNTIME_PROVIDED_PACKAGES}
+            for dist_info_dir in dist_info_dirs:
+                if normalize_package_name(os.path.basename(dist_info_dir).split("-")[0]) in runtime_packages:
+                    LocalBundler.remove_installed_package(bundle_dir, dist_info_dir)
+        for dist_info_dir in [x for x in dist_info_dirs if os.path.isdir(x)]:
+            for file_name in PRUNED_DIST_INFO_FILES:
+                if os.path.isfile(os.path.join(dist_info_dir, file_name)):
+                    os.remove(os.path.join(dist_info_dir, file_name))
+        for pruned_path in [os.path.join(bundle_dir, x) for x in PRUNED_BUNDLE_PATHS]:
+            shutil.rmtree(pruned_path, ignore_errors=True)
+        for dir_path, dir_names, file_names in os.walk(bundle_dir):
+            for dir_name in [x for x in dir_names if x in PRUNED_DIR_NAMES]:
+                shutil.rmtree(os.path.join(dir_path, dir_name))
+                dir_names.remove(dir_name)
+
+    def build(self, bundle_dir: str, resolved_requirements: List[str]) -> None:
+        copytree(get_lambda_code_dir(), bundle_dir, ignore=shutil.ignore_patterns(*IGNORED_SOURCE_DIR_NAMES))
+        for source_file in [x for x in os.listdir(bundle_dir) if x.endswith(IGNORED_SOURCE_SUFFIXES)]:
+            os.remove(os.path.join(bundle_dir, source_file))
 
         subprocess.check_call([
-            sys.executable, 
-            "-m", 
+            sys.executable,
+            "-m",
             "pip",
             "install",
-            "-r", 
-            os.path.join(get_lambda_code_dir(), "requirements.txt"),
+            # The versions the bundle is cached under are installed, even if a release came out since they were resolved
+            *resolved_requirements,
+            "--no-deps",
             "-t",
-            output_dir
+            bundle_dir,
+            "--no-compile"
         ])
-        return True
\ No newline at end of file
+        self.prune(bundle_dir)
+
+        # The lambda cannot write bytecode to its read-only code directory, so it would compile every module on each cold start
+        if self.is_runtime_python():
+            compileall.compile_dir(bundle_dir, quiet=1)
+        else:
+            print(f"Skipping bytecode precompilation: bundling with Python {sys.version_info.major}.{sys.version_info.minor} for the {self.runtime_name} runtime")
+
+    @staticmethod
+    def prune_cache(cache_dir: str) -> None:
+        bundles = sorted((os.path.join(cache_dir, x) for x in os.listdir(cache_dir) if not x.endswith(".tmp")), key=os.path.getmtime, reverse=True)
+        for bundle in bundles[BUNDLE_CACHE_ENTRIES:]:
+            shutil.rmtree(bundle, ignore_errors=True)
+
+    def try_bundle(self, output_dir: str, options: BundlingOptions) -> bool:
+        started_at = time.time()
+        try:
+            resolved_requirements = LocalBundler.resolve_requirements()
+        except:
+            # Without pip, or without a pip that can report what it would install, the lambda is bundled in Docker instead
+            return False
+        cache_dir = get_bundle_cache_dir()
+        bundle_dir = os.path.join(cache_dir, self.get_bundle_hash(resolved_requirements))
+        cached = os.path.isdir(bundle_dir)
+
+        if not cached:
+            # Build next to the cache entry and rename it into place, so an interrupted build is never reused
+            build_dir = f"{bundle_dir}.{os.getpid()}.tmp"
+            shutil.rmtree(build_dir, ignore_errors=True)
+            os.makedirs(build_dir)
+            self.build(build_dir, resolved_requirements)
+            os.rename(build_dir, bundle_dir)
+        else:
+            # Marks the bundle as recently used, so it is kept when the cache is pruned
+            os.utime(bundle_dir)
+
+        copytree(bundle_dir, output_dir)
+        LocalBundler.prune_cache(cache_dir)
+
+        size, files = get_dir_size(output_dir)
+        print(f"Bundled lambda code in {time.time() - started_at:.1f}s from {'cache' if cached else 'a new build'}: {size / (1024 * 1024):.1f} MB in {files} files")
+        return True
@@ -1,31 +1,220 @@
+import json
+import os
 from aws_cdk import core as cdk
 from aws_cdk import aws_events_targets as targets
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_lambda_event_sources as event_sources
 from aws_cdk import aws_events as events
+from aws_cdk import aws_sqs as sqs
 from aws_cdk import aws_dynamodb as dynamo
-from local_bundler import LocalBundler, get_lambda_code_dir
+from local_bundler import LocalBundler, get_lambda_code_dir, get_parent_dir
 
-TABLE_NAME = "nimble_studio_auto_workstation_scheduler_config"
+# Config table keyed on user_id, with a start_time#launch_profile#uuid sort key
+TABLE_NAME = "nimble_studio_auto_workstation_scheduler_user_config"
+# Original config table keyed on uuid, read alongside the user keyed table until its configs are migrated
+LEGACY_TABLE_NAME = "nimble_studio_auto_workstation_scheduler_config"
+# Set config_table_cutover_complete in cdk.json once migrate_config_table.py has verified the migration, to stop reading the legacy table
+CONFIG_TABLE_CUTOVER_COMPLETE_CONTEXT_KEY = "config_table_cutover_complete"
+STATE_TABLE_NAME = "nimble_studio_auto_workstation_scheduler_state"
+SESSION_STATE_TABLE_NAME = "nimble_studio_auto_workstation_scheduler_session_state"
+LAUNCH_RECORD_TABLE_NAME = "nimble_studio_auto_workstation_scheduler_launch_record"
 RULE_NAME = "NimbleStudioAutoWorkstationSchedulerRule"
+SESSION_STATE_RULE_NAME = "NimbleStudioAutoWorkstationSchedulerSessionStateRule"
+SESSION_STATE_RECONCILIATION_RULE_NAME = "NimbleStudioAutoWorkstationSchedulerSessionStateReconciliationRule"
+SESSION_STATE_CHANGE_DETAIL_TYPE = "Nimble Studio Streaming Session State Change"
+START_TIME_INDEX_NAME = "start_time_index"
+# Minutes between scheduler ticks and between valid start times, overridden by the slot_minutes context value in cdk.json
+SLOT_MINUTES_CONTEXT_KEY = "slot_minutes"
+DEFAULT_SLOT_MINUTES = 15
+# Each must divide an hour evenly, so every hour has the same start times
+SUPPORTED_SLOT_MINUTES = [5, 10, 15]
+# Seconds after each tick that its launches are spread over, overridden by the launch_spread_seconds context value in cdk.json
+LAUNCH_SPREAD_SECONDS_CONTEXT_KEY = "launch_spread_seconds"
+DEFAULT_LAUNCH_SPREAD_SECONDS = 0
+# Queued launches are delayed with SQS message timers, which allow at most 15 minutes
+MAX_LAUNCH_SPREAD_SECONDS = 900
+SCHEDULER_TIMEOUT_SECONDS = 600
+# Launches from the scheduler lambda itself wait for each launch to be due inside the lambda, so half its timeout is left
+# for reading the configs and for the create calls of the last launches
+MAX_INLINE_LAUNCH_SPREAD_SECONDS = SCHEDULER_TIMEOUT_SECONDS // 2
+# Launches are sent to the launch worker when true in cdk.json, and made by the scheduler lambda itself when false
+LAUNCH_QUEUE_CONTEXT_KEY = "launch_queue"
+# Number of launcher shards invoked on each tick, overridden by the launcher_shards context value in cdk.json
+DEFAULT_LAUNCHER_SHARDS = 1
+# EventBridge allows at most 5 targets per rule
+MAX_TARGETS_PER_RULE = 5
+LAUNCH_QUEUE_NAME = "NimbleStudioAutoWorkstationSchedulerLaunchQueue"
+LAUNCH_DEAD_LETTER_QUEUE_NAME = "NimbleStudioAutoWorkstationSchedulerLaunchDeadLetterQueue"
+LAUNCH_WORKER_TIMEOUT_SECONDS = 60
+# Launches of a message are attempted this many times before it is moved to the dead-letter queue. Receives the event source
+# makes while the worker is at its reserved concurrency also count, so this allows more than the failed launches alone need
+LAUNCH_MAX_RECEIVE_COUNT = 5
+# Leaves the packages the Lambda runtime provides out of the bundle when true in cdk.json
+EXCLUDE_RUNTIME_PACKAGES_CONTEXT_KEY = "exclude_runtime_packages"
+# Bounds the total create call rate, since each worker rate limits studios on its own
+LAUNCH_WORKER_CONCURRENCY = 5
+# Session state is reconciled from full session listings at most this often, ahead of a scheduler tick by at most this many minutes
+MIN_RECONCILIATION_INTERVAL_MINUTES = 15
+RECONCILIATION_LEAD_MINUTES = 5
+# The lambdas describe the tables they use on a cold start, to connect to DynamoDB before the first read
+DESCRIBE_TABLE_ACTION = "dynamodb:DescribeTable"
+
+def validate_slot_minutes(slot_minutes) -> int:
+    slot_minutes = int(slot_minutes)
+    if slot_minutes not in SUPPORTED_SLOT_MINUTES:
+        raise ValueError(f"{SLOT_MINUTES_CONTEXT_KEY} must be one of {SUPPORTED_SLOT_MINUTES}, not {slot_minutes}")
+    return slot_minutes
+
+def validate_launch_spread_seconds(launch_spread_seconds, slot_minutes: int, launch_queue: bool = True) -> int:
+    launch_spread_seconds = int(launch_spread_seconds)
+    # Launches of a tick must be sent before the next tick starts its own
+    max_launch_spread_seconds = min(slot_minutes * 60, MAX_LAUNCH_SPREAD_SECONDS if launch_queue else MAX_INLINE_LAUNCH_SPREAD_SECONDS)
+    if launch_spread_seconds < 0 or launch_spread_seconds > max_launch_spread_seconds:
+        raise ValueError(f"{LAUNCH_SPREAD_SECONDS_CONTEXT_KEY} must be between 0 and {max_launch_spread_seconds}, not {launch_spread_seconds}")
+    return launch_spread_seconds
+
+def get_reconciliation_cron_minute(slot_minutes: int) -> str:
+    """
+    Returns the minute field of the reconciliation cron, a whole number of slots apart so each run lands ahead of a scheduler tick and never on one
+    """
+    interval_minutes = next(x for x in range(slot_minutes, 61, slot_minutes) if x >= MIN_RECONCILIATION_INTERVAL_MINUTES and 60 % x == 0)
+    first_minute = interval_minutes - min(RECONCILIATION_LEAD_MINUTES, slot_minutes // 2)
+    if any(minute % slot_minutes == 0 for minute in range(first_minute, 60, interval_minutes)):
+        raise ValueError(f"Session state reconciliation at minute {first_minute}/{interval_minutes} would run on a scheduler tick of {slot_minutes} minute slots")
+    return f"{first_minute}/{interval_minutes}"
+
+def get_cdk_context() -> dict:
+    """
+    Reads the context of cdk.json, for the helper scripts which run outside of the CDK app
+    """
+    with open(os.path.join(get_parent_dir(), "cdk.json")) as cdk_json:
+        return json.load(cdk_json).get("context", dict())
+
+def get_configured_slot_minutes() -> int:
+    return validate_slot_minutes(get_cdk_context().get(SLOT_MINUTES_CONTEXT_KEY, DEFAULT_SLOT_MINUTES))
+
+def is_config_table_cutover_complete() -> bool:
+    return get_cdk_context().get(CONFIG_TABLE_CUTOVER_COMPLETE_CONTEXT_KEY) == True
+
+def get_launcher_rule_name(rule_index: int) -> str:
+    # The first rule keeps its original name, so existing deployments and scripts find it
+    if rule_index == 0:
+        return RULE_NAME
+    return f"{RULE_NAME}{rule_index + 1}"
 
 class NimbleStudioAutoWorkstationSchedulerStack(cdk.Stack):
 
     def __init__(self, scope: cdk.Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        # Dynamo table to store Nimble Studio user configuration for automated workstation launch
+        # Original Dynamo table of Nimble Studio user configuration, keyed on uuid. Kept, under its original construct id, until its configs are migrated
+        legacy_config_table = dynamo.Table(
+            self, LEGACY_TABLE_NAME,
+            partition_key=dynamo.Attribute(
+                name="uuid",
+                type=dynamo.AttributeType.STRING
+            ),
+            billing_mode=dynamo.BillingMode.PAY_PER_REQUEST,
+            table_name=LEGACY_TABLE_NAME,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            stream=dynamo.StreamViewType.NEW_AND_OLD_IMAGES
+        )
+
+        legacy_config_table.add_global_secondary_index(
+            index_name=START_TIME_INDEX_NAME,
+            partition_key=dynamo.Attribute(
+                name="start_time",
+                type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(
+                name="uuid",
+                type=dynamo.AttributeType.STRING
+            ),
+            projection_type=dynamo.ProjectionType.ALL
+        )
+
+        # Dynamo table to store Nimble Studio user configuration for automated workstation launch, keyed by user so the scripts
+        # query the configs of a user rather than scanning the table
         config_table = dynamo.Table(
             self, TABLE_NAME,
             partition_key=dynamo.Attribute(
-                name="uuid",
+                name="user_id",
+                type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(
+                name="config_key",
                 type=dynamo.AttributeType.STRING
             ),
             billing_mode=dynamo.BillingMode.PAY_PER_REQUEST,
             table_name=TABLE_NAME,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            stream=dynamo.StreamViewType.NEW_AND_OLD_IMAGES
+        )
+
+        # Index keyed on the launch slot so each scheduled tick queries only the configs for that slot
+        config_table.add_global_secondary_index(
+            index_name=START_TIME_INDEX_NAME,
+            partition_key=dynamo.Attribute(
+                name="start_time",
+                type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(
+                name="uuid",
+                type=dynamo.AttributeType.STRING
+            ),
+            projection_type=dynamo.ProjectionType.ALL
+        )
+
+        # Dynamo table to store scheduler state, such as the compiled weekly launch schedule
+        state_table = dynamo.Table(
+            self, STATE_TABLE_NAME,
+            partition_key=dynamo.Attribute(
+                name="state_key",
+                type=dynamo.AttributeType.STRING
+            ),
+            billing_mode=dynamo.BillingMode.PAY_PER_REQUEST,
+            table_name=STATE_TABLE_NAME,
+            removal_policy=cdk.RemovalPolicy.DESTROY
+        )
+
+        # Dynamo table to store the last known state of each user's streaming sessions in a studio
+        session_state_table = dynamo.Table(
+            self, SESSION_STATE_TABLE_NAME,
+            partition_key=dynamo.Attribute(
+                name="studio_id",
+                type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(
+                name="owned_by",
+                type=dynamo.AttributeType.STRING
+            ),
+            billing_mode=dynamo.BillingMode.PAY_PER_REQUEST,
+            table_name=SESSION_STATE_TABLE_NAME,
             removal_policy=cdk.RemovalPolicy.DESTROY
         )
 
+        # Dynamo table to store the tick, create and READY times of each session launched by the scheduler
+        launch_record_table = dynamo.Table(
+            self, LAUNCH_RECORD_TABLE_NAME,
+            partition_key=dynamo.Attribute(
+                name="session_id",
+                type=dynamo.AttributeType.STRING
+            ),
+            billing_mode=dynamo.BillingMode.PAY_PER_REQUEST,
+            table_name=LAUNCH_RECORD_TABLE_NAME,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            time_to_live_attribute="expires_at"
+        )
+
+        lambda_code = lambda_.Code.from_asset(get_lambda_code_dir(),
+            bundling=cdk.BundlingOptions(
+                image=lambda_.Runtime.PYTHON_3_7.bundling_image,
+                command=["bash", "-c", "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output"],
+                local=LocalBundler(lambda_.Runtime.PYTHON_3_7.name, self.node.try_get_context(EXCLUDE_RUNTIME_PACKAGES_CONTEXT_KEY) == True)
+            )
+        )
+
         lambdaRole = iam.Role(
             self,
             "WorkstationSchedulerFunctionRole",
@@ -40,24 +229,74 @@ class NimbleStudioAutoWorkstationSchedulerStack(cdk.Stack):
         lambdaFn = lambda_.Function(
             self,
             "WorkstationSchedulerFunction",
-            code=lambda_.Code.from_asset(get_lambda_code_dir(),
-                bundling=cdk.BundlingOptions(
-                    image=lambda_.Runtime.PYTHON_3_7.bundling_image,
-                    command=["bash", "-c", "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output"],
-                    local=LocalBundler()
-                )
-            ),
+            code=lambda_code,
             handler="lambda_handler.handler",
-            timeout=cdk.Duration.seconds(600),
+            timeout=cdk.Duration.seconds(SCHEDULER_TIMEOUT_SECONDS),
             runtime=lambda_.Runtime.PYTHON_3_7,
             role=lambdaRole,
             function_name="NimbleAutoScheduler"
         )
 
         lambdaFn.add_environment("TABLE_NAME", config_table.table_name)
+        # Configs not yet migrated are read from the legacy table until the cutover is complete
+        cutover_complete = self.node.try_get_context(CONFIG_TABLE_CUTOVER_COMPLETE_CONTEXT_KEY) == True
+        if not cutover_complete:
+            lambdaFn.add_environment("LEGACY_TABLE_NAME", legacy_config_table.table_name)
+            legacy_config_table.grant_read_data(lambdaFn)
+        lambdaFn.add_environment("START_TIME_INDEX_NAME", START_TIME_INDEX_NAME)
+        lambdaFn.add_environment("STATE_TABLE_NAME", state_table.table_name)
+        lambdaFn.add_environment("SESSION_STATE_TABLE_NAME", session_state_table.table_name)
+        lambdaFn.add_environment("ACTIVE_SESSION_SOURCE", "state_table")
+        lambdaFn.add_environment("LAUNCH_STRATEGY", "resume_stopped")
+        lambdaFn.add_environment("CONFIG_DATA_LAYER", "client")
+        slot_minutes = validate_slot_minutes(self.node.try_get_context(SLOT_MINUTES_CONTEXT_KEY) or DEFAULT_SLOT_MINUTES)
+        lambdaFn.add_environment("SLOT_MINUTES", str(slot_minutes))
+        launch_queue_enabled = self.node.try_get_context(LAUNCH_QUEUE_CONTEXT_KEY) != False
+        launch_spread_seconds = validate_launch_spread_seconds(self.node.try_get_context(LAUNCH_SPREAD_SECONDS_CONTEXT_KEY) or DEFAULT_LAUNCH_SPREAD_SECONDS, slot_minutes, launch_queue_enabled)
+        lambdaFn.add_environment("LAUNCH_SPREAD_SECONDS", str(launch_spread_seconds))
+        lambdaFn.add_environment("LAUNCH_RECORD_TABLE_NAME", launch_record_table.table_name)
 
-        # Grant lambda permission to read from table
+        # Grant lambda permission to read from table and its indexes, and to save its checkpoint to the state table
         config_table.grant_read_data(lambdaFn)
+        state_table.grant_read_write_data(lambdaFn)
+        session_state_table.grant_read_data(lambdaFn)
+        launch_record_table.grant_read_write_data(lambdaFn)
+        for table in [state_table, session_state_table, launch_record_table]:
+            table.grant(lambdaFn, DESCRIBE_TABLE_ACTION)
+
+        # Lambda to recompile the weekly launch schedule whenever the config table changes
+        compilerFn = lambda_.Function(
+            self,
+            "ScheduleCompilerFunction",
+            code=lambda_code,
+            handler="schedule_compiler_handler.handler",
+            timeout=cdk.Duration.seconds(300),
+            runtime=lambda_.Runtime.PYTHON_3_7,
+            function_name="NimbleAutoSchedulerScheduleCompiler"
+        )
+
+        compilerFn.add_environment("TABLE_NAME", config_table.table_name)
+        compilerFn.add_environment("STATE_TABLE_NAME", state_table.table_name)
+
+        config_table.grant_read_data(compilerFn)
+        state_table.grant_read_write_data(compilerFn)
+
+        # A single concurrent batch per shard keeps versioned schedule saves from contending
+        compiler_tables = [config_table]
+        if not cutover_complete:
+            compilerFn.add_environment("LEGACY_TABLE_NAME", legacy_config_table.table_name)
+            legacy_config_table.grant_read_data(compilerFn)
+            # Removing a config that was never migrated from the legacy table still removes it from the schedule
+            compiler_tables.append(legacy_config_table)
+        for compiler_table in compiler_tables:
+            compilerFn.add_event_source(event_sources.DynamoEventSource(
+                compiler_table,
+                starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+                batch_size=100,
+                max_batching_window=cdk.Duration.seconds(5),
+                bisect_batch_on_error=True,
+                retry_attempts=10
+            ))
 
         # Grant lambda permission to Nimble
         # https://docs.aws.amazon.com/service-authorization/latest/reference/list_amazonnimblestudio.html#amazonnimblestudio-actions-as-permissions
@@ -67,8 +306,13 @@ class NimbleStudioAutoWorkstationSchedulerStack(cdk.Stack):
                 "nimble:GetLaunchProfile",
                 "nimble:GetLaunchProfileInitialization",
                 "nimble:CreateStreamingSession",
+                "nimble:GetStreamingSession",
                 "nimble:ListStreamingSessions",
-                "nimble:TagResource"
+                "nimble:StartStreamingSession",
+                "nimble:StopStreamingSession",
+                "nimble:DeleteStreamingSession",
+                "nimble:TagResource",
+                "nimble:UntagResource"
             ],
             effect=iam.Effect.ALLOW
         )
@@ -93,14 +337,137 @@ class NimbleStudioAutoWorkstationSchedulerStack(cdk.Stack):
 
         lambdaFn.add_to_role_policy(nimble_additional_service_permissions_policy_statement)
 
-        # Run on weekdays every 15 minutes
+        # Queue of launches found by the scheduler lambda, processed by the launch worker lambda.
+        # Failed launches are received again after the visibility timeout, then kept in the dead-letter queue
+        launch_dead_letter_queue = sqs.Queue(
+            self, LAUNCH_DEAD_LETTER_QUEUE_NAME,
+            queue_name=LAUNCH_DEAD_LETTER_QUEUE_NAME,
+            retention_period=cdk.Duration.days(14)
+        )
+
+        launch_queue = sqs.Queue(
+            self, LAUNCH_QUEUE_NAME,
+            queue_name=LAUNCH_QUEUE_NAME,
+            # Six times the worker timeout, as recommended for queues that are Lambda event sources
+            visibility_timeout=cdk.Duration.seconds(LAUNCH_WORKER_TIMEOUT_SECONDS * 6),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=LAUNCH_MAX_RECEIVE_COUNT,
+                queue=launch_dead_letter_queue
+            )
+        )
+
+        # The queue and worker are kept when launching from the scheduler lambda, so launches still queued are not lost
+        if launch_queue_enabled:
+            lambdaFn.add_environment("LAUNCH_QUEUE_URL", launch_queue.queue_url)
+            launch_queue.grant_send_messages(lambdaFn)
+
+        launchWorkerFn = lambda_.Function(
+            self,
+            "LaunchWorkerFunction",
+            code=lambda_code,
+            handler="launch_worker_handler.handler",
+            timeout=cdk.Duration.seconds(LAUNCH_WORKER_TIMEOUT_SECONDS),
+            runtime=lambda_.Runtime.PYTHON_3_7,
+            reserved_concurrent_executions=LAUNCH_WORKER_CONCURRENCY,
+            function_name="NimbleAutoSchedulerLaunchWorker"
+        )
+
+        launchWorkerFn.add_environment("LAUNCH_RECORD_TABLE_NAME", launch_record_table.table_name)
+        launch_record_table.grant_read_write_data(launchWorkerFn)
+        launch_record_table.grant(launchWorkerFn, DESCRIBE_TABLE_ACTION)
+        launchWorkerFn.add_to_role_policy(nimble_policy_statement)
+        launchWorkerFn.add_to_role_policy(nimble_additional_service_permissions_policy_statement)
+
+        # Failed launches are reported per message, so the rest of the batch is not retried
+        launch_queue.grant_consume_messages(launchWorkerFn)
+        lambda_.EventSourceMapping(
+            self,
+            "LaunchQueueEventSource",
+            target=launchWorkerFn,
+            event_source_arn=launch_queue.queue_arn,
+            batch_size=10,
+            report_batch_item_failures=True
+        )
+
+        # Each shard launches the configs of its own slice of users, from the same tick
+        launcher_shards = int(self.node.try_get_context("launcher_shards") or DEFAULT_LAUNCHER_SHARDS)
+
+        # Run on weekdays at the start of every slot
         # See https://docs.aws.amazon.com/lambda/latest/dg/tutorial-scheduled-events-schedule-expressions.html
-        rule = events.Rule(
+        for rule_index in range(0, (launcher_shards + MAX_TARGETS_PER_RULE - 1) // MAX_TARGETS_PER_RULE):
+            rule = events.Rule(
+                self,
+                "Rule" if rule_index == 0 else f"Rule{rule_index + 1}",
+                schedule=events.Schedule.cron(minute=f"0/{slot_minutes}", hour="*", month="*", week_day="MON-FRI", year="*"),
+                description="Scheduled event to trigger the Automated Workstation Scheduler lambda",
+                rule_name=get_launcher_rule_name(rule_index)
+            )
+
+            first_shard = rule_index * MAX_TARGETS_PER_RULE
+            for shard_index in range(first_shard, min(first_shard + MAX_TARGETS_PER_RULE, launcher_shards)):
+                rule.add_target(targets.LambdaFunction(lambdaFn, event=events.RuleTargetInput.from_object({
+                    "id": events.EventField.from_path("$.id"),
+                    "time": events.EventField.time,
+                    "shard_index": shard_index,
+                    "shard_count": launcher_shards
+                })))
+
+
+        # Lambda to keep the session state table current from streaming session state change events
+        sessionStateFn = lambda_.Function(
+            self,
+            "SessionStateFunction",
+            code=lambda_code,
+            handler="session_state_handler.handler",
+            timeout=cdk.Duration.seconds(300),
+            runtime=lambda_.Runtime.PYTHON_3_7,
+            function_name="NimbleAutoSchedulerSessionState"
+        )
+
+        sessionStateFn.add_environment("TABLE_NAME", config_table.table_name)
+        if not cutover_complete:
+            sessionStateFn.add_environment("LEGACY_TABLE_NAME", legacy_config_table.table_name)
+            legacy_config_table.grant_read_data(sessionStateFn)
+        sessionStateFn.add_environment("STATE_TABLE_NAME", state_table.table_name)
+        sessionStateFn.add_environment("SESSION_STATE_TABLE_NAME", session_state_table.table_name)
+        sessionStateFn.add_environment("LAUNCH_RECORD_TABLE_NAME", launch_record_table.table_name)
+
+        config_table.grant_read_data(sessionStateFn)
+        # Observed time to READY is recorded in the state table for lead-time launches
+        state_table.grant_read_write_data(sessionStateFn)
+        session_state_table.grant_read_write_data(sessionStateFn)
+        launch_record_table.grant_read_write_data(sessionStateFn)
+        for table in [session_state_table, launch_record_table]:
+            table.grant(sessionStateFn, DESCRIBE_TABLE_ACTION)
+
+        sessionStateFn.add_to_role_policy(iam.PolicyStatement(
+            resources=["*"],
+            actions=[
+                "nimble:ListStreamingSessions"
+            ],
+            effect=iam.Effect.ALLOW
+        ))
+
+        session_state_rule = events.Rule(
+            self,
+            "SessionStateRule",
+            event_pattern=events.EventPattern(
+                source=["aws.nimble"],
+                detail_type=[SESSION_STATE_CHANGE_DETAIL_TYPE]
+            ),
+            description="Streaming session state changes to keep the Automated Workstation Scheduler session state current",
+            rule_name=SESSION_STATE_RULE_NAME
+        )
+
+        session_state_rule.add_target(targets.LambdaFunction(sessionStateFn))
+
+        # Reconcile session state from full session listings, ahead of each scheduler run
+        session_state_reconciliation_rule = events.Rule(
             self,
-            "Rule",
-            schedule=events.Schedule.cron(minute="0/15", hour="*", month="*", week_day="MON-FRI", year="*"),
-            description="Scheduled event to trigger the Automated Workstation Scheduler lambda",
-            rule_name=RULE_NAME
+            "SessionStateReconciliationRule",
+            schedule=events.Schedule.cron(minute=get_reconciliation_cron_minute(slot_minutes), hour="*", month="*", week_day="*", year="*"),
+            description="Scheduled event to reconcile the Automated Workstation Scheduler session state",
+            rule_name=SESSION_STATE_RECONCILIATION_RULE_NAME
         )
 
-        rule.add_target(targets.LambdaFunction(lambdaFn))
+        session_state_reconciliation_rule.add_target(targets.LambdaFunction(sessionStateFn))
\ No newline at end of file
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 from argparse import ArgumentParser
 from get_auto_launch_config import ConfigurationRetriever
-from model.auto_launch_config import AutoLaunchConfig
 from typing import Dict, List
 from utils.prompter import Prompter
 
@@ -12,6 +11,7 @@ class ConfigurationDeleter():
         config_retriever : ConfigurationRetriever):
         self.config_retriever = config_retriever
         self.configs_to_delete_map = dict()
+        self.configs_by_uuid = dict()
 
     def prompt_for_configuration_ids(self, response : str, retrieved_configs_to_delete_map : Dict) -> str:
         while True:
@@ -53,8 +53,7 @@ class ConfigurationDeleter():
         failed_to_delete_configs = list()
         for key, value in self.configs_to_delete_map.items():
             try:
-                item = AutoLaunchConfig(uuid=key)
-                item.delete()
+                self.config_retriever.config_table.delete(self.configs_by_uuid[key])
                 print(f"Deleted config - {value}")
             except Exception as e:
                 print(e)
@@ -67,6 +66,8 @@ class ConfigurationDeleter():
 
     def delete_configs(self):
         configs_to_delete = self.config_retriever.get_config()
+        # Configs are deleted by the key of the table they were read from
+        self.configs_by_uuid = {str(x.uuid): x for x in configs_to_delete}
         retrieved_configs_to_delete_map = self.config_retriever.get_formatted_configs_map(configs=configs_to_delete)
         if self.confirm_delete(retrieved_configs_to_delete_map=retrieved_configs_to_delete_map):
             self.execute_config_deletion()
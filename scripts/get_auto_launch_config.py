@@ -2,11 +2,15 @@
 from argparse import ArgumentParser
 from botocore.exceptions import ClientError
 from identity.identity_helper import IdentityHelper
-from model.auto_launch_config import AutoLaunchConfig
+from model.auto_launch_config import AutoLaunchConfig, CONFIG_ATTRIBUTES
 from typing import Dict, List
+from utils.config_table import ConfigTable
 from utils.prompter import Prompter
 from utils.client_utils import get_nimble_client
 
+# Config attributes shown in the listing, with the key of the user keyed table so listed configs can be deleted
+LISTED_CONFIG_ATTRIBUTES = CONFIG_ATTRIBUTES + ['config_key']
+
 class ConfigurationRetriever():
 
     def __init__(
@@ -30,6 +34,7 @@ class ConfigurationRetriever():
         self.studio_ids = None
         self.streaming_images = dict()
         self.users = dict()
+        self.config_table = ConfigTable()
 
     def get_studio_details(self, studio_id : str):
         if self.studios.get(studio_id) != None:
@@ -120,7 +125,8 @@ class ConfigurationRetriever():
         studio_output = self.format_studio_output(studio_id=config.studio_id)
         launch_profile_output = self.format_launch_profile_output(studio_id=config.studio_id, launch_profile_id=config.launch_profile)
         streaming_image_output = self.format_streaming_image_output(studio_id=config.studio_id, streaming_image_id=config.streaming_image_id)
-        return f"User: {user_output}, Start time: {config.start_time} UTC, Days: {config.dates_applied.days}, Studio: {studio_output}, Launch Profile: {launch_profile_output}, Streaming Image: {streaming_image_output}, Instance: {config.instance_type}, Enabled: {config.enabled}"
+        end_output = f", End time: {config.end_time} UTC ({config.end_action})" if config.end_time != None else ""
+        return f"User: {user_output}, Start time: {config.start_time} UTC{end_output}, Days: {config.dates_applied.days}, Studio: {studio_output}, Launch Profile: {launch_profile_output}, Streaming Image: {streaming_image_output}, Instance: {config.instance_type}, Enabled: {config.enabled}"
 
     def get_formatted_configs_map(self, configs : List[AutoLaunchConfig]) -> Dict:
         formatted_configs = dict()
@@ -186,28 +192,27 @@ class ConfigurationRetriever():
             self.user_name = None
 
     def get_config(self) -> List[AutoLaunchConfig]:
-        # scan_condition makes use of pynamodb's condition expressions
+        # filter_condition makes use of pynamodb's condition expressions
         # https://pynamodb.readthedocs.io/en/latest/conditional.html#condition-expressions
-        scan_condition = None
+        user_id = None
         if self.retrieve_all_users != True:
             if self.sso_id == None:
                 self.sso_id = self.get_user_id_from_user_name()
-                if self.sso_id != None:
-                    scan_condition = (AutoLaunchConfig.user_id == self.sso_id)
-            else:
-                scan_condition = (AutoLaunchConfig.user_id == self.sso_id)
+            user_id = self.sso_id
+        filter_condition = None
         if self.filter_enabled:
             if not self.filter_disabled:
-                scan_condition = scan_condition & (AutoLaunchConfig.enabled == True)
+                filter_condition = (AutoLaunchConfig.enabled == True)
         else:
             if self.filter_disabled:
-                scan_condition = scan_condition & (AutoLaunchConfig.enabled == False)
+                filter_condition = (AutoLaunchConfig.enabled == False)
 
-        configs = None
-        if scan_condition != None:
-            configs = list(AutoLaunchConfig.scan(scan_condition))
+        # A user's configs are queried, only listing all users scans the table
+        if user_id != None:
+            configs = list(self.config_table.query_user(user_id, LISTED_CONFIG_ATTRIBUTES, filter_condition=filter_condition))
         else:
-            configs = list(AutoLaunchConfig.scan())
+            configs = list(self.config_table.scan(LISTED_CONFIG_ATTRIBUTES, filter_condition))
+        self.config_table.print_consumed_capacity()
         return configs
 
     def retrieve_config(self) -> None:
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+import datetime
+import math
+from argparse import ArgumentParser
+from model.launch_record import LaunchRecord, LAUNCH_RECORD_STRATEGY_CREATE
+from typing import Dict, List
+from utils.projected_reader import ProjectedReader
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+GROUP_BY_OPTIONS = ["studio", "launch_profile", "instance_type", "slot", "strategy"]
+REPORTED_PERCENTILES = [50, 95, 99]
+# Launch record attributes the report groups and measures by
+REPORTED_RECORD_ATTRIBUTES = ["studio_id", "launch_profile", "instance_type", "target_launch_time", "launch_strategy", "tick_at", "final_state", "completed_at"]
+
+class LaunchLatencyReporter():
+
+    def __init__(self, studio_id : str or None, days : int, group_by : str, slo_minutes : int or None):
+        self.studio_id = studio_id
+        self.days = days
+        self.group_by = group_by
+        self.slo_minutes = slo_minutes
+
+    @staticmethod
+    def parse_timestamp(timestamp : str) -> datetime.datetime:
+        return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def percentile(values : List[float], pct : float) -> float or None:
+        # Nearest-rank percentile, so the reported value is always an observed latency
+        if len(values) == 0:
+            return None
+        ordered = sorted(values)
+        rank = max(1, int(math.ceil(pct / 100.0 * len(ordered))))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def get_group_key(self, record : LaunchRecord) -> str:
+        if self.group_by == "studio":
+            return record.studio_id
+        if self.group_by == "launch_profile":
+            return record.launch_profile
+        if self.group_by == "instance_type":
+            return record.instance_type
+        if self.group_by == "strategy":
+            return record.launch_strategy or LAUNCH_RECORD_STRATEGY_CREATE
+        return record.target_launch_time
+
+    def get_records(self) -> List[LaunchRecord]:
+        since = (datetime.datetime.utcnow() - datetime.timedelta(days=self.days)).strftime(TIMESTAMP_FORMAT)
+        scan_condition = (LaunchRecord.tick_at >= since)
+        if self.studio_id != None:
+            scan_condition = scan_condition & (LaunchRecord.studio_id == self.studio_id)
+        reader = ProjectedReader()
+        records = list(reader.scan(LaunchRecord, REPORTED_RECORD_ATTRIBUTES, scan_condition))
+        reader.print_consumed_capacity()
+        return records
+
+    def get_group_stats(self, records : List[LaunchRecord]) -> Dict:
+        ready_minutes = list()
+        failed = 0
+        pending = 0
+        for record in records:
+            if record.final_state == None:
+                pending += 1
+            elif record.final_state != 'READY':
+                failed += 1
+            else:
+                tick_at = self.parse_timestamp(record.tick_at)
+                completed_at = self.parse_timestamp(record.completed_at)
+                ready_minutes.append((completed_at - tick_at).total_seconds() / 60.0)
+
+        stats = {
+            "launched": len(records),
+            "ready": len(ready_minutes),
+            "failed": failed,
+            "pending": pending
+        }
+        for pct in REPORTED_PERCENTILES:
+            stats[f"p{pct}"] = self.percentile(ready_minutes, pct)
+        if self.slo_minutes != None:
+            stats["within_slo"] = len([minutes for minutes in ready_minutes if minutes <= self.slo_minutes])
+        return stats
+
+    @staticmethod
+    def format_minutes(minutes : float or None) -> str:
+        if minutes == None:
+            return "-"
+        return f"{minutes:.1f}m"
+
+    def format_stats_output(self, group_key : str, stats : Dict) -> str:
+        output = f"{group_key}: launched {stats['launched']}, ready {stats['ready']}, failed {stats['failed']}, pending {stats['pending']}"
+        for pct in REPORTED_PERCENTILES:
+            output += f", p{pct} {self.format_minutes(stats[f'p{pct}'])}"
+        if self.slo_minutes != None and stats['ready'] > 0:
+            output += f", within {self.slo_minutes}m SLO {100.0 * stats['within_slo'] / stats['launched']:.1f}%"
+        return output
+
+    def report(self) -> None:
+        records = self.get_records()
+        if len(records) < 1:
+            print(f"No launch records found in the last {self.days} days")
+            return
+
+        records_by_group : Dict[str, List[LaunchRecord]] = dict()
+        for record in records:
+            records_by_group.setdefault(self.get_group_key(record), list()).append(record)
+
+        print(f"Tick to READY latency of {len(records)} launches in the last {self.days} days by {self.group_by}:")
+        for group_key in sorted(records_by_group.keys(), key=str):
+            print(self.format_stats_output(group_key, self.get_group_stats(records_by_group[group_key])))
+        print(self.format_stats_output("all", self.get_group_stats(records)))
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Helper script to report the time from the scheduled tick until launched Nimble Studio workstations are READY.")
+
+    parser.add_argument("-s", "--studio-id", dest="studio_id", help="Only report launches in this studio", required=False)
+    parser.add_argument("-d", "--days", dest="days", type=int, help="Number of days of launches to report on", default=7)
+    parser.add_argument("-g", "--group-by", dest="group_by", choices=GROUP_BY_OPTIONS, help="Dimension to group launches by", default="studio")
+    parser.add_argument("-l", "--slo-minutes", dest="slo_minutes", type=int, help="Report the share of launches READY within this many minutes of the tick", required=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    reporter = LaunchLatencyReporter(
+        studio_id=script_args.studio_id,
+        days=script_args.days,
+        group_by=script_args.group_by,
+        slo_minutes=script_args.slo_minutes)
+    reporter.report()
+
+
+if __name__ == "__main__":
+    main()
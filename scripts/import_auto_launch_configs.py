@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+import csv
+import json
+import re
+import threading
+import time
+from argparse import ArgumentParser
+from botocore.exceptions import ClientError
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Set, Tuple
+from pynamodb.connection import Connection
+from pynamodb.exceptions import TransactWriteError
+from pynamodb.transactions import TransactWrite
+from identity.identity_helper import IdentityHelper
+from model.auto_launch_config import AutoLaunchConfig, LegacyAutoLaunchConfig, END_ACTIONS, END_ACTION_STOP, from_legacy_config
+from model.dates_applied import DatesApplied
+from nimble_studio_auto_workstation_scheduler_stack import get_configured_slot_minutes
+from update_auto_launch_config import ConfigurationValidator, ConfigurationUpdater
+from utils.client_utils import get_nimble_client
+from utils.config_table import ConfigTable
+from utils.prompter import Prompter
+
+# Items per TransactWriteItems call
+MAX_TRANSACTION_ITEMS = 100
+DEFAULT_CONCURRENCY = 8
+ROW_FIELDS = ['user_name', 'sso_id', 'studio_id', 'start_time', 'days', 'launch_profile', 'streaming_image', 'instance_type', 'enabled', 'end_time', 'end_action']
+REPORT_FIELDS = ['row', 'user_id', 'start_time', 'status', 'uuid', 'message']
+STATUS_CREATED = "created"
+STATUS_MERGED = "merged"
+STATUS_FAILED = "failed"
+# Attempts of a lookup that fails, such as when throttled, waiting twice as long after each failed attempt
+MAX_LOAD_ATTEMPTS = 3
+LOAD_RETRY_BASE_SECONDS = 0.5
+
+class ValidationCache():
+    """
+    Values loaded once and shared by every validating thread. Threads asking for a value being loaded wait for it, rather than
+    making the same service call again. Only loaded values are kept: a lookup that still fails after its retries fails the rows
+    waiting for it, and the next row asking for the value loads it again
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values : Dict[Tuple, Future] = dict()
+
+    @staticmethod
+    def load_with_retries(load : Callable):
+        for attempt in range(MAX_LOAD_ATTEMPTS):
+            try:
+                return load()
+            except Exception as e:
+                if attempt == MAX_LOAD_ATTEMPTS - 1:
+                    raise e
+                time.sleep(LOAD_RETRY_BASE_SECONDS * 2 ** attempt)
+
+    def get(self, key : Tuple, load : Callable):
+        with self.lock:
+            future = self.values.get(key)
+            is_loader = future == None
+            if is_loader:
+                future = Future()
+                self.values[key] = future
+        if is_loader:
+            try:
+                future.set_result(ValidationCache.load_with_retries(load))
+            except Exception as e:
+                with self.lock:
+                    del self.values[key]
+                future.set_exception(e)
+        return future.result()
+
+class BulkConfigurationValidator():
+
+    def __init__(self, skip_validation : bool):
+        self.skip_validation = skip_validation
+        self.slot_minutes = get_configured_slot_minutes()
+        self.cache = ValidationCache()
+        self.nimble_client = get_nimble_client()
+        self.identity_helper = IdentityHelper()
+
+    def parse_time(self, value : str, name : str) -> str:
+        # Accepts HH:MM, as update_auto_launch_config.py does, and the HHMM stored in the config table
+        match = re.fullmatch(r"([01]\d|2[0-3]):?([0-5]\d)", value.strip())
+        if match == None:
+            raise ValueError(f"{name} {value} must be in HH:MM format")
+        if int(match.group(2)) % self.slot_minutes != 0:
+            raise ValueError(f"{name} {value} must be an interval of {self.slot_minutes} minutes")
+        return match.group(1) + match.group(2)
+
+    @staticmethod
+    def parse_days(value) -> List[str]:
+        days = value if isinstance(value, list) else re.split(r"[,;\s]+", value.strip())
+        days = [x.strip().upper() for x in days if x.strip() != ""]
+        invalid_days = [x for x in days if x not in ConfigurationValidator.weekdays]
+        if len(days) < 1 or len(invalid_days) > 0:
+            raise ValueError(f"Days {value} must be one or more of: {ConfigurationValidator.weekdays}")
+        return list(dict.fromkeys(days))
+
+    @staticmethod
+    def parse_enabled(value) -> bool:
+        if value == None or isinstance(value, bool):
+            return value != False
+        if str(value).strip().lower() in ["true", "yes", "y", "1"]:
+            return True
+        if str(value).strip().lower() in ["false", "no", "n", "0"]:
+            return False
+        raise ValueError(f"Enabled {value} must be true or false")
+
+    def load_studio_ids(self) -> Set[str]:
+        studio_ids = set()
+        for page in self.nimble_client.get_paginator('list_studios').paginate():
+            studio_ids |= {x['studioId'] for x in page['studios']}
+        return studio_ids
+
+    def load_studio_members(self, studio_id : str) -> Tuple[Set[str], List[str]]:
+        member_ids = set()
+        identity_store_ids = set()
+        for page in self.nimble_client.get_paginator('list_studio_members').paginate(studioId=studio_id):
+            for member in page['members']:
+                member_ids.add(member['principalId'])
+                identity_store_ids.add(member['identityStoreId'])
+        return (member_ids, sorted(identity_store_ids))
+
+    def is_identity_user(self, user_id : str, identity_store_ids : List[str]) -> bool:
+        for identity_store_id in identity_store_ids:
+            try:
+                self.identity_helper.describe_identity_user(identity_store_id=identity_store_id, user_id=user_id)
+                return True
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                    raise e
+        return False
+
+    def load_launch_profiles(self, studio_id : str, user_id : str) -> Dict[str, Dict]:
+        launch_profiles = dict()
+        for page in self.nimble_client.get_paginator('list_launch_profiles').paginate(studioId=studio_id, principalId=user_id):
+            launch_profiles.update({x['launchProfileId']: x for x in page['launchProfiles']})
+        return launch_profiles
+
+    def validate_user(self, row : Dict) -> str:
+        studio_id = row['studio_id']
+        member_ids, identity_store_ids = self.cache.get(('members', studio_id), lambda: self.load_studio_members(studio_id))
+        if row['sso_id'] != None:
+            user_id = row['sso_id']
+            if user_id not in member_ids and not self.cache.get(('user', tuple(identity_store_ids), user_id), lambda: self.is_identity_user(user_id, identity_store_ids)):
+                raise ValueError(f"User {user_id} not found in any of the following identity stores: {identity_store_ids}")
+            return user_id
+        user_id = self.cache.get(('user_name', tuple(identity_store_ids), row['user_name']), lambda: self.identity_helper.search_identity_stores_for_user_name(row['user_name'], identity_store_ids))
+        if user_id == None:
+            raise ValueError(f"UserName \"{row['user_name']}\" not found in any of the following identity stores: {identity_store_ids}")
+        return user_id
+
+    def validate_studio(self, row : Dict) -> None:
+        if row['studio_id'] not in self.cache.get(('studios',), self.load_studio_ids):
+            raise ValueError(f"Studio {row['studio_id']} not found")
+
+    def validate_launch(self, row : Dict, user_id : str) -> None:
+        studio_id = row['studio_id']
+        launch_profiles = self.cache.get(('launch_profiles', studio_id, user_id), lambda: self.load_launch_profiles(studio_id, user_id))
+        launch_profile = launch_profiles.get(row['launch_profile'])
+        if launch_profile == None:
+            raise ValueError(f"User {user_id} does not have access to launch profile {row['launch_profile']}")
+        if row['streaming_image'] not in launch_profile['streamConfiguration']['streamingImageIds']:
+            raise ValueError(f"Streaming image {row['streaming_image']} is not one of: {launch_profile['streamConfiguration']['streamingImageIds']}")
+        if row['instance_type'] not in launch_profile['streamConfiguration']['ec2InstanceTypes']:
+            raise ValueError(f"Instance type {row['instance_type']} is not one of: {launch_profile['streamConfiguration']['ec2InstanceTypes']}")
+
+    def validate_row(self, row : Dict) -> AutoLaunchConfig:
+        missing = [x for x in ['studio_id', 'start_time', 'days', 'launch_profile', 'streaming_image', 'instance_type'] if row[x] == None]
+        if row['sso_id'] == None and (row['user_name'] == None or self.skip_validation):
+            missing.append("sso_id" if self.skip_validation else "sso_id or user_name")
+        if len(missing) > 0:
+            raise ValueError(f"Missing {', '.join(missing)}")
+
+        start_time = self.parse_time(row['start_time'], "Start time")
+        end_time = None
+        end_action = None
+        if row['end_time'] != None:
+            end_time = self.parse_time(row['end_time'], "End time")
+            if end_time == start_time:
+                raise ValueError("End time must differ from the start time")
+            end_action = row['end_action'] or END_ACTION_STOP
+            if end_action not in END_ACTIONS:
+                raise ValueError(f"End action must be one of {END_ACTIONS}, not {end_action}")
+
+        # Optionally skip validation requiring service calls
+        user_id = row['sso_id']
+        if not self.skip_validation:
+            self.validate_studio(row)
+            user_id = self.validate_user(row)
+            self.validate_launch(row, user_id)
+
+        return AutoLaunchConfig(
+            user_id,
+            uuid=ConfigurationUpdater.generate_key(),
+            start_time=start_time,
+            studio_id=row['studio_id'],
+            launch_profile=row['launch_profile'],
+            streaming_image_id=row['streaming_image'],
+            instance_type=row['instance_type'],
+            enabled=BulkConfigurationValidator.parse_enabled(row['enabled']),
+            dates_applied=DatesApplied(days=BulkConfigurationValidator.parse_days(row['days'])),
+            end_time=end_time,
+            end_action=end_action
+        )
+
+class ConfigurationImporter():
+
+    def __init__(self, validator : BulkConfigurationValidator, override : bool, concurrency : int, dry_run : bool):
+        self.validator = validator
+        self.override = override
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.config_table = ConfigTable()
+        # Configs of each imported user by uuid, as read from the tables and then updated by each row
+        self.configs_by_user : Dict[str, Dict[str, AutoLaunchConfig]] = dict()
+        self.legacy_uuids = set()
+
+    @staticmethod
+    def read_rows(path : str, input_format : str or None) -> List[Dict]:
+        if input_format == None:
+            input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        with open(path, newline="") as input_file:
+            if input_format == "csv":
+                rows = list(csv.DictReader(input_file))
+            else:
+                rows = [json.loads(line) for line in input_file if line.strip() != ""]
+        # Missing and empty fields are both unset
+        return [{x: row.get(x) if row.get(x) not in ["", None] else None for x in ROW_FIELDS} for row in rows]
+
+    def validate_row(self, row : Dict) -> AutoLaunchConfig or str:
+        try:
+            return self.validator.validate_row(row)
+        except Exception as e:
+            return str(e)
+
+    def read_existing_configs(self, user_ids : List[str]) -> None:
+        # Whole items are read, as overridden and merged configs are saved back
+        for config in self.config_table.query_users(user_ids, None):
+            if isinstance(config, LegacyAutoLaunchConfig):
+                self.legacy_uuids.add(config.uuid)
+            self.configs_by_user.setdefault(config.user_id, dict())[config.uuid] = config
+        self.config_table.print_consumed_capacity()
+
+    @staticmethod
+    def format_config(config : AutoLaunchConfig) -> str:
+        return f"{config.start_time} UTC {config.launch_profile} on {[str(x) for x in config.dates_applied.days]}"
+
+    def apply_config(self, config : AutoLaunchConfig) -> Tuple[str, Set[str]]:
+        """
+        Applies a config as update_auto_launch_config.py does, to the configs read and those of earlier rows. Returns the status
+        of the row and the uuids of the configs it changed
+        """
+        user_configs = self.configs_by_user.setdefault(config.user_id, dict())
+        days = {str(x) for x in config.dates_applied.days}
+        overlapping = [x for x in user_configs.values() if len(days & {str(day) for day in x.dates_applied.days}) > 0]
+        if len(overlapping) > 0 and not self.override:
+            raise ValueError(f"Overlaps the days of existing configs, import with --override to move them: {[ConfigurationImporter.format_config(x) for x in overlapping]}")
+
+        changed_uuids = set()
+        for existing_config in overlapping:
+            existing_config.dates_applied.days = [x for x in existing_config.dates_applied.days if str(x) not in days]
+            if len(existing_config.dates_applied.days) < 1:
+                existing_config.enabled = False
+            changed_uuids.add(existing_config.uuid)
+
+        status = STATUS_CREATED
+        for existing_config in user_configs.values():
+            if (existing_config.start_time == config.start_time and
+                existing_config.launch_profile == config.launch_profile and
+                existing_config.streaming_image_id == config.streaming_image_id and
+                existing_config.instance_type == config.instance_type and
+                existing_config.studio_id == config.studio_id):
+
+                config.uuid = existing_config.uuid
+                config.dates_applied.days = config.dates_applied.days + [x for x in existing_config.dates_applied.days if str(x) not in days]
+                status = STATUS_MERGED
+                break
+        user_configs[config.uuid] = config
+        changed_uuids.add(config.uuid)
+        return (status, changed_uuids)
+
+    @staticmethod
+    def write_user_configs(connection : Connection, configs : List[AutoLaunchConfig], legacy_uuids : List[str]) -> None:
+        if len(configs) + len(legacy_uuids) > MAX_TRANSACTION_ITEMS:
+            raise ValueError(f"Changes {len(configs)} configs and {len(legacy_uuids)} legacy copies, more than the {MAX_TRANSACTION_ITEMS} that can be saved together")
+        try:
+            with TransactWrite(connection=connection) as transaction:
+                for config in configs:
+                    transaction.save(config)
+                # Configs moved out of the legacy table are read from the user keyed table from now on, so their legacy copies are removed
+                for legacy_uuid in legacy_uuids:
+                    transaction.delete(LegacyAutoLaunchConfig(legacy_uuid))
+        except TransactWriteError as e:
+            raise ValueError(f"None of the {len(configs)} changed configs of the user were saved: {e.cause_response_message}")
+
+    def write_configs(self, uuids : Set[str]) -> Dict[str, str]:
+        """
+        Saves the changed configs of each user in a single transaction, together with the removal of their legacy copies, so
+        either every change of a user's rows is saved or none is. Returns the error of each config that failed to save
+        """
+        configs_by_user = dict()
+        for user_id, user_configs in self.configs_by_user.items():
+            for config in [x for x in user_configs.values() if x.uuid in uuids]:
+                if isinstance(config, LegacyAutoLaunchConfig):
+                    config = from_legacy_config(config)
+                config.set_config_key()
+                configs_by_user.setdefault(user_id, list()).append(config)
+
+        # Botocore clients are thread safe, so the writing threads share one
+        connection = Connection(region=AutoLaunchConfig.Meta.region)
+        errors = dict()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                user_id: executor.submit(ConfigurationImporter.write_user_configs, connection, configs, [x.uuid for x in configs if x.uuid in self.legacy_uuids])
+                for user_id, configs in configs_by_user.items()
+            }
+            for user_id, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.update({x.uuid: str(e) for x in configs_by_user[user_id]})
+        return errors
+
+    def import_configs(self, rows : List[Dict]) -> List[Dict]:
+        print(f"Validating {len(rows)} rows")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(self.validate_row, rows))
+
+        user_ids = sorted({x.user_id for x in results if isinstance(x, AutoLaunchConfig)})
+        self.read_existing_configs(user_ids)
+
+        report = list()
+        row_uuids = dict()
+        for index, result in enumerate(results):
+            entry = {'row': index + 1, 'user_id': rows[index]['sso_id'] or rows[index]['user_name'], 'start_time': rows[index]['start_time'], 'status': STATUS_FAILED, 'uuid': None, 'message': None}
+            report.append(entry)
+            if not isinstance(result, AutoLaunchConfig):
+                entry['message'] = result
+                continue
+            try:
+                entry['status'], row_uuids[index] = self.apply_config(result)
+                entry.update(user_id=result.user_id, start_time=result.start_time, uuid=result.uuid)
+            except ValueError as e:
+                entry['message'] = str(e)
+
+        changed_uuids = {x for uuids in row_uuids.values() for x in uuids}
+        if self.dry_run:
+            print(f"Dry run: {len(changed_uuids)} configs would be saved")
+            return report
+
+        errors = self.write_configs(changed_uuids)
+        for index, uuids in row_uuids.items():
+            failed_uuids = [x for x in uuids if x in errors]
+            if len(failed_uuids) > 0:
+                report[index].update(status=STATUS_FAILED, message=errors[failed_uuids[0]])
+        print(f"Saved {len(changed_uuids) - len(errors)} configs")
+        return report
+
+    @staticmethod
+    def output_report(report : List[Dict], path : str) -> None:
+        with open(path, "w", newline="") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report)
+        for entry in [x for x in report if x['status'] == STATUS_FAILED]:
+            Prompter.print_red(f"Row {entry['row']} ({entry['user_id']} at {entry['start_time']}): {entry['message']}")
+        counts = {status: len([x for x in report if x['status'] == status]) for status in [STATUS_CREATED, STATUS_MERGED, STATUS_FAILED]}
+        print(f"{counts[STATUS_CREATED]} created, {counts[STATUS_MERGED]} merged into existing configs, {counts[STATUS_FAILED]} failed. Saved the report of each row to {path}")
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Helper script to import Nimble Studio Auto Workstation Scheduler configs for many users from a CSV or JSONL file.")
+
+    parser.add_argument("-i", "--input", dest="input", help=f"CSV file with a header row, or JSONL file with one object per line, with the fields: {', '.join(ROW_FIELDS)}", required=True)
+    parser.add_argument("-f", "--format", dest="format", choices=["csv", "jsonl"], help="Format of the input file, by default csv for .csv files and jsonl otherwise", required=False)
+    parser.add_argument("-r", "--report", dest="report", help="CSV file to save the status of each row to", default="import_report.csv")
+    parser.add_argument("-c", "--concurrency", dest="concurrency", type=int, help="Rows validated at once", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("-O", "--override", dest="override", action='store_true', help="Remove the days of imported configs from the user's existing configs, rather than failing the row", default=False)
+    parser.add_argument("-x", "--skip-validation", dest="skip_validation", action='store_true', help="Skip validation requiring service calls, which needs an sso_id in each row", default=False)
+    parser.add_argument("-d", "--dry-run", dest="dry_run", action='store_true', help="Validate and report each row without saving", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    importer = ConfigurationImporter(
+        validator=BulkConfigurationValidator(script_args.skip_validation),
+        override=script_args.override,
+        concurrency=script_args.concurrency,
+        dry_run=script_args.dry_run)
+    rows = ConfigurationImporter.read_rows(script_args.input, script_args.format)
+    report = importer.import_configs(rows)
+    ConfigurationImporter.output_report(report, script_args.report)
+
+
+if __name__ == "__main__":
+    main()
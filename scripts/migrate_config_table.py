@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+import threading
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
+from model.auto_launch_config import AutoLaunchConfig, LegacyAutoLaunchConfig, from_legacy_config
+from nimble_studio_auto_workstation_scheduler_stack import TABLE_NAME, LEGACY_TABLE_NAME, CONFIG_TABLE_CUTOVER_COMPLETE_CONTEXT_KEY
+from utils.prompter import Prompter
+
+# Items per BatchGetItem and BatchWriteItem call, the most a BatchWriteItem takes
+BATCH_SIZE = 25
+DEFAULT_SEGMENTS = 8
+DEFAULT_CHECKPOINT_FILE = "migrate_config_table_checkpoint.json"
+
+class ConfigTableMigrator():
+
+    def __init__(self, segments : int, checkpoint_file : str, resume : bool, dry_run : bool):
+        self.segments = segments
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+        self.checkpoint = self.load_checkpoint()
+
+    def load_checkpoint(self) -> Dict:
+        if not self.resume or not os.path.exists(self.checkpoint_file):
+            return {'table': LEGACY_TABLE_NAME, 'total_segments': self.segments, 'segments': dict()}
+        with open(self.checkpoint_file) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        # A scan segment only resumes from its own last key when the table is split into the same segments
+        if checkpoint['table'] != LEGACY_TABLE_NAME or checkpoint['total_segments'] != self.segments:
+            raise Exception(f"Checkpoint {self.checkpoint_file} was written for {checkpoint['total_segments']} segments of {checkpoint['table']}, "
+                f"resume with --segments {checkpoint['total_segments']}")
+        print(f"Resuming from {self.checkpoint_file}")
+        return checkpoint
+
+    def get_segment_checkpoint(self, segment : int) -> Dict:
+        with self.lock:
+            return self.checkpoint['segments'].setdefault(str(segment), {'last_evaluated_key': None, 'done': False, 'scanned': 0, 'written': 0, 'existing': 0, 'skipped': 0})
+
+    def save_checkpoint(self) -> None:
+        if self.dry_run:
+            return
+        with self.lock:
+            # Written to a temporary file first, so an interrupted write never leaves a truncated checkpoint
+            with open(f"{self.checkpoint_file}.tmp", "w") as checkpoint_file:
+                json.dump(self.checkpoint, checkpoint_file, indent=2)
+            os.replace(f"{self.checkpoint_file}.tmp", self.checkpoint_file)
+
+    @staticmethod
+    def get_existing_config_keys(configs : List[AutoLaunchConfig]) -> Set[str]:
+        keys = [(x.user_id, x.config_key) for x in configs]
+        return {x.config_key for x in AutoLaunchConfig.batch_get(keys, attributes_to_get=['config_key'])}
+
+    def save_segment_progress(self, segment_checkpoint : Dict, progress : Counter, last_evaluated_key : Dict or None, done : bool = False) -> None:
+        # Counts are only added with the key they were reached at, so a resumed segment does not count a config twice
+        with self.lock:
+            for name, count in progress.items():
+                segment_checkpoint[name] += count
+            segment_checkpoint['last_evaluated_key'] = last_evaluated_key
+            segment_checkpoint['done'] = done
+        progress.clear()
+        self.save_checkpoint()
+
+    def write_batch(self, configs : List[LegacyAutoLaunchConfig], progress : Counter) -> None:
+        migrated = [from_legacy_config(x) for x in configs]
+        # Configs already in the user keyed table were migrated by an earlier run, or saved since by the scripts, so are not overwritten
+        existing_keys = ConfigTableMigrator.get_existing_config_keys(migrated)
+        missing = [x for x in migrated if x.config_key not in existing_keys]
+        if not self.dry_run:
+            with AutoLaunchConfig.batch_write() as batch:
+                for config in missing:
+                    batch.save(config)
+        progress['written'] += len(missing)
+        progress['existing'] += len(migrated) - len(missing)
+
+    def migrate_segment(self, segment : int) -> None:
+        segment_checkpoint = self.get_segment_checkpoint(segment)
+        if segment_checkpoint['done']:
+            return
+        results = LegacyAutoLaunchConfig.scan(segment=segment, total_segments=self.segments, last_evaluated_key=segment_checkpoint['last_evaluated_key'])
+        batch = list()
+        progress = Counter()
+        for config in results:
+            progress['scanned'] += 1
+            if config.user_id == None:
+                # The user keyed table cannot hold a config without a user, and the scheduler cannot launch it
+                print(f"Skipping config {config.uuid} with no user")
+                progress['skipped'] += 1
+                continue
+            batch.append(config)
+            if len(batch) == BATCH_SIZE:
+                self.write_batch(batch, progress)
+                batch = list()
+                # Mid page, the last evaluated key is the last config returned, which has just been written
+                self.save_segment_progress(segment_checkpoint, progress, results.last_evaluated_key)
+        if len(batch) > 0:
+            self.write_batch(batch, progress)
+        self.save_segment_progress(segment_checkpoint, progress, None, done=True)
+        print(f"Segment {segment}: scanned {segment_checkpoint['scanned']}, wrote {segment_checkpoint['written']}, "
+            f"{segment_checkpoint['existing']} already migrated, skipped {segment_checkpoint['skipped']}")
+
+    def run_segments(self, operation) -> List:
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            return list(executor.map(operation, range(self.segments)))
+
+    def migrate(self) -> None:
+        action = "Checking" if self.dry_run else "Copying"
+        print(f"{action} configs from {LEGACY_TABLE_NAME} to {TABLE_NAME} in {self.segments} parallel segments")
+        self.run_segments(self.migrate_segment)
+        totals = {name: sum(x[name] for x in self.checkpoint['segments'].values()) for name in ['scanned', 'written', 'existing', 'skipped']}
+        verb = "Would write" if self.dry_run else "Wrote"
+        print(f"Scanned {totals['scanned']} configs. {verb} {totals['written']}, {totals['existing']} already migrated, skipped {totals['skipped']} with no user")
+
+    def scan_uuids(self, model, segment : int) -> Dict[str, str or None]:
+        return {x.uuid: x.user_id for x in model.scan(segment=segment, total_segments=self.segments, attributes_to_get=['uuid', 'user_id'])}
+
+    def verify(self) -> bool:
+        """
+        Compares the configs of both tables, so the cutover is only completed once every legacy config with a user has been copied
+        """
+        legacy_uuids = dict()
+        for uuids in self.run_segments(lambda x: self.scan_uuids(LegacyAutoLaunchConfig, x)):
+            legacy_uuids.update(uuids)
+        migrated_uuids = set()
+        for uuids in self.run_segments(lambda x: self.scan_uuids(AutoLaunchConfig, x)):
+            migrated_uuids.update(uuids.keys())
+
+        without_user = [x for x, user_id in legacy_uuids.items() if user_id == None]
+        missing = [x for x, user_id in legacy_uuids.items() if user_id != None and x not in migrated_uuids]
+        print(f"{LEGACY_TABLE_NAME}: {len(legacy_uuids)} configs, {len(without_user)} with no user")
+        print(f"{TABLE_NAME}: {len(migrated_uuids)} configs")
+        if len(missing) > 0:
+            Prompter.print_red(f"{len(missing)} configs are not migrated yet: {missing[:10]}")
+            return False
+        print(f"Every config with a user is migrated. Set {CONFIG_TABLE_CUTOVER_COMPLETE_CONTEXT_KEY} to true in cdk.json and redeploy to stop reading {LEGACY_TABLE_NAME}")
+        return True
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Helper script to copy Nimble Studio Auto Workstation Scheduler configs from the uuid keyed table to the user keyed table.")
+
+    parser.add_argument("-s", "--segments", dest="segments", type=int, help="Parallel scan segments of the legacy table, each copied by its own thread", default=DEFAULT_SEGMENTS)
+    parser.add_argument("-c", "--checkpoint", dest="checkpoint", help="File to save the progress of each segment to", default=DEFAULT_CHECKPOINT_FILE)
+    parser.add_argument("-r", "--resume", dest="resume", action='store_true', help="Resume an interrupted migration from the checkpoint file", default=False)
+    parser.add_argument("-v", "--verify", dest="verify", action='store_true', help="Only compare the configs of both tables", default=False)
+    parser.add_argument("-d", "--dry-run", dest="dry_run", action='store_true', help="Only count the configs that would be copied", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    if script_args.segments < 1:
+        raise Exception("Segments must be at least 1")
+    migrator = ConfigTableMigrator(script_args.segments, script_args.checkpoint, script_args.resume, script_args.dry_run)
+    if not script_args.verify:
+        migrator.migrate()
+    if (script_args.verify or not script_args.dry_run) and not migrator.verify():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
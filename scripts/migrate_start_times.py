@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import math
+import uuid
+from argparse import ArgumentParser
+from typing import Dict, List
+from pynamodb.connection import Connection
+from pynamodb.transactions import TransactWrite
+from model.auto_launch_config import AutoLaunchConfig, LegacyAutoLaunchConfig, CONFIG_ATTRIBUTES
+from nimble_studio_auto_workstation_scheduler_stack import get_configured_slot_minutes, validate_slot_minutes
+from utils.config_table import ConfigTable
+from utils.prompter import Prompter
+
+class StartTimeMigrator():
+
+    def __init__(self, slot_minutes : int, dry_run : bool):
+        self.current_slot_minutes = get_configured_slot_minutes()
+        self.slot_minutes = slot_minutes
+        self.dry_run = dry_run
+        # Start times valid for both the current and the new slot length keep launching before and after the redeploy
+        self.migration_slot_minutes = self.current_slot_minutes * slot_minutes // math.gcd(self.current_slot_minutes, slot_minutes)
+
+    def get_migrated_start_time(self, start_time : str) -> str:
+        # Round down, so the workstation is still ready by the original start time
+        hour = int(start_time[:2])
+        minute = int(start_time[2:])
+        return f"{hour:02d}{minute - minute % self.migration_slot_minutes:02d}"
+
+    def get_configs_to_migrate(self) -> Dict[str, List[AutoLaunchConfig]]:
+        configs_by_start_time = dict()
+        # Read whole items, as the start time is part of the key of the user keyed table so moved configs are saved again
+        config_table = ConfigTable()
+        for config in config_table.scan(None):
+            if config.start_time == None or int(config.start_time[2:]) % self.slot_minutes == 0:
+                continue
+            configs_by_start_time.setdefault(config.start_time, list()).append(config)
+        config_table.print_consumed_capacity()
+        return configs_by_start_time
+
+    @staticmethod
+    def move_config(config : AutoLaunchConfig, start_time : str) -> None:
+        """
+        Moves a config to the key of its new start time. The moved config gets a new uuid, so the schedule compiler adds it and
+        removes the original whatever order their stream records arrive in
+        """
+        moved = AutoLaunchConfig(**{x: getattr(config, x) for x in CONFIG_ATTRIBUTES})
+        moved.uuid = str(uuid.uuid4())
+        moved.start_time = start_time
+        moved.set_config_key()
+        # The delete and the save succeed or fail together, and only move configs whose start time has not changed since the scan
+        with TransactWrite(connection=Connection(region=AutoLaunchConfig.Meta.region)) as transaction:
+            transaction.delete(config, condition=(AutoLaunchConfig.start_time == config.start_time))
+            transaction.save(moved)
+
+    def check_whether_to_migrate(self, count : int) -> bool:
+        response = Prompter.prompt_for_input(f"This operation will move the start time of {count} configs. Proceed? ('y' or 'n')")
+        response = Prompter.wait_for_y_n_response(response)
+        return Prompter.check_if_response_is_y(response)
+
+    def migrate_start_times(self) -> None:
+        configs_by_start_time = self.get_configs_to_migrate()
+        count = sum([len(configs) for configs in configs_by_start_time.values()])
+        if count < 1:
+            print(f"All start times are already intervals of {self.slot_minutes} minutes")
+            return
+
+        for start_time in sorted(configs_by_start_time.keys()):
+            print(f"{len(configs_by_start_time[start_time])} configs starting at {start_time} UTC will start at {self.get_migrated_start_time(start_time)} UTC")
+
+        if self.dry_run or not self.check_whether_to_migrate(count):
+            return
+
+        for start_time, configs in configs_by_start_time.items():
+            migrated_start_time = self.get_migrated_start_time(start_time)
+            for config in configs:
+                if isinstance(config, LegacyAutoLaunchConfig):
+                    # Only move configs whose start time has not changed since the scan
+                    config.update(
+                        actions=[LegacyAutoLaunchConfig.start_time.set(migrated_start_time)],
+                        condition=(LegacyAutoLaunchConfig.start_time == start_time)
+                    )
+                else:
+                    StartTimeMigrator.move_config(config, migrated_start_time)
+                print(f"Updated user {config.user_id} auto launch config entry from {start_time} UTC to {migrated_start_time} UTC")
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Helper script to move config start times onto a new slot length before changing slot_minutes in cdk.json.")
+
+    parser.add_argument("-m", "--slot-minutes", dest="slot_minutes", type=int, help="The slot length that will be set in cdk.json", required=True)
+    parser.add_argument("-d", "--dry-run", dest="dry_run", action='store_true', help="Only list the start times that would change", default=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    migrator = StartTimeMigrator(validate_slot_minutes(script_args.slot_minutes), script_args.dry_run)
+    migrator.migrate_start_times()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,52 @@
 from pynamodb.models import Model
-from nimble_studio_auto_workstation_scheduler_stack import TABLE_NAME
+from nimble_studio_auto_workstation_scheduler_stack import TABLE_NAME, LEGACY_TABLE_NAME, is_config_table_cutover_complete
 from pynamodb.attributes import (
     BooleanAttribute, UnicodeAttribute
 )
 from model.dates_applied import DatesApplied
 from utils.client_utils import get_aws_region
 
+END_ACTION_STOP = "stop"
+END_ACTION_DELETE = "delete"
+END_ACTIONS = [END_ACTION_STOP, END_ACTION_DELETE]
+
+CONFIG_KEY_SEPARATOR = "#"
+# Attributes of a config besides its config_key, copied when a config moves from the legacy table
+CONFIG_ATTRIBUTES = ['user_id', 'uuid', 'start_time', 'studio_id', 'launch_profile', 'streaming_image_id', 'instance_type', 'enabled', 'dates_applied', 'end_time', 'end_action']
+
+def get_config_key(start_time : str, launch_profile : str, config_uuid : str) -> str:
+    return CONFIG_KEY_SEPARATOR.join([start_time or "", launch_profile or "", config_uuid])
+
+def get_start_time_key_prefix(start_time : str) -> str:
+    return start_time + CONFIG_KEY_SEPARATOR
+
 class AutoLaunchConfig(Model):
     class Meta:
         table_name = TABLE_NAME
         region = get_aws_region()
 
+    user_id = UnicodeAttribute(hash_key=True)
+    config_key = UnicodeAttribute(range_key=True)
+    uuid = UnicodeAttribute()
+    start_time = UnicodeAttribute(null=True)
+    studio_id = UnicodeAttribute(null=True)
+    launch_profile = UnicodeAttribute(null=True)
+    streaming_image_id = UnicodeAttribute(null=True)
+    instance_type = UnicodeAttribute(null=True)
+    enabled = BooleanAttribute(default=True)
+    dates_applied = DatesApplied()
+    end_time = UnicodeAttribute(null=True)
+    end_action = UnicodeAttribute(null=True)
+
+    def set_config_key(self) -> None:
+        # Called before saving, as the key changes with the start time, launch profile and uuid
+        self.config_key = get_config_key(self.start_time, self.launch_profile, self.uuid)
+
+class LegacyAutoLaunchConfig(Model):
+    class Meta:
+        table_name = LEGACY_TABLE_NAME
+        region = get_aws_region()
+
     uuid = UnicodeAttribute(hash_key=True)
     user_id = UnicodeAttribute(null=True)
     start_time = UnicodeAttribute(null=True)
@@ -19,4 +55,15 @@ class AutoLaunchConfig(Model):
     streaming_image_id = UnicodeAttribute(null=True)
     instance_type = UnicodeAttribute(null=True)
     enabled = BooleanAttribute(default=True)
-    dates_applied = DatesApplied()
\ No newline at end of file
+    dates_applied = DatesApplied()
+    end_time = UnicodeAttribute(null=True)
+    end_action = UnicodeAttribute(null=True)
+
+def from_legacy_config(config : LegacyAutoLaunchConfig) -> AutoLaunchConfig:
+    migrated = AutoLaunchConfig(**{x: getattr(config, x) for x in CONFIG_ATTRIBUTES})
+    migrated.set_config_key()
+    return migrated
+
+def is_legacy_table_read() -> bool:
+    # Until the cutover is marked complete, configs not yet migrated are still read from the legacy table
+    return not is_config_table_cutover_complete()
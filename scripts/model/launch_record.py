@@ -0,0 +1,26 @@
+from pynamodb.models import Model
+from nimble_studio_auto_workstation_scheduler_stack import LAUNCH_RECORD_TABLE_NAME
+from pynamodb.attributes import TTLAttribute, UnicodeAttribute
+from utils.client_utils import get_aws_region
+
+# Records written before stopped sessions were resumed have no launch strategy, and were all created
+LAUNCH_RECORD_STRATEGY_CREATE = "create"
+
+class LaunchRecord(Model):
+    class Meta:
+        table_name = LAUNCH_RECORD_TABLE_NAME
+        region = get_aws_region()
+
+    session_id = UnicodeAttribute(hash_key=True)
+    studio_id = UnicodeAttribute(null=True)
+    user_id = UnicodeAttribute(null=True)
+    launch_profile = UnicodeAttribute(null=True)
+    streaming_image_id = UnicodeAttribute(null=True)
+    instance_type = UnicodeAttribute(null=True)
+    target_launch_time = UnicodeAttribute(null=True)
+    tick_at = UnicodeAttribute(null=True)
+    created_at = UnicodeAttribute(null=True)
+    launch_strategy = UnicodeAttribute(null=True)
+    final_state = UnicodeAttribute(null=True)
+    completed_at = UnicodeAttribute(null=True)
+    expires_at = TTLAttribute(null=True)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+import csv
+import json
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Dict, List, Tuple
+from model.auto_launch_config import AutoLaunchConfig
+from nimble_studio_auto_workstation_scheduler_stack import get_configured_slot_minutes
+from utils.config_table import ConfigTable
+
+WEEKDAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
+SIMULATED_CONFIG_ATTRIBUTES = ['uuid', 'user_id', 'start_time', 'studio_id', 'instance_type', 'enabled', 'dates_applied']
+HEATMAP_CELL_WIDTH = 5
+
+class WeeklyScheduleSimulator():
+
+    def __init__(self, slot_minutes : int, studio_id : str or None, instance_type : str or None, session_hours : float or None):
+        self.slot_minutes = slot_minutes
+        self.studio_id = studio_id
+        self.instance_type = instance_type
+        self.session_hours = session_hours
+        self.slots_per_day = 24 * 60 // slot_minutes
+        self.slot_times = [f"{minutes // 60:02d}{minutes % 60:02d}" for minutes in range(0, 24 * 60, slot_minutes)]
+        self.slot_indexes = {start_time: index for index, start_time in enumerate(self.slot_times)}
+        # Launches keyed by (weekday index, slot index, studio, instance type)
+        self.launches : Counter = Counter()
+        self.skipped : Counter = Counter()
+
+    @staticmethod
+    def load_export(path : str) -> List[AutoLaunchConfig]:
+        """
+        Loads configs from the output of 'aws dynamodb scan', or from a DynamoDB JSON export with one item per line
+        """
+        with open(path) as export_file:
+            content = export_file.read()
+        try:
+            items = json.loads(content)['Items']
+        except (ValueError, KeyError, TypeError):
+            items = [json.loads(line) for line in content.splitlines() if line.strip() != ""]
+            items = [item.get('Item', item) for item in items]
+        return [AutoLaunchConfig.from_raw_data(item) for item in items]
+
+    @staticmethod
+    def scan_table() -> List[AutoLaunchConfig]:
+        config_table = ConfigTable()
+        configs = list(config_table.scan(SIMULATED_CONFIG_ATTRIBUTES))
+        config_table.print_consumed_capacity()
+        return configs
+
+    def add_config(self, config : AutoLaunchConfig) -> None:
+        # Same checks as the scheduler lambda: a tick queries the exact HHMM of its slot, then keeps enabled configs for the weekday
+        if self.studio_id != None and config.studio_id != self.studio_id:
+            return
+        if self.instance_type != None and config.instance_type != self.instance_type:
+            return
+        if config.enabled != True:
+            self.skipped["disabled"] += 1
+            return
+        if config.start_time not in self.slot_indexes:
+            self.skipped[f"start time not on a {self.slot_minutes} minute slot"] += 1
+            return
+        if config.dates_applied == None or len(config.dates_applied.days) < 1:
+            self.skipped["no days applied"] += 1
+            return
+        slot_index = self.slot_indexes[config.start_time]
+        for day in config.dates_applied.days:
+            if str(day) in WEEKDAYS:
+                self.launches[(WEEKDAYS.index(str(day)), slot_index, config.studio_id, config.instance_type)] += 1
+
+    def get_instance_type_matrix(self) -> Dict[str, List[List[int]]]:
+        """
+        Launches per instance type as a weekday by slot matrix
+        """
+        matrix = dict()
+        for (weekday, slot, studio_id, instance_type), count in self.launches.items():
+            rows = matrix.setdefault(instance_type, [[0] * self.slots_per_day for day in WEEKDAYS])
+            rows[weekday][slot] += count
+        return matrix
+
+    @staticmethod
+    def get_total_matrix(matrix : Dict[str, List[List[int]]], days : int, slots : int) -> List[List[int]]:
+        total = [[0] * slots for day in range(days)]
+        for rows in matrix.values():
+            for weekday, row in enumerate(rows):
+                for slot, count in enumerate(row):
+                    total[weekday][slot] += count
+        return total
+
+    def get_running_matrix(self, rows : List[List[int]]) -> List[List[int]]:
+        """
+        Sessions still running at each slot when every session runs for session_hours, wrapping from Sunday into Monday
+        """
+        week = [count for row in rows for count in row]
+        window = max(1, int(self.session_hours * 60 // self.slot_minutes))
+        running = list()
+        current = sum(week[-(window - 1):]) if window > 1 else 0
+        for index, count in enumerate(week):
+            current += count
+            running.append(current)
+            current -= week[index - window + 1]
+        return [running[day * self.slots_per_day:(day + 1) * self.slots_per_day] for day in range(len(WEEKDAYS))]
+
+    def format_slot(self, weekday : int, slot : int) -> str:
+        return f"{WEEKDAYS[weekday]}@{self.slot_times[slot]}"
+
+    @staticmethod
+    def get_peak(rows : List[List[int]]) -> Tuple[int, int, int]:
+        return max(((count, weekday, slot) for weekday, row in enumerate(rows) for slot, count in enumerate(row)), default=(0, 0, 0))
+
+    def print_peaks(self, matrix : Dict[str, List[List[int]]], total : List[List[int]], top : int) -> None:
+        ranked = sorted(((count, weekday, slot) for weekday, row in enumerate(total) for slot, count in enumerate(row) if count > 0), reverse=True)
+        print(f"Busiest {min(top, len(ranked))} slots:")
+        for count, weekday, slot in ranked[:top]:
+            by_instance_type = {instance_type: rows[weekday][slot] for instance_type, rows in matrix.items() if rows[weekday][slot] > 0}
+            print(f"  {self.format_slot(weekday, slot)}: {count} launches {by_instance_type}")
+
+        print("Peak launches in one slot by instance type:")
+        for instance_type in sorted(matrix.keys(), key=str):
+            count, weekday, slot = WeeklyScheduleSimulator.get_peak(matrix[instance_type])
+            output = f"  {instance_type}: {count} at {self.format_slot(weekday, slot)}"
+            if self.session_hours != None:
+                running, weekday, slot = WeeklyScheduleSimulator.get_peak(self.get_running_matrix(matrix[instance_type]))
+                output += f", {running} running at {self.format_slot(weekday, slot)} with {self.session_hours}h sessions"
+            print(output)
+
+    def print_studio_bursts(self) -> None:
+        launches_by_studio_slot : Counter = Counter()
+        for (weekday, slot, studio_id, instance_type), count in self.launches.items():
+            launches_by_studio_slot[(studio_id, weekday, slot)] += count
+        bursts = dict()
+        for (studio_id, weekday, slot), count in launches_by_studio_slot.items():
+            if count > bursts.get(studio_id, (0,))[0]:
+                bursts[studio_id] = (count, weekday, slot)
+        print("Largest burst per studio:")
+        for studio_id, (count, weekday, slot) in sorted(bursts.items(), key=lambda x: x[1][0], reverse=True):
+            print(f"  {studio_id}: {count} launches at {self.format_slot(weekday, slot)}")
+
+    @staticmethod
+    def format_heatmap_cell(count : int) -> str:
+        return f"{count if count > 0 else '.':>{HEATMAP_CELL_WIDTH}}"
+
+    def print_heatmap(self, total : List[List[int]]) -> None:
+        # One column per hour, adding up the launches of its slots
+        slots_per_hour = 60 // self.slot_minutes
+        print("Launches per hour (UTC):")
+        print(" " * 10 + "".join(f"{hour:02d}".rjust(HEATMAP_CELL_WIDTH) for hour in range(24)))
+        for weekday, row in enumerate(total):
+            hours = [sum(row[hour * slots_per_hour:(hour + 1) * slots_per_hour]) for hour in range(24)]
+            print(f"{WEEKDAYS[weekday]:<10}" + "".join(WeeklyScheduleSimulator.format_heatmap_cell(count) for count in hours))
+
+    def write_csv(self, path : str) -> None:
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["weekday", "start_time", "studio_id", "instance_type", "launches"])
+            for (weekday, slot, studio_id, instance_type), count in sorted(self.launches.items(), key=lambda x: (x[0][0], x[0][1], str(x[0][2]), str(x[0][3]))):
+                writer.writerow([WEEKDAYS[weekday], self.slot_times[slot], studio_id, instance_type, count])
+        print(f"Saved launches per slot to {path}")
+
+    def print_slot(self, slot : str) -> None:
+        weekday, start_time = slot.split('@')
+        weekday = WEEKDAYS.index(weekday.upper())
+        slot_index = self.slot_indexes[start_time]
+        launches = {(studio_id, instance_type): count for (day, index, studio_id, instance_type), count in self.launches.items() if day == weekday and index == slot_index}
+        print(f"{sum(launches.values())} launches at {self.format_slot(weekday, slot_index)}:")
+        for (studio_id, instance_type), count in sorted(launches.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {studio_id} {instance_type}: {count}")
+
+    def simulate(self, configs : List[AutoLaunchConfig], top : int, slot : str or None, csv_path : str or None) -> None:
+        for config in configs:
+            self.add_config(config)
+        print(f"Simulated {len(configs)} configs over {len(WEEKDAYS) * self.slots_per_day} slots of {self.slot_minutes} minutes")
+        for reason, count in sorted(self.skipped.items()):
+            print(f"  {count} configs never launch: {reason}")
+        if len(self.launches) < 1:
+            print("No launches scheduled")
+            return
+
+        matrix = self.get_instance_type_matrix()
+        total = WeeklyScheduleSimulator.get_total_matrix(matrix, len(WEEKDAYS), self.slots_per_day)
+        if slot != None:
+            self.print_slot(slot)
+        self.print_peaks(matrix, total, top)
+        self.print_studio_bursts()
+        self.print_heatmap(total)
+        if csv_path != None:
+            self.write_csv(csv_path)
+
+def get_script_params(cli_args=None):
+    parser = ArgumentParser(description="Helper script to replay the weekly launch schedule of the Nimble Studio Auto Workstation Scheduler config offline and report launches per slot.")
+
+    parser.add_argument("-i", "--input", dest="input", help="File with configs exported from the config table, as 'aws dynamodb scan' output or DynamoDB JSON lines. Scans the table when not set", required=False)
+    parser.add_argument("-s", "--studio-id", dest="studio_id", help="Only simulate configs of this studio", required=False)
+    parser.add_argument("-t", "--instance-type", dest="instance_type", help="Only simulate configs of this instance type", required=False)
+    parser.add_argument("-l", "--slot", dest="slot", help="Show the launches of one slot by studio and instance type, as WEEKDAY@HHMM", required=False)
+    parser.add_argument("-r", "--session-hours", dest="session_hours", type=float, help="Also report peak running sessions, assuming each runs this many hours", required=False)
+    parser.add_argument("-n", "--top", dest="top", type=int, help="Number of busiest slots to list", default=10)
+    parser.add_argument("-c", "--csv", dest="csv", help="File to save launches per weekday, slot, studio and instance type to", required=False)
+
+    if not cli_args:
+        return parser.parse_args()
+    else:
+        return parser.parse_args(cli_args.split())
+
+def main(cli_args=None):
+    script_args = get_script_params(cli_args)
+    simulator = WeeklyScheduleSimulator(
+        slot_minutes=get_configured_slot_minutes(),
+        studio_id=script_args.studio_id,
+        instance_type=script_args.instance_type,
+        session_hours=script_args.session_hours)
+    if script_args.input != None:
+        configs = WeeklyScheduleSimulator.load_export(script_args.input)
+    else:
+        configs = WeeklyScheduleSimulator.scan_table()
+    simulator.simulate(configs, script_args.top, script_args.slot, script_args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,12 @@
 from argparse import ArgumentParser
 from typing import List
 from model.auto_launch_config import AutoLaunchConfig
+from utils.config_table import ConfigTable
 from utils.prompter import Prompter
 
+# Config attributes read to toggle a config, which is then updated in place
+TOGGLED_CONFIG_ATTRIBUTES = ['uuid', 'user_id', 'config_key', 'start_time', 'enabled']
+
 class AutoLaunchConfigToggler():
 
     def __init__(self, enabled : bool, studio : str, users : List[str]):
@@ -15,17 +19,25 @@ class AutoLaunchConfigToggler():
             self.users = users
     
     @staticmethod
-    def get_auto_launch_configuration(studio_id : str) -> List[AutoLaunchConfig]:
+    def get_auto_launch_configuration(studio_id : str, users : List[str] or None) -> List[AutoLaunchConfig]:
+        filter_condition = None
         if studio_id:
-            return list(AutoLaunchConfig.scan(studio_id=studio_id))
-        return list(AutoLaunchConfig.scan())
+            filter_condition = (AutoLaunchConfig.studio_id == studio_id)
+        # The configs of listed users are queried, only updating all users scans the table
+        config_table = ConfigTable()
+        if users == None:
+            configs = list(config_table.scan(TOGGLED_CONFIG_ATTRIBUTES, filter_condition))
+        else:
+            configs = list(config_table.query_users(users, TOGGLED_CONFIG_ATTRIBUTES, filter_condition))
+        config_table.print_consumed_capacity()
+        return configs
 
     @staticmethod
     def update_auto_launch_config_enabled_status(enabled : bool, config : AutoLaunchConfig) -> None:
 
         if config.enabled != enabled:
-            config.enabled = enabled
-            config.save()
+            # Update rather than save, as the config was only read with the attributes needed here
+            config.update(actions=[type(config).enabled.set(enabled)])
             print(f"Updated user {config.user_id} auto launch config entry for {config.start_time} UTC - enabled: {enabled}")
 
     def check_whether_to_update_all_users(self) -> bool:
@@ -45,10 +57,10 @@ class AutoLaunchConfigToggler():
             print("No config to update.")
             return
 
-        configs : List[AutoLaunchConfig] = self.get_auto_launch_configuration(studio_id=self.studio)
+        users = None if should_update_all_users else self.users
+        configs : List[AutoLaunchConfig] = self.get_auto_launch_configuration(studio_id=self.studio, users=users)
         for config in configs:
-            if should_update_all_users or (config.user_id in self.users):
-                self.update_auto_launch_config_enabled_status(self.enabled, config)
+            self.update_auto_launch_config_enabled_status(self.enabled, config)
 
 
 def get_script_params(cli_args=None):
@@ -2,6 +2,7 @@
 from argparse import ArgumentParser
 from enum import Enum
 from nimble_studio_auto_workstation_scheduler_stack import RULE_NAME
+from typing import List
 from utils.client_utils import get_cloudwatch_event_client
 
 class AutoLauncherToggler():
@@ -14,31 +15,45 @@ class AutoLauncherToggler():
         self.desired_state = self.State(should_enable)
         self.events_client = get_cloudwatch_event_client()
 
-    def get_auto_launcher_event_state(self) -> State:
+    def get_auto_launcher_rule_names(self) -> List[str]:
+        # Sharded deployments have more than one rule, all named with the same prefix
+        rule_names = list()
+        paginator = self.events_client.get_paginator('list_rules')
+        for page in paginator.paginate(NamePrefix=RULE_NAME):
+            for rule in page['Rules']:
+                rule_names.append(rule['Name'])
+        return rule_names
+
+    def get_auto_launcher_event_state(self, rule_name : str) -> State:
         response = self.events_client.describe_rule(
-            Name=RULE_NAME
+            Name=rule_name
         )
         if response['State'] == 'ENABLED':
             return self.State.ENABLED
         else:
             return self.State.DISABLED
 
-    def update_auto_launcher_state(self) -> State:
+    def update_auto_launcher_state(self, rule_name : str) -> State:
         if self.desired_state == self.State.ENABLED:
             self.events_client.enable_rule(
-                Name=RULE_NAME
+                Name=rule_name
             )
             return self.State.ENABLED
         else:
             self.events_client.disable_rule(
-                Name=RULE_NAME
+                Name=rule_name
             )
             return self.State.DISABLED
 
     def toggle_auto_launcher(self):
-        launcher_state = self.get_auto_launcher_event_state()
-        if launcher_state != self.desired_state:
-            launcher_state = self.update_auto_launcher_state()
+        launcher_state = None
+        for rule_name in self.get_auto_launcher_rule_names():
+            launcher_state = self.get_auto_launcher_event_state(rule_name)
+            if launcher_state != self.desired_state:
+                launcher_state = self.update_auto_launcher_state(rule_name)
+        if launcher_state == None:
+            print(f"No Nimble Studio Auto Workstation Launcher rules found named {RULE_NAME}")
+            return
         print(f"Nimble Studio Auto Workstation Launcher is {launcher_state.name}")
         
 
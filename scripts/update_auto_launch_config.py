@@ -3,13 +3,18 @@ from argparse import ArgumentParser
 from botocore.exceptions import ClientError
 from typing import Dict, List
 from identity.identity_helper import IdentityHelper
-from model.auto_launch_config import AutoLaunchConfig
+from model.auto_launch_config import AutoLaunchConfig, END_ACTIONS, END_ACTION_STOP
 from model.dates_applied import DatesApplied
+from nimble_studio_auto_workstation_scheduler_stack import get_configured_slot_minutes
 from utils.client_utils import get_nimble_client, get_aws_region
+from utils.config_table import ConfigTable
 from utils.prompter import Prompter
 import time
 import uuid
 
+# Config attributes compared to find an existing config for the same session at the same start time
+MATCHED_CONFIG_ATTRIBUTES = ['uuid', 'studio_id', 'launch_profile', 'streaming_image_id', 'instance_type', 'dates_applied']
+
 class ConfigurationValidator():
 
     weekdays = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
@@ -25,7 +30,9 @@ class ConfigurationValidator():
         streaming_image : str, 
         instance_type : str, 
         enabled : bool,
-        skip_validation : bool):
+        skip_validation : bool,
+        end_time : str = None,
+        end_action : str = END_ACTION_STOP):
         
         self.user_name = user_name
         self.sso_id = sso_id
@@ -37,6 +44,8 @@ class ConfigurationValidator():
         self.instance_type = instance_type
         self.enabled = enabled
         self.skip_validation = skip_validation
+        self.end_time = end_time
+        self.end_action = end_action
         self.is_validated = False
         self.nimble_client = get_nimble_client()
         self.identity_helper = IdentityHelper()
@@ -59,8 +68,9 @@ class ConfigurationValidator():
 
         hour, min = time.split(':', 1)
 
-        if min != "00" and min != "15" and min != "30" and min != "45":
-            Prompter.print_red("Minute must be an interval of 15 minutes")
+        slot_minutes = get_configured_slot_minutes()
+        if int(min) % slot_minutes != 0:
+            Prompter.print_red(f"Minute must be an interval of {slot_minutes} minutes")
             return False
         
         return True
@@ -184,6 +194,28 @@ class ConfigurationValidator():
             time = Prompter.prompt_for_input("Enter a workstation UTC start time in format HH:MM")
         self.start_time = time.replace(':', '')
 
+    def check_valid_end_time(self, time) -> bool:
+        if not ConfigurationValidator.check_valid_time(time):
+            return False
+        if time.strip().replace(':', '') == self.start_time:
+            Prompter.print_red("End time must differ from the start time")
+            return False
+        return True
+
+    def validate_end_time(self) -> None:
+        # End times are optional, so only a given end time is validated
+        if self.end_time == None:
+            self.end_action = None
+            return
+        time = self.end_time
+        while not self.check_valid_end_time(time):
+            time = Prompter.prompt_for_input("Enter a workstation UTC end time in format HH:MM, on the next day if not after the start time")
+        self.end_time = time.strip().replace(':', '')
+        if self.end_action == None:
+            self.end_action = END_ACTION_STOP
+        if self.end_action not in END_ACTIONS:
+            raise Exception(f"End action must be one of {END_ACTIONS}, not {self.end_action}")
+
     def validate_days(self) -> None:
         days = self.days
         while days == None or not self.check_valid_days(days):
@@ -221,6 +253,7 @@ class ConfigurationValidator():
 
     def validate_configuration(self) -> None:
         self.validate_start_time()
+        self.validate_end_time()
         self.validate_days()
 
         # Optionally skip validation requiring service calls
@@ -237,6 +270,7 @@ class ConfigurationUpdater():
     def __init__(self, configuration_validator : ConfigurationValidator):
         self.auto_launch_config : AutoLaunchConfig = self.generate_config_to_update(configuration_validator)
         self.should_update_config = True
+        self.config_table = ConfigTable()
 
     @staticmethod
     def generate_key() -> str:
@@ -249,15 +283,17 @@ class ConfigurationUpdater():
         
         days = configuration_validator.days.split(',')
         auto_launch_config : AutoLaunchConfig = AutoLaunchConfig(
-            ConfigurationUpdater.generate_key(),
-            user_id=configuration_validator.sso_id,
+            configuration_validator.sso_id,
+            uuid=ConfigurationUpdater.generate_key(),
             start_time=configuration_validator.start_time,
             studio_id=configuration_validator.studio,
             launch_profile=configuration_validator.launch_profile,
             streaming_image_id=configuration_validator.streaming_image,
             instance_type=configuration_validator.instance_type,
             enabled=configuration_validator.enabled,
-            dates_applied=DatesApplied(days=days)
+            dates_applied=DatesApplied(days=days),
+            end_time=configuration_validator.end_time,
+            end_action=configuration_validator.end_action
         )
         return auto_launch_config
 
@@ -276,7 +312,10 @@ class ConfigurationUpdater():
         return False
 
     def get_current_user_config(self) -> List[AutoLaunchConfig]:
-        return list(AutoLaunchConfig.scan(AutoLaunchConfig.user_id == self.auto_launch_config.user_id))
+        # Read whole items, as overridden configs are saved back
+        configs = list(self.config_table.query_user(self.auto_launch_config.user_id, None))
+        self.config_table.print_consumed_capacity()
+        return configs
 
     def override_existing_config(self, map_config_to_overlapping_days : Dict[AutoLaunchConfig, set]):
         config : AutoLaunchConfig
@@ -291,7 +330,7 @@ class ConfigurationUpdater():
             if len(maintain_days) < 1:
                 config.enabled = False
             config.dates_applied.days = maintain_days
-            config.save()
+            self.config_table.save(config)
 
     def handle_existing_config_updates(self) -> None:
         days_to_update : List = self.auto_launch_config.dates_applied.days
@@ -317,8 +356,9 @@ class ConfigurationUpdater():
 
     def get_current_configs_matching_time(self) -> List[AutoLaunchConfig] or None:
         configs : List[AutoLaunchConfig] = list()
-        for config in AutoLaunchConfig.scan((AutoLaunchConfig.user_id == self.auto_launch_config.user_id) & (AutoLaunchConfig.start_time == self.auto_launch_config.start_time)):
+        for config in self.config_table.query_user(self.auto_launch_config.user_id, MATCHED_CONFIG_ATTRIBUTES, self.auto_launch_config.start_time):
             configs.append(config)
+        self.config_table.print_consumed_capacity()
         if len(configs) > 0:
             return configs
         return None
@@ -336,7 +376,8 @@ class ConfigurationUpdater():
 
                         self.auto_launch_config.uuid = config.uuid
                         self.auto_launch_config.dates_applied.days = self.auto_launch_config.dates_applied.days + list(set(config.dates_applied.days) - set(self.auto_launch_config.dates_applied.days))
-            self.auto_launch_config.save()
+            # The key is set on save, as a matched config's uuid is reused
+            self.config_table.save(self.auto_launch_config)
             print("Configuration has been updated.")
         else:
             print("No config will be updated at this time.")
@@ -362,6 +403,10 @@ def get_script_params(cli_args=None):
                         required=False)
     parser.add_argument("-n", "--instance-type", dest="instance_type", help="The instance type and size to use for the workstation (ex: g4dn.2xlarge)",
                         required=False)
+    parser.add_argument("-T", "--end-time", dest="end_time", help="Optional time (UTC) to end the workstation formatted as HH:MM, on the next day if not after the start time",
+                        required=False)
+    parser.add_argument("-A", "--end-action", dest="end_action", choices=END_ACTIONS, help="Whether to stop or delete the workstation at its end time",
+                        default=END_ACTION_STOP)
     parser.add_argument("-e", "--enable", dest='enabled', action='store_true', help="Enable auto launch for this config")
     parser.add_argument("-D", "--disable", dest='enabled', action='store_false', help="Disable auto launch for this config")
     parser.set_defaults(enabled=True)
@@ -385,7 +430,9 @@ def main(cli_args=None):
         streaming_image=script_args.streaming_image,
         instance_type=script_args.instance_type,
         enabled=script_args.enabled,
-        skip_validation=script_args.skip_validation)
+        skip_validation=script_args.skip_validation,
+        end_time=script_args.end_time,
+        end_action=script_args.end_action)
 
     config_validator.validate_configuration()
     config_updater = ConfigurationUpdater(config_validator)
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+from model.auto_launch_config import AutoLaunchConfig, LegacyAutoLaunchConfig, from_legacy_config, get_start_time_key_prefix, is_legacy_table_read
+from utils.projected_reader import ProjectedReader
+
+# Users whose configs are queried at once
+QUERY_CONCURRENCY = 8
+MAX_IN_CONDITION_VALUES = 100
+
+"""
+    Reads and writes configs in the user keyed config table. Until the cutover is complete, configs not yet migrated are also
+    read from the legacy table, and saving or deleting a config removes its legacy copy
+"""
+class ConfigTable():
+
+    def __init__(self):
+        self.reader = ProjectedReader()
+        self.legacy_read = is_legacy_table_read()
+
+    @staticmethod
+    def read_each_config_once(reads : List[Iterator]) -> Iterator:
+        # A config found in both tables is taken from the user keyed table, which is read first
+        seen_uuids = set()
+        for read in reads:
+            for config in read:
+                if config.uuid not in seen_uuids:
+                    seen_uuids.add(config.uuid)
+                    yield config
+
+    def query_user(self, user_id : str, attributes : List[str] or None, start_time : str = None, filter_condition=None) -> Iterator:
+        """
+        Configs of a user, only those starting at start_time when it is set
+        """
+        range_key_condition = None if start_time is None else AutoLaunchConfig.config_key.startswith(get_start_time_key_prefix(start_time))
+        reads = [self.reader.query(AutoLaunchConfig, user_id, attributes, range_key_condition=range_key_condition, filter_condition=filter_condition)]
+        if self.legacy_read:
+            # The legacy table has no index on users, so it is scanned until the cutover
+            legacy_condition = LegacyAutoLaunchConfig.user_id == user_id
+            if start_time is not None:
+                legacy_condition &= LegacyAutoLaunchConfig.start_time == start_time
+            if filter_condition is not None:
+                legacy_condition &= filter_condition
+            reads.append(self.reader.scan(LegacyAutoLaunchConfig, attributes, legacy_condition))
+        return ConfigTable.read_each_config_once(reads)
+
+    def query_users(self, user_ids : List[str], attributes : List[str] or None, filter_condition=None) -> List:
+        """
+        Configs of each of the users, queried in parallel
+        """
+        with ThreadPoolExecutor(max_workers=QUERY_CONCURRENCY) as executor:
+            configs_by_user = executor.map(lambda x: list(self.reader.query(AutoLaunchConfig, x, attributes, filter_condition=filter_condition)), user_ids)
+            reads = list(configs_by_user)
+        if self.legacy_read:
+            # The legacy table is scanned once per 100 users, the most values an IN condition takes, rather than once per user
+            for index in range(0, len(user_ids), MAX_IN_CONDITION_VALUES):
+                legacy_condition = LegacyAutoLaunchConfig.user_id.is_in(*user_ids[index:index + MAX_IN_CONDITION_VALUES])
+                if filter_condition is not None:
+                    legacy_condition &= filter_condition
+                reads.append(self.reader.scan(LegacyAutoLaunchConfig, attributes, legacy_condition))
+        return list(ConfigTable.read_each_config_once(reads))
+
+    def scan(self, attributes : List[str] or None, filter_condition=None) -> Iterator:
+        reads = [self.reader.scan(AutoLaunchConfig, attributes, filter_condition)]
+        if self.legacy_read:
+            reads.append(self.reader.scan(LegacyAutoLaunchConfig, attributes, filter_condition))
+        return ConfigTable.read_each_config_once(reads)
+
+    def save(self, config) -> AutoLaunchConfig:
+        """
+        Saves a config to the user keyed table, moving it out of the legacy table when it was read from there
+        """
+        if isinstance(config, LegacyAutoLaunchConfig):
+            saved = from_legacy_config(config)
+        else:
+            saved = config
+            saved.set_config_key()
+        saved.save()
+        if self.legacy_read:
+            LegacyAutoLaunchConfig(saved.uuid).delete()
+        return saved
+
+    def delete(self, config) -> None:
+        config.delete()
+        if self.legacy_read and not isinstance(config, LegacyAutoLaunchConfig):
+            LegacyAutoLaunchConfig(config.uuid).delete()
+
+    def print_consumed_capacity(self) -> None:
+        self.reader.print_consumed_capacity()
@@ -21,12 +21,14 @@ setuptools.setup(
     install_requires=[
         "aws-cdk.core==1.117.0",
         "aws-cdk.aws_lambda",
+        "aws-cdk.aws_lambda_event_sources",
         "aws-cdk.aws_dynamodb",
         "boto3>=1.18.19",
         "botocore>=1.21.19",
         "pynamodb>=5.1.0",
         "aws-cdk.aws_events",
-        "aws-cdk.aws_events_targets"
+        "aws-cdk.aws_events_targets",
+        "aws-cdk.aws_sqs"
     ],
 
     python_requires=">=3.7",